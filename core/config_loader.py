@@ -1,13 +1,87 @@
+import copy
 import json
+import os
+import uuid
 from pathlib import Path
-from typing import Dict, Any
-from core.furniture import FurnitureType
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional
+import yaml
+from core.furniture import Furniture, FurnitureType, TYPE_INDEX
+from core.room import Room
 
 # ✅ 添加：统一的家具类型列表（供 layout_state 使用）
 FURNITURE_TYPES = [ft.value for ft in FurnitureType]
 
+def _validate_rect(entry):
+    """门/窗条目必须是 (x, y, w, h)"""
+    if len(entry) != 4:
+        print(f"⚠️ Invalid door/window entry found: {entry}")
+        return None
+    return tuple(map(float, entry))
+
+def snap_to_grid(size: float) -> float:
+    """尺寸吸附到网格单位（1.0 或 0.5）"""
+    return 1.0 if size >= 0.75 else 0.5
+
+class FurnitureSpec(NamedTuple):
+    """
+    编译后的家具配置（不可变）：加载时校验一次并预先计算派生字段，
+    放置循环中直接读属性，不再按字符串键查 dict。
+    """
+    f_type: FurnitureType
+    type_id: int                        # core.furniture.TYPE_INDEX 下标
+    width: float
+    height: float
+    snapped_width: float
+    snapped_height: float
+    clearance: float
+    must_near: Optional[FurnitureType]
+    extras: Mapping[str, Any]           # 其余策略参数（sofa_spacing、min_door_distance 等，只读）
+
+    @property
+    def default_size(self) -> tuple:
+        return self.width, self.height
+
+    def get(self, key: str, default=None):
+        """读取策略参数，缺省时返回 default"""
+        return self.extras.get(key, default)
+
+_SPEC_KEYS = {"default_size", "clearance", "must_near"}
+
+def _compile_spec(type_value: str, config: Dict[str, Any]) -> FurnitureSpec:
+    try:
+        f_type = FurnitureType(type_value)
+    except ValueError:
+        raise ValueError(f"Unknown furniture type in config: {type_value!r}") from None
+    size = config.get("default_size")
+    if size is None or len(size) != 2:
+        raise ValueError(f"Config for {type_value} must contain 'default_size' as [width, height]")
+    width, height = map(float, size)
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Config for {type_value} has non-positive default_size {size}")
+    clearance = float(config.get("clearance", 1.0))
+    if clearance < 0:
+        raise ValueError(f"Config for {type_value} has negative clearance {clearance}")
+    must_near = config.get("must_near")
+    return FurnitureSpec(
+        f_type=f_type,
+        type_id=TYPE_INDEX[f_type],
+        width=width,
+        height=height,
+        snapped_width=snap_to_grid(width),
+        snapped_height=snap_to_grid(height),
+        clearance=clearance,
+        must_near=FurnitureType(must_near) if must_near is not None else None,
+        extras=MappingProxyType({k: v for k, v in config.items() if k not in _SPEC_KEYS}),
+    )
+
+def compile_furniture_specs(rules: Dict[str, Any]) -> Mapping[FurnitureType, FurnitureSpec]:
+    """furniture_rules.json 内容 → 只读 {FurnitureType: FurnitureSpec}（保持文件中的顺序）"""
+    return MappingProxyType({spec.f_type: spec for spec in
+                             (_compile_spec(type_value, config) for type_value, config in rules.items())})
+
 class ConfigLoader:
-    _furniture_config = None
+    _furniture_specs = None
     _room_config = None
 
     @classmethod
@@ -17,30 +91,117 @@ class ConfigLoader:
             return json.load(f)
 
     @classmethod
-    def get_furniture_config(cls, f_type: FurnitureType):
-        if not cls._furniture_config:
-            cls._furniture_config = cls._load_config("furniture_rules.json")
-        
-        config = cls._furniture_config.get(f_type.value, {})
-        if "must_near" in config and config["must_near"] is not None:
-            config["must_near"] = FurnitureType(config["must_near"])
-        return config
+    def furniture_specs(cls) -> Mapping[FurnitureType, FurnitureSpec]:
+        """所有家具的编译配置，首次调用时编译一次"""
+        if cls._furniture_specs is None:
+            cls._furniture_specs = compile_furniture_specs(cls._load_config("furniture_rules.json"))
+        return cls._furniture_specs
+
+    @classmethod
+    def get_furniture_spec(cls, f_type: FurnitureType) -> Optional[FurnitureSpec]:
+        """未配置的家具类型返回 None"""
+        return cls.furniture_specs().get(f_type)
 
     @classmethod
     def get_room_config(cls):
         if not cls._room_config:
             cls._room_config = cls._load_config("room_config.json")
-
-            def validate_entry(entry):
-                if len(entry) != 4:
-                    print(f"⚠️ Invalid door/window entry found: {entry}")
-                    return None
-                return tuple(map(float, entry))
-
-            cls._room_config["doors"] = [validate_entry(d) for d in cls._room_config.get("doors", []) if validate_entry(d)]
-            cls._room_config["windows"] = [validate_entry(w) for w in cls._room_config.get("windows", []) if validate_entry(w)]
+            cls._room_config["doors"] = [_validate_rect(d) for d in cls._room_config.get("doors", []) if _validate_rect(d)]
+            cls._room_config["windows"] = [_validate_rect(w) for w in cls._room_config.get("windows", []) if _validate_rect(w)]
         return cls._room_config
 
     @classmethod
     def get_scoring_weights(cls):
         return cls.get_room_config().get("scoring_weights", {})
+
+class ConfigRegistry:
+    """
+    配置注册表：每个文件只解析一次，按 mtime 检测变更并热加载。
+    - room(path)       → 缓存的 Room（只读共享，不要修改）
+    - furniture(path)  → 由不可变模板浅拷贝出的新家具列表
+    - yaml(path)       → 解析后的 YAML dict（只读共享）
+    version(path) 在文件每次重新解析后递增，长时间运行的训练器可据此判断是否需要重建。
+    """
+    _entries: Dict[str, tuple] = {}   # path → (mtime_ns, version, value, parse)
+
+    @classmethod
+    def _get(cls, path: str, parse):
+        key = str(Path(path).resolve())
+        mtime = os.stat(key).st_mtime_ns
+        entry = cls._entries.get(key)
+        if entry is None or entry[0] != mtime:
+            version = entry[1] + 1 if entry else 0
+            entry = (mtime, version, parse(key), parse)
+            cls._entries[key] = entry
+        return entry[2]
+
+    @classmethod
+    def version(cls, path: str) -> int:
+        """当前版本号（先检查 mtime，文件变更则重新解析）；从未加载过返回 -1"""
+        entry = cls._entries.get(str(Path(path).resolve()))
+        if entry is None:
+            return -1
+        cls._get(path, entry[3])
+        return cls._entries[str(Path(path).resolve())][1]
+
+    @classmethod
+    def room(cls, path: str) -> Room:
+        return cls._get(path, _parse_room)
+
+    @classmethod
+    def furniture(cls, path: str) -> List[Furniture]:
+        return [template.instantiate() for template in cls._get(path, _parse_furniture)]
+
+    @classmethod
+    def furniture_templates(cls, path: str) -> tuple:
+        return cls._get(path, _parse_furniture)
+
+    @classmethod
+    def yaml(cls, path: str) -> Dict[str, Any]:
+        return cls._get(path, _parse_yaml)
+
+    @classmethod
+    def clear(cls):
+        cls._entries.clear()
+
+class FurnitureTemplate(NamedTuple):
+    """不可变家具模板：instantiate() 浅拷贝原型，避免重复构造多边形"""
+    f_type: FurnitureType
+    width: float
+    height: float
+    prototype: Furniture
+
+    def instantiate(self) -> Furniture:
+        item = copy.copy(self.prototype)
+        item.id = str(uuid.uuid4())
+        item.modules = []
+        item.must_near = []
+        return item
+
+def _parse_room(path: str) -> Room:
+    with open(path, 'r') as f:
+        config = json.load(f)
+    config["doors"] = [_validate_rect(d) for d in config.get("doors", []) if _validate_rect(d)]
+    config["windows"] = [_validate_rect(w) for w in config.get("windows", []) if _validate_rect(w)]
+    return Room(config["room_width"], config["room_height"], config)
+
+def _parse_furniture(path: str) -> tuple:
+    with open(path, 'r') as f:
+        rules = json.load(f)
+    return tuple(
+        FurnitureTemplate(spec.f_type, spec.width, spec.height,
+                          Furniture(0.0, 0.0, spec.width, spec.height, spec.f_type))
+        for spec in compile_furniture_specs(rules).values()
+    )
+
+def _parse_yaml(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+def load_room_config(path: str) -> Room:
+    """读取房间配置并构造 Room（经 ConfigRegistry 缓存，返回共享只读对象）"""
+    return ConfigRegistry.room(path)
+
+def load_furniture_config(path: str) -> List[Furniture]:
+    """从 furniture_rules.json 为每种家具生成一件默认尺寸的家具（位置待放置）"""
+    return ConfigRegistry.furniture(path)
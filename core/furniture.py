@@ -19,6 +19,11 @@ class FurnitureType(Enum):
     NIGHTSTAND = "nightstand"
     DINING_SET = "dining_set"
 
+# 类型 → 下标（同时接受枚举和字符串值，避免每次 list.index）；one-hot 编码与规则表共用
+TYPE_LIST = list(FurnitureType)
+TYPE_INDEX = {ft: i for i, ft in enumerate(TYPE_LIST)}
+TYPE_INDEX.update({ft.value: i for ft, i in list(TYPE_INDEX.items())})
+
 class Furniture:
     def __init__(self, x: float, y: float, width: float, height: float,
                  f_type: FurnitureType, rotation: float = 0, modules: Optional[List[FurnitureModule]] = None):
@@ -1,11 +1,12 @@
 import numpy as np
-from typing import List
-from core.furniture import Furniture
+from typing import List, Optional
+from core.furniture import Furniture, TYPE_INDEX
 from core.room import Room
 from core.config_loader import FURNITURE_TYPES  # 假设你有一个类型列表常量
 
 MAX_FURNITURE = 12     # 最大家具数（固定维度）
 TYPE_VEC_LEN = len(FURNITURE_TYPES)  # 每种家具的 one-hot 类型长度
+FEATURE_LEN = 5 + TYPE_VEC_LEN       # [x, y, width, height, rotation, type_onehot...]
 
 def encode_furniture(f: Furniture):
     """
@@ -21,39 +22,76 @@ def encode_furniture(f: Furniture):
         f.rotation / 360.0
     ]
     one_hot = [0] * TYPE_VEC_LEN
-    if f.type in FURNITURE_TYPES:
-        one_hot[FURNITURE_TYPES.index(f.type)] = 1
+    if f.type in TYPE_INDEX:
+        one_hot[TYPE_INDEX[f.type]] = 1
     return vec + one_hot
 
+def encode_rows_into(out: np.ndarray, x, y, width, height, rotation, type_ids, room_width, room_height) -> np.ndarray:
+    """
+    批量编码：把 N 件家具写入 out (N, FEATURE_LEN)。
+    rotation 单位为度；room_width/room_height 可以是标量或长度 N 的数组。
+    """
+    out[:, 0] = x / room_width
+    out[:, 1] = y / room_height
+    out[:, 2] = width / room_width
+    out[:, 3] = height / room_height
+    out[:, 4] = np.asarray(rotation) / 360.0
+    out[:, 5:] = 0.0
+    out[np.arange(len(out)), 5 + np.asarray(type_ids)] = 1.0
+    return out
+
+class LayoutEncoder:
+    """
+    复用 (MAX_FURNITURE, FEATURE_LEN) float32 缓冲区的观测编码器：
+    前 MAX_FURNITURE-1 行为已放置家具（按放置顺序），最后一行为当前待放置家具。
+    放置一件家具后只需更新它所在的行和当前行；observation 返回缓冲区的扁平视图（零拷贝），
+    调用方需要保留时自行 copy。
+    """
+
+    def __init__(self, room_width: float, room_height: float, max_furniture: int = MAX_FURNITURE):
+        self.room_width = float(room_width)
+        self.room_height = float(room_height)
+        self.buffer = np.zeros((max_furniture, FEATURE_LEN), dtype=np.float32)
+        self.observation = self.buffer.reshape(-1)
+
+    def _write(self, row: int, f: Optional[Furniture]) -> None:
+        target = self.buffer[row]
+        if f is None:
+            target[:] = 0.0
+            return
+        target[0] = f.x / self.room_width
+        target[1] = f.y / self.room_height
+        target[2] = f.width / self.room_width
+        target[3] = f.height / self.room_height
+        target[4] = f.rotation / 360.0
+        target[5:] = 0.0
+        index = TYPE_INDEX.get(f.type)
+        if index is not None:
+            target[5 + index] = 1.0
+
+    def update_placed(self, slot: int, f: Furniture) -> np.ndarray:
+        """已放置家具 slot 的位置/朝向变化后只重写这一行"""
+        if slot < len(self.buffer) - 1:
+            self._write(slot, f)
+        return self.observation
+
+    def set_current(self, f: Optional[Furniture]) -> np.ndarray:
+        """设置当前待放置家具（None 表示已全部放置）"""
+        self._write(len(self.buffer) - 1, f)
+        return self.observation
+
+    def encode(self, furniture_list: List[Furniture], current_index: int) -> np.ndarray:
+        """全量编码（回合开始时调用一次）"""
+        self.buffer[:] = 0.0
+        for slot, f in enumerate(furniture_list[:min(current_index, len(self.buffer) - 1)]):
+            self._write(slot, f)
+        current = furniture_list[current_index] if current_index < len(furniture_list) else None
+        return self.set_current(current)
+
 def encode_layout_state(room: Room, furniture_list: List[Furniture], current_index: int):
     """
     Encode full state for PPO: current furniture + already placed furniture
     Output shape: (MAX_FURNITURE * feature_len,)
+    逐步调用时应改用 LayoutEncoder 以复用缓冲区并只更新变化的行。
     """
-    feature_vecs = []
-    placed = furniture_list[:current_index]
-    current = furniture_list[current_index] if current_index < len(furniture_list) else None
-
-    # Encode already-placed furniture
-    for f in placed:
-        vec = encode_furniture(f)
-        normed = [x / room.width if i % 2 == 0 else x / room.height for i, x in enumerate(vec[:4])]
-        feature_vecs.append(normed + vec[4:])  # normalize x/y/w/h, keep rotation/type
-
-    # Pad with zeros if less than MAX_FURNITURE - 1
-    while len(feature_vecs) < MAX_FURNITURE - 1:
-        feature_vecs.append([0] * (5 + TYPE_VEC_LEN))
-
-    # Encode current furniture to place
-    if current:
-        current_vec = encode_furniture(current)
-        normed = [x / room.width if i % 2 == 0 else x / room.height for i, x in enumerate(current_vec[:4])]
-        current_vec = normed + current_vec[4:]
-    else:
-        current_vec = [0] * (5 + TYPE_VEC_LEN)
-
-    feature_vecs.append(current_vec)
-
-    # Flatten
-    flat = [x for vec in feature_vecs for x in vec]
-    return np.array(flat, dtype=np.float32)
+    return LayoutEncoder(room.width, room.height).encode(furniture_list, current_index)
@@ -1,6 +1,40 @@
-from shapely.geometry import Polygon
+from shapely.geometry import Polygon, box
+from shapely.prepared import prep
+import numpy as np
 from core.furniture import Furniture
-from typing import List, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+DOOR_ZONE_BUFFER = 0.8  # 门前通行区缓冲（RuleEngine 门规则、SA 能量、RL 奖励共用）
+
+# 各类静态区域预先构建的缓冲距离（米）；(bx, by) 表示水平/垂直方向分别缓冲
+ZONE_BUFFERS = {
+    "door": (DOOR_ZONE_BUFFER, 1.0, 1.2, (0.3, 1.2)),  # RuleEngine/SA 通行区、RuleEvaluator、check_all_clearances、ensure_door_clearance
+    "window": (0.0, 1.2),
+    "entrance": (0.0, 0.5),                # CLEARANCE_RULES 中鞋柜与入口的间距
+}
+AXIS_TOLERANCE = 1e-9
+
+Buffer = Union[float, Tuple[float, float]]
+
+
+class Zone(NamedTuple):
+    """缓冲后的门/窗/入口区域：轴对齐包围盒 + 多边形 + 预处理几何"""
+    bounds: Tuple[float, float, float, float]   # (x0, y0, x1, y1)
+    polygon: Polygon
+    prepared: object
+
+
+def axis_aligned_bounds(furniture: Furniture) -> Optional[Tuple[float, float, float, float]]:
+    """朝向为 90° 倍数时的包围盒 (x0, y0, x1, y1)，否则返回 None（需要走 Shapely）"""
+    quarter = furniture.rotation / 90.0
+    if abs(quarter - round(quarter)) > AXIS_TOLERANCE:
+        return None
+    cx, cy = furniture.x + furniture.width / 2, furniture.y + furniture.height / 2
+    hx, hy = furniture.width / 2, furniture.height / 2
+    if int(round(quarter)) % 2:
+        hx, hy = hy, hx
+    return cx - hx, cy - hy, cx + hx, cy + hy
+
 
 class Room:
     def __init__(self, width: float, height: float, config=None):
@@ -8,7 +42,6 @@ class Room:
         self.height = height
         self.config = config or {}
         self.furniture: List[Furniture] = []
-        self.room_polygon = Polygon([(0, 0), (width, 0), (width, height), (0, height)])
 
         self.doors = []
         for d in self.config.get("doors", []):
@@ -22,19 +55,86 @@ class Room:
             poly = Polygon([(x, y), (x + ww, y), (x + ww, y + wh), (x, y + wh)])
             self.windows.append(((x, y, ww, wh), poly))
 
+        # 入口缺省为各扇门
+        self.entrances = [tuple(e) for e in self.config.get("entrances", [rect for rect, _ in self.doors])]
+        self._build_geometry()
+
+    def _build_geometry(self):
+        """房间尺寸确定后一次性构建的静态几何（expand_to_fit 后重建）"""
+        self.room_polygon = Polygon([(0, 0), (self.width, 0), (self.width, self.height), (0, self.height)])
+        self.prepared_polygon = prep(self.room_polygon)
+        corners = np.array([(0, 0), (self.width, 0), (self.width, self.height), (0, self.height)], dtype=float)
+        self.wall_segments = np.stack([corners, np.roll(corners, -1, axis=0)], axis=1)  # (4, 2, 2)：起点、终点
+        self._rects = {
+            "door": [rect for rect, _ in self.doors],
+            "window": [rect for rect, _ in self.windows],
+            "entrance": self.entrances,
+        }
+        self._zones: Dict[tuple, Tuple[Zone, ...]] = {}
+        buffers = {kind: list(sizes) for kind, sizes in ZONE_BUFFERS.items()}
+        for kind, sizes in self.config.get("zone_buffers", {}).items():
+            buffers.setdefault(kind, []).extend(tuple(s) if isinstance(s, list) else s for s in sizes)
+        for kind, sizes in buffers.items():
+            for size in sizes:
+                self.zones(kind, size)
+
+    def __getstate__(self):
+        # 预处理几何不可 pickle（多进程 worker 初始化时传递房间），反序列化后重建
+        state = self.__dict__.copy()
+        del state["prepared_polygon"], state["_zones"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_geometry()
+
+    def zones(self, kind: str, buffer: Buffer = 0.0) -> Tuple[Zone, ...]:
+        """kind 为 "door" / "window" / "entrance"；按缓冲距离缓存，同一房间只构建一次"""
+        bx, by = buffer if isinstance(buffer, tuple) else (buffer, buffer)
+        key = (kind, float(bx), float(by))
+        cached = self._zones.get(key)
+        if cached is None:
+            cached = []
+            for x, y, w, h in self._rects[kind]:
+                polygon = box(x - bx, y - by, x + w + bx, y + h + by)
+                cached.append(Zone(polygon.bounds, polygon, prep(polygon)))
+            cached = self._zones[key] = tuple(cached)
+        return cached
+
+    def zone_bounds(self, kind: str, buffer: Buffer = 0.0) -> np.ndarray:
+        """各区域的包围盒数组 (n, 4) = [x0, y0, x1, y1]，供向量化计算使用"""
+        return np.array([zone.bounds for zone in self.zones(kind, buffer)], dtype=float).reshape(-1, 4)
+
+    @staticmethod
+    def overlaps_zone(furniture: Furniture, zone: Zone) -> bool:
+        """与 polygon.intersects 一致（接触也算）；轴对齐家具只比较包围盒"""
+        rect = axis_aligned_bounds(furniture)
+        if rect is None:
+            return zone.prepared.intersects(furniture.polygon)
+        x0, y0, x1, y1 = zone.bounds
+        return rect[0] <= x1 and rect[2] >= x0 and rect[1] <= y1 and rect[3] >= y0
+
+    @staticmethod
+    def zone_contains(zone: Zone, furniture: Furniture) -> bool:
+        """家具完全位于区域内"""
+        rect = axis_aligned_bounds(furniture)
+        if rect is None:
+            return zone.prepared.contains(furniture.polygon)
+        x0, y0, x1, y1 = zone.bounds
+        return rect[0] >= x0 and rect[2] <= x1 and rect[1] >= y0 and rect[3] <= y1
+
     def is_within_bounds(self, furniture: Furniture) -> bool:
-        return self.room_polygon.contains(furniture.polygon)
+        rect = axis_aligned_bounds(furniture)
+        if rect is None:
+            return self.prepared_polygon.contains(furniture.polygon)
+        return rect[0] >= 0 and rect[1] >= 0 and rect[2] <= self.width and rect[3] <= self.height
 
     def expand_to_fit(self, min_width: float, min_height: float):
         while min_width > self.width or min_height > self.height:
             self.width += 1
             self.height += 1
             print(f"⚠️ Room expanded to {self.width}x{self.height}")
+        self._build_geometry()
 
     def get_wall_segments(self) -> List[Tuple[Tuple[float, float], Tuple[float, float]]]:
-        return [
-            ((0, 0), (self.width, 0)),
-            ((self.width, 0), (self.width, self.height)),
-            ((self.width, self.height), (0, self.height)),
-            ((0, self.height), (0, 0))
-        ]
+        return [(tuple(start), tuple(end)) for start, end in self.wall_segments.tolist()]
@@ -0,0 +1,67 @@
+import numpy as np
+
+MASK_GRID = 32  # 可行域栅格分辨率：动作 (x, y) ∈ [0, 1]² 划分为 G×G 个单元
+ROTATION_STEPS = 4  # 动作第三维 ∈ [0, 1] 按四分之一圈量化
+
+
+def decode_rotation(a):
+    """动作第三维 ∈ [0, 1] → 90° 朝向序号 0..3（标量或数组；标量与向量环境共用）"""
+    return np.clip(np.floor(np.asarray(a, dtype=float) * ROTATION_STEPS), 0, ROTATION_STEPS - 1).astype(np.int64)
+
+
+def grid_centers(grid: int = MASK_GRID) -> np.ndarray:
+    """单元中心对应的归一化动作值 (G,)"""
+    return (np.arange(grid) + 0.5) / grid
+
+
+def feasible_grid(cur_w, cur_h, cur_rot, cur_tid, cx, cy, hx, hy, tid, placed,
+                  room_w, room_h, door_zones, min_clear, grid: int = MASK_GRID) -> np.ndarray:
+    """
+    当前家具的可行域栅格 (B, G, G)，[b, row, col] 对应动作 x = centers[col], y = centers[row]。
+    可行 = 完全在房间内 + 与每件已放置家具的间隙不小于 min_clear（与 clearance 奖励满分条件一致）
+    + 不占用门前通行区。
+    cur_*: (B,) 当前家具的宽/高/90° 朝向序号/类型；cx/cy/hx/hy/tid/placed: (B, F) 已放置家具的中心与半宽高。
+    """
+    a = grid_centers(grid)
+    swap = np.asarray(cur_rot) % 2 == 1
+    c_hx = np.where(swap, cur_h, cur_w)[:, None] / 2   # (B, 1)
+    c_hy = np.where(swap, cur_w, cur_h)[:, None] / 2
+    room_w = np.asarray(room_w, dtype=float).reshape(-1, 1)
+    room_h = np.asarray(room_h, dtype=float).reshape(-1, 1)
+    # 动作给出的是未旋转矩形的左下角，旋转绕中心进行
+    qx = a[None, :] * room_w + np.asarray(cur_w)[:, None] / 2   # (B, G) 候选中心
+    qy = a[None, :] * room_h + np.asarray(cur_h)[:, None] / 2
+
+    ok_x = (qx - c_hx >= 0) & (qx + c_hx <= room_w)
+    ok_y = (qy - c_hy >= 0) & (qy + c_hy <= room_h)
+    mask = ok_y[:, :, None] & ok_x[:, None, :]
+
+    if placed.any():
+        required = min_clear[np.asarray(cur_tid)[:, None], tid]   # (B, F)
+        gx = np.maximum(np.abs(qx[:, None, :] - cx[:, :, None]) - hx[:, :, None] - c_hx[:, :, None], 0.0)
+        gy = np.maximum(np.abs(qy[:, None, :] - cy[:, :, None]) - hy[:, :, None] - c_hy[:, :, None], 0.0)
+        # (B, F, G, G)：与已放置家具的间隙² < 要求²
+        clash = gy[:, :, :, None] ** 2 + gx[:, :, None, :] ** 2 < (required ** 2)[:, :, None, None]
+        clash &= placed[:, :, None, None]
+        mask &= ~clash.any(axis=1)
+
+    if len(door_zones):
+        z = np.asarray(door_zones)
+        hit_x = (qx[:, None, :] - c_hx[:, :, None] < z[None, :, 2, None]) & (qx[:, None, :] + c_hx[:, :, None] > z[None, :, 0, None])
+        hit_y = (qy[:, None, :] - c_hy[:, :, None] < z[None, :, 3, None]) & (qy[:, None, :] + c_hy[:, :, None] > z[None, :, 1, None])
+        mask &= ~(hit_y[:, :, :, None] & hit_x[:, :, None, :]).any(axis=1)
+    return mask
+
+
+def snap_to_feasible(xy: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    把归一化动作 xy (B, 2) 映射到最近的可行单元中心；
+    没有可行单元的环境保持原动作（由奖励惩罚）。
+    """
+    grid = mask.shape[-1]
+    a = grid_centers(grid)
+    d2 = (a[None, :, None] - xy[:, 1, None, None]) ** 2 + (a[None, None, :] - xy[:, 0, None, None]) ** 2
+    d2 = np.where(mask, d2, np.inf).reshape(len(xy), -1)
+    best = d2.argmin(axis=1)
+    snapped = np.stack([a[best % grid], a[best // grid]], axis=1)
+    return np.where(np.isfinite(d2[np.arange(len(xy)), best])[:, None], snapped, xy)
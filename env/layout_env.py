@@ -2,13 +2,19 @@ import gym
 import numpy as np
 from core.room import Room
 from core.furniture import Furniture
-from core.config_loader import load_room_config, load_furniture_config
-from core.layout_state import encode_layout_state
-from env.reward_function import compute_total_reward, compute_total_reward_from_dict
+from core.config_loader import ConfigRegistry, load_room_config, load_furniture_config
+from core.layout_state import LayoutEncoder, TYPE_INDEX
+from utils.rasterizer import LayoutRasterizer
+from env.action_mask import MASK_GRID, decode_rotation, feasible_grid, snap_to_feasible
+from rules.pair_tables import compile_pair_tables
+from env.reward_function import RoomStatics, compute_total_reward
 import random
 
 class FurniturePlacementEnv(gym.Env):
-    def __init__(self, room_config_path, furniture_config_path, reward_config_path):
+    metadata = {"render.modes": ["rgb_array"]}
+
+    def __init__(self, room_config_path, furniture_config_path, reward_config_path, action_mode="continuous"):
+        """action_mode="snap" 时 (x, y) 被映射到当前家具可行域中最近的栅格单元"""
         super().__init__()
         self.room_config_path = room_config_path
         self.furniture_config_path = furniture_config_path
@@ -19,53 +25,112 @@ class FurniturePlacementEnv(gym.Env):
         self.current_index = 0
         self.episode_rewards = []
         self.allow_rotation = True
+        self.max_furniture = None
+        self._rasterizer = None
+        self.encoder = None
+        self.min_clear = compile_pair_tables().min_clear
+        self.set_action_mode(action_mode)
         self.reward_fn = compute_total_reward(reward_config_path)
+        self._reward_version = ConfigRegistry.version(reward_config_path)
 
         self._load_configs()
         self.observation_space = gym.spaces.Box(low=0, high=1, shape=(self._get_obs().shape[0],), dtype=np.float32)
-        self.action_space = gym.spaces.Box(low=np.array([0.0, 0.0, 0]), high=np.array([1.0, 1.0, 3]), dtype=np.float32)  # x, y, rotation index
+        self.action_space = gym.spaces.Box(low=np.array([0.0, 0.0, 0]), high=np.array([1.0, 1.0, 1.0]), dtype=np.float32)  # x, y, rotation（与向量环境相同的量化）
 
     def _load_configs(self):
+        # 配置只解析一次；家具由不可变模板浅拷贝得到，文件变更（mtime）时自动重新解析
         self.room = load_room_config(self.room_config_path)
         self.furniture = load_furniture_config(self.furniture_config_path)
         random.shuffle(self.furniture)
+        if self.max_furniture is not None:
+            self.furniture = self.furniture[:self.max_furniture]
+        version = ConfigRegistry.version(self.reward_config_path)
+        if version != self._reward_version:
+            self.reward_fn = compute_total_reward(self.reward_config_path)
+            self._reward_version = version
+        if self._rasterizer is None or self._rasterizer_room is not self.room:
+            self._rasterizer = LayoutRasterizer.from_room(self.room)
+            self._rasterizer_room = self.room
+            self.door_zones = RoomStatics.from_room(self.room).door_zones
         self.current_index = 0
         self.episode_rewards = []
+        # 编码器缓冲区跨回合复用，只在房间尺寸变化时重建
+        if self.encoder is None or (self.encoder.room_width, self.encoder.room_height) != (float(self.room.width), float(self.room.height)):
+            self.encoder = LayoutEncoder(self.room.width, self.room.height)
+        self.encoder.encode(self.furniture, self.current_index)
 
     def reset(self):
         self._load_configs()
         return self._get_obs()
 
     def _get_obs(self):
-        return encode_layout_state(self.room, self.furniture, self.current_index)
+        # 编码器缓冲区在后续 step 中会被原地更新，返回副本
+        return self.encoder.observation.copy()
 
     def step(self, action):
         if self.current_index >= len(self.furniture):
             return self._get_obs(), 0.0, True, {}
 
         current_f = self.furniture[self.current_index]
-        x, y, rot_idx = action
+        x, y, rot = action
         room_w, room_h = self.room.width, self.room.height
-        current_f.x = x * room_w
-        current_f.y = y * room_h
 
         if self.allow_rotation:
-            current_f.rotation = int(rot_idx) * 90
+            current_f.rotation = int(decode_rotation(rot)) * 90
         else:
             current_f.rotation = 0
+        if self.action_mode == "snap":
+            mask = self.feasibility_mask(current_f.rotation // 90)
+            x, y = snap_to_feasible(np.array([[x, y]], dtype=float), mask[None])[0]
+        current_f.x = x * room_w
+        current_f.y = y * room_h
 
         reward = self.reward_fn(self.room, self.furniture, current_f)
         self.episode_rewards.append(reward)
+        self.encoder.update_placed(self.current_index, current_f)
         self.current_index += 1
         done = self.current_index >= len(self.furniture)
+        self.encoder.set_current(None if done else self.furniture[self.current_index])
         return self._get_obs(), reward, done, {}
 
+    def feasibility_mask(self, rotation=0, grid=MASK_GRID):
+        """当前家具的可行域栅格 (G, G)，[row, col] 对应动作 (x, y) = ((col+0.5)/G, (row+0.5)/G)"""
+        current = self.furniture[self.current_index]
+        placed = self.furniture[:self.current_index]
+        swap = np.array([round(f.rotation / 90) % 2 == 1 for f in placed], dtype=bool)
+        w = np.array([f.width for f in placed], dtype=float)
+        h = np.array([f.height for f in placed], dtype=float)
+        cx = np.array([f.x for f in placed], dtype=float) + w / 2
+        cy = np.array([f.y for f in placed], dtype=float) + h / 2
+        hx, hy = np.where(swap, h, w) / 2, np.where(swap, w, h) / 2
+        tid = np.array([TYPE_INDEX[f.type] for f in placed], dtype=np.int64)
+        return feasible_grid(
+            np.array([current.width]), np.array([current.height]), np.array([rotation]),
+            np.array([TYPE_INDEX[current.type]]), cx[None], cy[None], hx[None], hy[None], tid[None],
+            np.ones((1, len(placed)), dtype=bool), self.room.width, self.room.height,
+            self.door_zones, self.min_clear, grid,
+        )[0]
+
+    def set_action_mode(self, mode):
+        if mode not in ("continuous", "snap"):
+            raise ValueError(f"Unknown action mode: {mode}")
+        self.action_mode = mode
+
+    def render(self, mode="rgb_array"):
+        """返回已放置家具的 RGB 图像 (H, W, 3) uint8"""
+        if mode != "rgb_array":
+            raise NotImplementedError(f"Unsupported render mode: {mode}")
+        return self._rasterizer.render(self.furniture[:self.current_index])
+
     # 🧠 外部调度支持接口：
     def set_max_furniture(self, max_num):
+        self.max_furniture = max_num
         self.furniture = self.furniture[:max_num]
+        self.encoder.encode(self.furniture, self.current_index)
 
     def set_rotation_enabled(self, enabled: bool):
         self.allow_rotation = enabled
 
     def update_reward_weights(self, weights_dict: dict):
-        self.reward_fn = compute_total_reward_from_dict(weights_dict)
\ No newline at end of file
+        # 只替换权重，保留奖励引擎的房间缓存与统计
+        self.reward_fn.update_weights(weights_dict)
\ No newline at end of file
@@ -1,62 +1,214 @@
-import yaml
-from rules.reward_components.alignment import alignment_reward
-from rules.reward_components.clearance import clearance_reward
-from rules.reward_components.rotation_bonus import get_rotation_alignment_reward
-from rules.reward_components.window_bonus import get_window_proximity_reward
-from rules.reward_components.path_score import compute_astar_path_score
-from rules.reward_components.relation_rewards import must_be_near_reward, must_face_reward
+import time
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional
+from core.config_loader import ConfigRegistry
+from core.furniture import Furniture
+from core.layout_state import MAX_FURNITURE
+from core.room import DOOR_ZONE_BUFFER
+from rules.pair_tables import TYPE_INDEX, MUST_NEAR_DISTANCE, compile_pair_tables
 from rules.rule_stats_logger import RuleStatsLogger
 
-logger = RuleStatsLogger()
+REWARD_TERMS = ["clearance", "alignment", "rotation", "window", "path", "near", "face"]
+ALIGN_TOLERANCE = 0.5   # 边缘距墙/其他家具边缘 0 → 1 分，≥ 0.5m → 0 分
+ROTATION_THRESHOLD = 20.0  # 与 get_rotation_alignment_reward 默认阈值一致
+WINDOW_DISTANCE = 2.0      # 与 get_window_proximity_reward 默认距离一致
 
-def compute_total_reward(config_path):
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return compute_total_reward_from_dict(config)
 
-def compute_total_reward_from_dict(config: dict):
+class RoomStatics(NamedTuple):
+    """房间中与家具无关的静态结构，每个房间只计算一次"""
+    window_centers: np.ndarray   # (W, 2)
+    door_zones: np.ndarray       # (D, 4) = [x0, y0, x1, y1]
+    door_centers: np.ndarray     # (D, 2)
+
+    @classmethod
+    def from_room(cls, room) -> "RoomStatics":
+        doors, windows = room.zone_bounds("door"), room.zone_bounds("window")
+        return cls(
+            window_centers=(windows[:, :2] + windows[:, 2:]) / 2,
+            door_zones=room.zone_bounds("door", DOOR_ZONE_BUFFER),
+            door_centers=(doors[:, :2] + doors[:, 2:]) / 2,
+        )
+
+
+def _lap(logger: Optional[RuleStatsLogger], term: str, start: int) -> int:
+    """统计开启时记录 start 以来的耗时，返回新的起点"""
+    if logger is None:
+        return start
+    now = time.perf_counter_ns()
+    logger.record_time(term, now - start)
+    return now
+
+
+def reward_terms_batch(c_x, c_y, c_hx, c_hy, c_tid, angle, cx, cy, hx, hy, tid, placed,
+                       room_w, room_h, statics: RoomStatics, min_clear, near_table, face_table,
+                       logger: Optional[RuleStatsLogger] = None) -> Dict[str, np.ndarray]:
     """
-    构建一个 reward_fn: (room, furniture_list, current_furniture) → float
-    使用传入的 reward config dict 而非读取文件
+    各奖励项的批量计算：当前家具 c_* / angle 为 (B,)，已放置家具 cx/cy/hx/hy/tid/placed 为 (B, F)，
+    坐标均为中心点与半宽高。与 rules.reward_components 中的组件一一对应。
+    给定已开启的 logger 时按奖励项记录耗时（共享的间隙计算计入 clearance）。
     """
-    def reward_fn(room, furniture_list, current_furniture):
-        total = 0.0
+    B = len(c_x)
+    W, H = room_w, room_h
+    logger = logger if logger is not None and logger.enabled else None
+    t = time.perf_counter_ns() if logger else 0
+
+    # 与已放置家具的包围盒间隙
+    gap_x = np.maximum(np.abs(cx - c_x[:, None]) - hx - c_hx[:, None], 0.0)
+    gap_y = np.maximum(np.abs(cy - c_y[:, None]) - hy - c_hy[:, None], 0.0)
+    gap = np.hypot(gap_x, gap_y)
+
+    # clearance：越界为 0；否则取与各已放置家具 gap / 最小间距 的最小值
+    inside = (c_x - c_hx >= 0) & (c_x + c_hx <= W) & (c_y - c_hy >= 0) & (c_y + c_hy <= H)
+    required = min_clear[c_tid[:, None], tid]
+    ratio = np.where(placed, np.clip(gap / np.maximum(required, 1e-6), 0.0, 1.0), 1.0)
+    clearance = np.where(inside, ratio.min(axis=1, initial=1.0), 0.0)
+    t = _lap(logger, "clearance", t)
+
+    # alignment：任一边缘到墙或已放置家具同向边缘的最小距离
+    left, right, bottom, top = c_x - c_hx, c_x + c_hx, c_y - c_hy, c_y + c_hy
+    wall = np.minimum.reduce([np.abs(left), np.abs(W - right), np.abs(bottom), np.abs(H - top)])
+    edge_x = np.minimum(np.abs((cx - hx) - left[:, None]), np.abs((cx + hx) - right[:, None]))
+    edge_y = np.minimum(np.abs((cy - hy) - bottom[:, None]), np.abs((cy + hy) - top[:, None]))
+    edge = np.where(placed, np.minimum(edge_x, edge_y), np.inf).min(axis=1, initial=np.inf)
+    alignment = np.maximum(0.0, 1.0 - np.minimum(wall, edge) / ALIGN_TOLERANCE)
+    t = _lap(logger, "alignment", t)
+
+    # rotation：朝向 0°
+    diff = np.minimum(angle, 360 - angle)
+    rotation = np.maximum(0.0, 1.0 - diff / ROTATION_THRESHOLD)
+    t = _lap(logger, "rotation", t)
+
+    # window：中心到最近窗户中心
+    if len(statics.window_centers):
+        wc = statics.window_centers
+        d = np.hypot(c_x[:, None] - wc[:, 0], c_y[:, None] - wc[:, 1]).min(axis=1)
+        window = np.where(d <= WINDOW_DISTANCE, 1.0 - d / WINDOW_DISTANCE, 0.0)
+    else:
+        window = np.zeros(B)
+    t = _lap(logger, "window", t)
+
+    # path：无障碍网格上 A* 路径长度即曼哈顿距离；占用门前通行区则视为堵塞
+    if len(statics.door_zones):
+        z, dc = statics.door_zones, statics.door_centers
+        blocked = ((left[:, None] < z[:, 2]) & (right[:, None] > z[:, 0]) &
+                   (bottom[:, None] < z[:, 3]) & (top[:, None] > z[:, 1])).any(axis=1)
+        length = (np.abs(c_x[:, None] - dc[:, 0]) + np.abs(c_y[:, None] - dc[:, 1])).min(axis=1)
+        path = np.where(blocked, 0.0, np.maximum(0.0, 1.0 - length / (W + H)))
+    else:
+        path = np.ones(B)
+    t = _lap(logger, "path", t)
+
+    # near：must_near 目标类型的最近中心距离
+    center_d = np.hypot(cx - c_x[:, None], cy - c_y[:, None])
+    is_target = placed & near_table[c_tid[:, None], tid]
+    nearest = np.where(is_target, center_d, np.inf).min(axis=1, initial=np.inf)
+    near = np.where(nearest < MUST_NEAR_DISTANCE, 1.0 - nearest / MUST_NEAR_DISTANCE, 0.0)
+    t = _lap(logger, "near", t)
+
+    # face：朝向 facing 目标（角度差小于阈值）
+    threshold = face_table[c_tid[:, None], tid]
+    bearing = np.degrees(np.arctan2(cy - c_y[:, None], cx - c_x[:, None]))
+    delta = np.abs((bearing - angle[:, None] + 180.0) % 360.0 - 180.0)
+    face = (placed & (threshold > 0) & (delta < threshold)).any(axis=1).astype(float)
+    _lap(logger, "face", t)
+
+    return {
+        "clearance": clearance, "alignment": alignment, "rotation": rotation, "window": window,
+        "path": path, "near": near, "face": face,
+    }
+
 
-        if config.get("clearance_weight", 0) > 0:
-            score = clearance_reward(room, current_furniture, furniture_list)
-            logger.record_reward("clearance", score)
-            total += config["clearance_weight"] * score
-
-        if config.get("alignment_weight", 0) > 0:
-            score = alignment_reward(current_furniture, room)
-            logger.record_reward("alignment", score)
-            total += config["alignment_weight"] * score
-
-        if config.get("rotation_weight", 0) > 0:
-            score = get_rotation_alignment_reward(current_furniture, target_angle=0)
-            logger.record_reward("rotation", score)
-            total += config["rotation_weight"] * score
-
-        if config.get("window_weight", 0) > 0:
-            score = get_window_proximity_reward(current_furniture, room.windows)
-            logger.record_reward("window", score)
-            total += config["window_weight"] * score
-
-        if config.get("path_weight", 0) > 0:
-            score = compute_astar_path_score(room.to_grid(), room.door_position, (current_furniture.x, current_furniture.y))
-            logger.record_reward("path", score)
-            total += config["path_weight"] * score
-
-        if config.get("near_weight", 0) > 0:
-            score = must_be_near_reward(current_furniture, furniture_list)
-            logger.record_reward("near", score)
-            total += config["near_weight"] * score
-
-        if config.get("face_weight", 0) > 0:
-            score = must_face_reward(current_furniture, furniture_list)
-            logger.record_reward("face", score)
-            total += config["face_weight"] * score
+def _geometry(f: Furniture):
+    """Furniture → (中心 x, 中心 y, 半宽, 半高, 类型下标, 朝向角度)，朝向按 90° 量化"""
+    quarter = int(round(f.rotation / 90)) % 4
+    hx, hy = (f.height / 2, f.width / 2) if quarter % 2 else (f.width / 2, f.height / 2)
+    return f.x + f.width / 2, f.y + f.height / 2, hx, hy, TYPE_INDEX[f.type], quarter * 90.0
 
+
+class RewardEngine:
+    """
+    有状态的奖励计算：reward_fn(room, furniture_list, current_furniture) → float。
+    - 房间静态结构（窗户中心、门前通行区）按房间对象缓存，ConfigRegistry 未重载时跨回合复用
+    - 已放置家具的几何缓存在预分配数组中（按放置顺序逐行写入），每步只计算新放置家具相关的各项
+    - 统计写入实例自己的 RuleStatsLogger，不再共享模块级全局对象
+    """
+
+    def __init__(self, config: dict, logger: Optional[RuleStatsLogger] = None):
+        self.logger = logger if logger is not None else RuleStatsLogger()
+        tables = compile_pair_tables()
+        self.min_clear, self.near_table, self.face_table = tables.min_clear, tables.must_near, tables.facing
+        self.update_weights(config)
+        self.last_terms: Dict[str, float] = {}
+        self._room = None
+        self._statics = None
+        self._geom = np.zeros((MAX_FURNITURE, 4))
+        self._tid = np.zeros(MAX_FURNITURE, dtype=np.int64)
+        self.reset()
+
+    def update_weights(self, config: dict) -> None:
+        self.weights = {term: float(config.get(f"{term}_weight", 0)) for term in REWARD_TERMS}
+
+    def reset(self) -> None:
+        """清空已放置家具缓存（新回合）"""
+        self._ids: List[int] = []
+
+    def _sync(self, placed: List[Furniture]) -> None:
+        """缓存与环境中已放置家具不一致（新回合/重排）时按当前列表重建"""
+        if len(placed) == len(self._ids) and all(id(f) == i for f, i in zip(placed, self._ids)):
+            return
+        self.reset()
+        for f in placed:
+            self._append(f)
+
+    def _append(self, f: Furniture) -> None:
+        cx, cy, hx, hy, tid, _ = _geometry(f)
+        n = len(self._ids)
+        if n == len(self._geom):
+            # 家具数超过 MAX_FURNITURE 时容量翻倍（摊还 O(1)）
+            self._geom = np.concatenate([self._geom, np.zeros_like(self._geom)])
+            self._tid = np.concatenate([self._tid, np.zeros_like(self._tid)])
+        self._geom[n] = cx, cy, hx, hy
+        self._tid[n] = tid
+        self._ids.append(id(f))
+
+    def terms(self, room, placed: List[Furniture], current: Furniture) -> Dict[str, float]:
+        """当前家具相对已放置家具的各项得分（不把当前家具加入缓存）"""
+        if room is not self._room:
+            self._room, self._statics = room, RoomStatics.from_room(room)
+        self._sync(placed)
+        c_x, c_y, c_hx, c_hy, c_tid, angle = _geometry(current)
+        n = len(self._ids)
+        g, tid = self._geom[:n], self._tid[:n]
+        arr = lambda v: np.array([v], dtype=float)
+        batch = reward_terms_batch(
+            arr(c_x), arr(c_y), arr(c_hx), arr(c_hy), np.array([c_tid]), arr(angle),
+            g[None, :, 0], g[None, :, 1], g[None, :, 2], g[None, :, 3], tid[None],
+            np.ones((1, n), dtype=bool), room.width, room.height, self._statics,
+            self.min_clear, self.near_table, self.face_table, self.logger,
+        )
+        return {term: float(value[0]) for term, value in batch.items()}
+
+    def __call__(self, room, furniture_list: List[Furniture], current_furniture: Furniture) -> float:
+        index = next(k for k, f in enumerate(furniture_list) if f is current_furniture)
+        placed = furniture_list[:index]
+        self.last_terms = self.terms(room, placed, current_furniture)
+        total = 0.0
+        for term, weight in self.weights.items():
+            if weight > 0:
+                score = self.last_terms[term]
+                self.logger.record_reward(term, score)
+                total += weight * score
+        self._append(current_furniture)
         return total
 
-    return reward_fn
\ No newline at end of file
+
+def compute_total_reward(config_path):
+    # 经 ConfigRegistry 缓存，每个文件版本只解析一次
+    return compute_total_reward_from_dict(ConfigRegistry.yaml(config_path))
+
+def compute_total_reward_from_dict(config: dict):
+    """
+    构建一个 reward_fn: (room, furniture_list, current_furniture) → float
+    使用传入的 reward config dict 而非读取文件；返回的 RewardEngine 在回合内增量缓存已放置家具
+    """
+    return RewardEngine(config)
@@ -0,0 +1,217 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from typing import Optional
+from env.vector_env import VectorFurniturePlacementEnv
+
+# 共享内存中的缓冲区：名称 → (每个环境的形状, dtype)
+def _buffer_specs(obs_dim: int):
+    return {
+        "actions": ((3,), np.float64),
+        "obs": ((obs_dim,), np.float32),
+        "final_obs": ((obs_dim,), np.float32),
+        "rewards": ((), np.float64),
+        "dones": ((), np.bool_),
+        "episode_return": ((), np.float64),
+    }
+
+
+def _attach(names, specs, num_envs):
+    """按名称挂载共享内存并返回 numpy 视图（同时返回 SharedMemory 句柄以保持引用）"""
+    handles, views = {}, {}
+    for key, (shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=names[key])
+        handles[key] = shm
+        views[key] = np.ndarray((num_envs,) + shape, dtype=dtype, buffer=shm.buf)
+    return handles, views
+
+
+def _worker(conn, lo: int, hi: int, num_envs: int, env_kwargs: dict, seed, names: dict, obs_dim: int):
+    """工作进程：拥有环境切片 [lo, hi)，直接读写共享内存，管道只传短指令"""
+    handles, buf = _attach(names, _buffer_specs(obs_dim), num_envs)
+    env = VectorFurniturePlacementEnv(hi - lo, seed=seed, **env_kwargs)
+    try:
+        while True:
+            cmd, payload = conn.recv()
+            if cmd == "step":
+                obs, rewards, dones, infos = env.step(buf["actions"][lo:hi])
+                buf["obs"][lo:hi] = obs
+                buf["rewards"][lo:hi] = rewards
+                buf["dones"][lo:hi] = dones
+                if dones.any():
+                    idx = lo + np.flatnonzero(dones)
+                    buf["final_obs"][idx] = infos["final_observation"]
+                    buf["episode_return"][idx] = infos["episode_return"]
+                conn.send(True)
+            elif cmd == "reset":
+                buf["obs"][lo:hi] = env.reset()
+                conn.send(True)
+            elif cmd == "call":
+                name, args = payload
+                conn.send(getattr(env, name)(*args))
+            elif cmd == "close":
+                conn.send(True)
+                break
+    finally:
+        for shm in handles.values():
+            shm.close()
+        conn.close()
+
+
+class SubprocVectorEnv:
+    """
+    多进程向量化环境：每个工作进程持有一段 VectorFurniturePlacementEnv 切片，
+    观测/奖励/done/动作都放在预分配的 multiprocessing.shared_memory 数组中，
+    管道只传递 "step"/"reset" 这样的短指令，逐步不对观测做任何序列化。
+    """
+
+    def __init__(self, num_envs: int, room_config_path: str, furniture_config_path: str,
+                 reward_config_path: Optional[str] = None, num_workers: Optional[int] = None,
+                 seed: Optional[int] = None, action_mode: str = "continuous"):
+        self.num_envs = num_envs
+        self.num_workers = max(1, min(num_workers or multiprocessing.cpu_count(), num_envs))
+        env_kwargs = {
+            "room_config_path": room_config_path,
+            "furniture_config_path": furniture_config_path,
+            "reward_config_path": reward_config_path,
+            "action_mode": action_mode,
+        }
+        probe = VectorFurniturePlacementEnv(1, **env_kwargs)
+        self.observation_dim = probe.observation_dim
+        self.action_dim = probe.action_dim
+
+        # 分配共享缓冲区
+        specs = _buffer_specs(self.observation_dim)
+        self._shm = {}
+        names = {}
+        for key, (shape, dtype) in specs.items():
+            nbytes = max(1, int(np.prod((num_envs,) + shape)) * np.dtype(dtype).itemsize)
+            self._shm[key] = shared_memory.SharedMemory(create=True, size=nbytes)
+            names[key] = self._shm[key].name
+        self._buf = {
+            key: np.ndarray((num_envs,) + shape, dtype=dtype, buffer=self._shm[key].buf)
+            for key, (shape, dtype) in specs.items()
+        }
+
+        # 均匀切分环境
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).astype(int)
+        self.slices = list(zip(bounds[:-1], bounds[1:]))
+        self.conns, self.procs = [], []
+        for w, (lo, hi) in enumerate(self.slices):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_worker,
+                args=(child, lo, hi, num_envs, env_kwargs, None if seed is None else seed + w, names,
+                      self.observation_dim),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        self.closed = False
+
+    # ------------------------------------------------------------------ 与 VectorFurniturePlacementEnv 相同的接口
+    def reset(self) -> np.ndarray:
+        for conn in self.conns:
+            conn.send(("reset", None))
+        for conn in self.conns:
+            conn.recv()
+        return self._buf["obs"].copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        """写入动作并通知所有工作进程；可与主进程的计算重叠"""
+        self._buf["actions"][:] = actions
+        for conn in self.conns:
+            conn.send(("step", None))
+
+    def step_wait(self):
+        for conn in self.conns:
+            conn.recv()
+        dones = self._buf["dones"].copy()
+        infos = {}
+        if dones.any():
+            infos["final_observation"] = self._buf["final_obs"][dones].copy()
+            infos["episode_return"] = self._buf["episode_return"][dones].copy()
+        return self._buf["obs"].copy(), self._buf["rewards"].copy(), dones, infos
+
+    def step(self, actions: np.ndarray):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def call(self, name: str, *args):
+        """在所有工作进程的环境上调用方法（课程调度等低频操作）"""
+        for conn in self.conns:
+            conn.send(("call", (name, args)))
+        return [conn.recv() for conn in self.conns]
+
+    def set_max_furniture(self, max_num: int):
+        self.call("set_max_furniture", max_num)
+
+    def set_rotation_enabled(self, enabled: bool):
+        self.call("set_rotation_enabled", enabled)
+
+    def update_reward_weights(self, weights_dict: dict):
+        self.call("update_reward_weights", weights_dict)
+
+    def set_action_mode(self, mode: str):
+        self.call("set_action_mode", mode)
+
+    def feasibility_mask(self, rotation=None) -> np.ndarray:
+        """各工作进程切片的可行域栅格按环境顺序拼接为 (B, G, G)"""
+        if rotation is None or np.ndim(rotation) == 0:
+            return np.concatenate(self.call("feasibility_mask", rotation))
+        for conn, (lo, hi) in zip(self.conns, self.slices):
+            conn.send(("call", ("feasibility_mask", (rotation[lo:hi],))))
+        return np.concatenate([conn.recv() for conn in self.conns])
+
+    def reload_configs(self) -> bool:
+        """各工作进程按 mtime 检查配置文件，有变更则重载并重置全部环境"""
+        if not any(self.call("reload_configs")):
+            return False
+        self.reset()
+        return True
+
+    def _call_env(self, name: str, env: int, *args):
+        """在持有第 env 个环境的工作进程上调用方法（参数中的环境下标换算为切片内下标）"""
+        for w, (lo, hi) in enumerate(self.slices):
+            if lo <= env < hi:
+                self.conns[w].send(("call", (name, args + (env - lo,))))
+                return self.conns[w].recv()
+        raise IndexError(env)
+
+    def get_layout(self, env: int):
+        return self._call_env("get_layout", env)
+
+    def render(self, mode: str = "rgb_array", env: int = 0):
+        return self._call_env("render", env, mode)
+
+    def close(self):
+        """通知工作进程退出；管道已断开的忽略，未按时退出的直接终止，共享内存总会被释放"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            for conn in self.conns:
+                try:
+                    conn.send(("close", None))
+                    conn.recv()
+                except (BrokenPipeError, EOFError, OSError):
+                    pass
+                conn.close()
+            for proc in self.procs:
+                proc.join(timeout=5.0)
+                if proc.is_alive():
+                    proc.terminate()
+                    proc.join()
+        finally:
+            self._buf = {}
+            for shm in self._shm.values():
+                shm.close()
+                shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
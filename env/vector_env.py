@@ -0,0 +1,258 @@
+import numpy as np
+from typing import Dict, List, Optional
+from core.furniture import Furniture
+from core.config_loader import ConfigRegistry, load_room_config
+from core.layout_state import MAX_FURNITURE, FEATURE_LEN, encode_rows_into
+from rules.pair_tables import TYPE_LIST, TYPE_INDEX, compile_pair_tables
+from utils.rasterizer import LayoutRasterizer
+from env.action_mask import MASK_GRID, decode_rotation, feasible_grid, snap_to_feasible
+from env.reward_function import REWARD_TERMS, RoomStatics, reward_terms_batch
+from rules.rule_stats_logger import RuleStatsLogger
+
+class VectorFurniturePlacementEnv:
+    """
+    向量化的 FurniturePlacementEnv：B 个房间以数组形式保存，
+    一次 step(actions[B, 3]) 同时放置所有环境的当前家具，回合结束的环境自动重置。
+
+    每个环境的家具按放置顺序存放在槽位 0..n-1 中（reset 时打乱），
+    槽位 < idx 的为已放置家具，槽位 idx 为当前待放置家具。
+    奖励各项由 env.reward_function.reward_terms_batch 按批次整体计算。
+    """
+
+    def __init__(self, num_envs: int, room_config_path: str, furniture_config_path: str,
+                 reward_config_path: Optional[str] = None, seed: Optional[int] = None,
+                 record_layouts: bool = False, action_mode: str = "continuous"):
+        """
+        record_layouts=True 时 infos["final_layouts"] 附带结束回合的 Furniture 列表（较慢）；
+        action_mode="snap" 时 (x, y) 被映射到当前家具可行域中最近的栅格单元。
+        """
+        self.num_envs = B = num_envs
+        self.record_layouts = record_layouts
+        self.rng = np.random.default_rng(seed)
+
+        self.config_paths = (room_config_path, furniture_config_path, reward_config_path)
+        self.allow_rotation = True
+        self.set_action_mode(action_mode)
+        self.observation_dim = MAX_FURNITURE * FEATURE_LEN
+        self.action_dim = 3
+        self._arange = np.arange(B)
+        self._obs = np.zeros((B, MAX_FURNITURE, FEATURE_LEN), dtype=np.float32)
+        self._row_scratch = np.zeros((B, FEATURE_LEN), dtype=np.float32)
+
+        # 规则表
+        tables = compile_pair_tables()
+        self.min_clear, self.near_table, self.face_table = tables.min_clear, tables.must_near, tables.facing
+        self.stats_logger = RuleStatsLogger()  # FURNITURE_RULE_STATS 开启时记录各奖励项耗时
+
+        self._load_configs()
+        self.reset()
+
+    def _config_versions(self):
+        return tuple(ConfigRegistry.version(path) for path in self.config_paths if path)
+
+    def _load_configs(self) -> None:
+        """从 ConfigRegistry 取房间/家具/奖励配置并（重新）分配槽位数组"""
+        B = self.num_envs
+        room_config_path, furniture_config_path, reward_config_path = self.config_paths
+        room = load_room_config(room_config_path)
+        self.room = room
+        self.rasterizer = LayoutRasterizer.from_room(room)
+        templates = ConfigRegistry.furniture_templates(furniture_config_path)[:MAX_FURNITURE]
+        F = len(templates)
+
+        # 房间（数组形式，支持每个环境不同尺寸）
+        self.room_w = np.full(B, float(room.width))
+        self.room_h = np.full(B, float(room.height))
+        self.statics = RoomStatics.from_room(room)
+        self.door_zones = self.statics.door_zones
+
+        # 家具模板
+        self._tpl_w = np.array([t.width for t in templates], dtype=float)
+        self._tpl_h = np.array([t.height for t in templates], dtype=float)
+        self._tpl_tid = np.array([TYPE_INDEX[t.f_type] for t in templates])
+        self.max_furniture = F
+        self._max_items = min(getattr(self, "_max_items", F), F)
+
+        # 每个环境的槽位状态
+        self.order = np.zeros((B, F), dtype=np.int64)
+        self.w = np.zeros((B, F))
+        self.h = np.zeros((B, F))
+        self.tid = np.zeros((B, F), dtype=np.int64)
+        self.x = np.zeros((B, F))
+        self.y = np.zeros((B, F))
+        self.rot = np.zeros((B, F), dtype=np.int64)
+        self.n_items = np.full(B, F, dtype=np.int64)
+        self.idx = np.zeros(B, dtype=np.int64)
+        self.episode_return = np.zeros(B)
+
+        self.weights = self._load_weights(reward_config_path)
+        self._versions = self._config_versions()
+
+    def reload_configs(self) -> bool:
+        """配置文件有变更（按 mtime）时重新加载并重置全部环境；返回是否发生了重载"""
+        if self._config_versions() == self._versions:
+            return False
+        print("🔄 Config files changed, reloading vector env")
+        self._load_configs()
+        self.reset()
+        return True
+
+    @staticmethod
+    def _load_weights(reward_config_path: Optional[str]) -> Dict[str, float]:
+        if not reward_config_path:
+            return {term: 1.0 for term in REWARD_TERMS}
+        config = ConfigRegistry.yaml(reward_config_path)
+        return {term: float(config.get(f"{term}_weight", 0.0)) for term in REWARD_TERMS}
+
+    # ------------------------------------------------------------------ reset / step
+    def reset(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """重置 mask 选中的环境（默认全部），返回全部环境的观测 (B, obs_dim)"""
+        envs = self._arange if mask is None else np.flatnonzero(mask)
+        if len(envs):
+            F = self.max_furniture
+            order = np.argsort(self.rng.random((len(envs), F)), axis=1)
+            self.order[envs] = order
+            self.w[envs] = self._tpl_w[order]
+            self.h[envs] = self._tpl_h[order]
+            self.tid[envs] = self._tpl_tid[order]
+            self.x[envs] = 0.0
+            self.y[envs] = 0.0
+            self.rot[envs] = 0
+            self.n_items[envs] = min(F, self._max_items)
+            self.idx[envs] = 0
+            self.episode_return[envs] = 0.0
+            self._obs[envs] = 0.0
+            self._write_rows(envs, self.idx[envs], MAX_FURNITURE - 1)
+        return self._get_obs()
+
+    def step(self, actions: np.ndarray):
+        """
+        actions: (B, 3) = [x, y, rotation]，x/y 为相对房间尺寸的比例，
+        rotation ∈ [0, 1] 按四分之一圈量化（与 FurniturePPOAgent.act 的输出一致）
+        返回 (obs[B, D], rewards[B], dones[B], infos)；
+        结束的环境已自动重置，其最终观测与回合回报在 infos 中。
+        """
+        actions = np.asarray(actions, dtype=float)
+        b, i = self._arange, self.idx
+        self.rot[b, i] = decode_rotation(actions[:, 2]) if self.allow_rotation else 0
+        xy = actions[:, :2]
+        if self.action_mode == "snap":
+            xy = snap_to_feasible(xy, self.feasibility_mask(self.rot[b, i]))
+        self.x[b, i] = xy[:, 0] * self.room_w
+        self.y[b, i] = xy[:, 1] * self.room_h
+
+        rewards = self._reward(i)
+        self.episode_return += rewards
+        self.idx = i + 1
+        dones = self.idx >= self.n_items
+        self._update_obs(i)
+
+        infos = {}
+        if dones.any():
+            infos["final_observation"] = self._obs[dones].reshape(int(dones.sum()), -1)
+            infos["episode_return"] = self.episode_return[dones].copy()
+            if self.record_layouts:
+                infos["final_layouts"] = [self.get_layout(env) for env in np.flatnonzero(dones)]
+            obs = self.reset(dones)
+        else:
+            obs = self._get_obs()
+        return obs, rewards, dones, infos
+
+    # ------------------------------------------------------------------ observations
+    def _get_obs(self) -> np.ndarray:
+        """与 encode_layout_state 相同的布局；缓冲区会被后续 step 原地更新，因此返回副本"""
+        return self._obs.reshape(self.num_envs, -1).copy()
+
+    def _write_rows(self, envs: np.ndarray, slots: np.ndarray, rows: int) -> None:
+        """把 envs 中槽位 slots 的家具编码写入观测缓冲区的第 rows 行"""
+        encode_rows_into(self._row_scratch[:len(envs)],
+                         self.x[envs, slots], self.y[envs, slots], self.w[envs, slots], self.h[envs, slots],
+                         self.rot[envs, slots] * 90, self.tid[envs, slots],
+                         self.room_w[envs], self.room_h[envs])
+        self._obs[envs, rows] = self._row_scratch[:len(envs)]
+
+    def _update_obs(self, placed_slot: np.ndarray) -> None:
+        """只更新刚放置家具所在的行和当前家具行"""
+        b = self._arange
+        visible = np.flatnonzero(placed_slot < MAX_FURNITURE - 1)
+        self._write_rows(visible, placed_slot[visible], placed_slot[visible])
+
+        has_current = self.idx < self.n_items
+        envs = np.flatnonzero(has_current)
+        self._write_rows(envs, self.idx[envs], MAX_FURNITURE - 1)
+        self._obs[b[~has_current], MAX_FURNITURE - 1] = 0.0
+
+    # ------------------------------------------------------------------ action masking
+    def feasibility_mask(self, rotation=None, grid: int = MASK_GRID) -> np.ndarray:
+        """
+        各环境当前家具的可行域栅格 (B, G, G)，[b, row, col] 对应动作 (x, y) = ((col+0.5)/G, (row+0.5)/G)。
+        rotation 为 90° 朝向序号（标量或 (B,)），默认 0。
+        """
+        b, i = self._arange, self.idx
+        rot = np.broadcast_to(0 if rotation is None else rotation, (self.num_envs,))
+        cx, cy, hx, hy = self._extents()
+        placed = np.arange(self.x.shape[1])[None, :] < i[:, None]
+        return feasible_grid(self.w[b, i], self.h[b, i], rot, self.tid[b, i], cx, cy, hx, hy, self.tid, placed,
+                             self.room_w, self.room_h, self.door_zones, self.min_clear, grid)
+
+    def set_action_mode(self, mode: str):
+        if mode not in ("continuous", "snap"):
+            raise ValueError(f"Unknown action mode: {mode}")
+        self.action_mode = mode
+
+    # ------------------------------------------------------------------ rewards
+    def _extents(self):
+        """中心点与半宽高（旋转 90°/270° 时交换宽高）"""
+        swap = self.rot % 2 == 1
+        hx = np.where(swap, self.h, self.w) / 2
+        hy = np.where(swap, self.w, self.h) / 2
+        return self.x + self.w / 2, self.y + self.h / 2, hx, hy
+
+    def _reward(self, i: np.ndarray) -> np.ndarray:
+        """对每个环境当前放置的家具计算加权奖励（各项按批次向量化）"""
+        terms = self.reward_terms(i)
+        total = np.zeros(self.num_envs)
+        for term, weight in self.weights.items():
+            if weight > 0:
+                total += weight * terms[term]
+        return total
+
+    def reward_terms(self, i: np.ndarray) -> Dict[str, np.ndarray]:
+        """各环境槽位 i 的家具相对其之前已放置家具的各项得分"""
+        b = self._arange
+        cx, cy, hx, hy = self._extents()
+        placed = np.arange(self.x.shape[1])[None, :] < i[:, None]  # (B, F)
+        angle = ((self.rot[b, i] * 90) % 360).astype(float)
+        return reward_terms_batch(cx[b, i], cy[b, i], hx[b, i], hy[b, i], self.tid[b, i], angle,
+                                  cx, cy, hx, hy, self.tid, placed, self.room_w, self.room_h,
+                                  self.statics, self.min_clear, self.near_table, self.face_table,
+                                  self.stats_logger)
+
+    # ------------------------------------------------------------------ helpers
+    def get_layout(self, env: int) -> List[Furniture]:
+        """把第 env 个环境中已放置的家具还原为 Furniture 列表（用于绘图/评分）"""
+        layout = []
+        for slot in range(self.idx[env]):
+            item = Furniture(float(self.x[env, slot]), float(self.y[env, slot]),
+                             float(self.w[env, slot]), float(self.h[env, slot]),
+                             TYPE_LIST[self.tid[env, slot]], rotation=int(self.rot[env, slot]) * 90)
+            layout.append(item)
+        return layout
+
+    def render(self, mode: str = "rgb_array", env: int = 0) -> np.ndarray:
+        """第 env 个环境已放置家具的 RGB 图像 (H, W, 3) uint8，直接由槽位数组光栅化"""
+        if mode != "rgb_array":
+            raise NotImplementedError(f"Unsupported render mode: {mode}")
+        n = self.idx[env]
+        return self.rasterizer.render_arrays(self.x[env, :n], self.y[env, :n], self.w[env, :n],
+                                             self.h[env, :n], self.rot[env, :n], self.tid[env, :n])
+
+    # 🧠 外部调度支持接口（与 FurniturePlacementEnv 相同，下次重置时生效）
+    def set_max_furniture(self, max_num: int):
+        self._max_items = max(1, int(max_num))
+
+    def set_rotation_enabled(self, enabled: bool):
+        self.allow_rotation = enabled
+
+    def update_reward_weights(self, weights_dict: dict):
+        self.weights = {term: float(weights_dict.get(f"{term}_weight", 0.0)) for term in REWARD_TERMS}
@@ -1,6 +1,7 @@
-from typing import List, Dict, Any
-from core.furniture import Furniture
+from typing import List, Dict, Any, Optional
+from core.furniture import Furniture, FurnitureType
 from core.room import Room
+from rules.layout_index import LayoutIndex
 from rules.relation_rules import FURNITURE_GROUPS
 
 class RuleEvaluator:
@@ -22,9 +23,10 @@ class RuleEvaluator:
     def get_optimization_hints(layout: List[Furniture]) -> Dict[str, Any]:
         """返回优化建议（示例）"""
         hints = {}
+        index = LayoutIndex(layout)
         for i, item in enumerate(layout):
-            if item.type == "chair":
-                nearest_table = RuleEvaluator._find_nearest(item, layout, "table")
+            if item.type == FurnitureType.CHAIR:
+                nearest_table = RuleEvaluator._find_nearest(item, layout, FurnitureType.TABLE, index)
                 if nearest_table:
                     hints[f"item_{i}"] = {
                         "suggested_x": nearest_table.x + 0.8,
@@ -51,24 +53,9 @@ class RuleEvaluator:
         if not hasattr(room, 'doors') or not room.doors:
             return 1.0  # 无门信息则默认满分
             
-        # 检查每个门前1米区域内是否有家具
-        blocked_doors = 0
-        for door in room.doors:
-            x, y, w, h = door
-            # 创建门前1米区域
-            door_area = {
-                'x1': x - 1.0, 'y1': y - 1.0,
-                'x2': x + w + 1.0, 'y2': y + h + 1.0
-            }
-            
-            # 检查是否有家具在此区域
-            for item in layout:
-                if (item.x < door_area['x2'] and 
-                    item.x + item.width > door_area['x1'] and
-                    item.y < door_area['y2'] and
-                    item.y + item.height > door_area['y1']):
-                    blocked_doors += 1
-                    break
+        # 检查每个门前1米区域（房间预先构建）内是否有家具
+        blocked_doors = sum(any(room.overlaps_zone(item, zone) for item in layout)
+                            for zone in room.zones("door", 1.0))
                     
         return 1.0 - (blocked_doors / len(room.doors))
 
@@ -107,10 +94,12 @@ class RuleEvaluator:
         return symmetry_score / max(1, total_pairs)
 
     @staticmethod
-    def _find_nearest(item: Furniture, layout: List[Furniture], type_name: str) -> Furniture:
-        """查找最近的指定类型家具"""
-        candidates = [i for i in layout if str(i.type).lower() == type_name.lower()]
-        if not candidates:
-            return None
-            
-        return min(candidates, key=lambda x: ((x.x - item.x)**2 + (x.y - item.y)**2)**0.5)
+    def _find_nearest(item: Furniture, layout: List[Furniture], type_name,
+                      index: Optional[LayoutIndex] = None) -> Optional[Furniture]:
+        """查找最近（多边形距离）的指定类型家具；type_name 为 FurnitureType 或其取值（如 "table"）"""
+        if not isinstance(type_name, FurnitureType):
+            try:
+                type_name = FurnitureType(type_name.lower())
+            except ValueError:
+                return None
+        return LayoutIndex.of(layout, index).nearest(item, type_name)
@@ -1,6 +1,6 @@
 from typing import Optional, List
 from core.furniture import Furniture, FurnitureType
-from core.config_loader import ConfigLoader
+from core.config_loader import ConfigLoader, FurnitureSpec
 from core.room import Room
 
 _strategy_registry = {}
@@ -16,22 +16,12 @@ class FurnitureFactory:
     @staticmethod
     def create(f_type: FurnitureType, room: Room, ref_item: Optional[Furniture] = None) -> Optional[Furniture]:
         """Dynamically generates furniture, ensuring placement, and falls back to default layout if needed."""
-        config = ConfigLoader.get_furniture_config(f_type)
-        if not config:
+        spec = ConfigLoader.get_furniture_spec(f_type)
+        if spec is None:
             raise ValueError(f"Missing configuration for {f_type}")
-        
-        # Ensure necessary fields exist
-        try:
-            width, height = config["default_size"]
-        except KeyError:
-            raise KeyError(f"Config for {f_type} must contain 'default_size'")
 
-        # Ensure sizes are in valid grid units (1.0 or 0.5)
-        def snap_to_grid(size):
-            return 1.0 if size >= 0.75 else 0.5
-
-        width = snap_to_grid(width)
-        height = snap_to_grid(height)
+        # Sizes snapped to grid units (1.0 or 0.5) when the config was compiled
+        width, height = spec.snapped_width, spec.snapped_height
 
         # Ensure room is large enough to fit this furniture
         if width > room.width or height > room.height:
@@ -41,7 +31,7 @@ class FurnitureFactory:
         # Retrieve registered strategy function
         strategy = _strategy_registry.get(f_type)
         if strategy:
-            furniture = strategy(room, config, ref_item)
+            furniture = strategy(room, spec, ref_item)
             if furniture:
                 return furniture
 
@@ -76,8 +66,8 @@ class FurnitureFactory:
 @register_strategy(FurnitureType.BED)
 class BedPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = room.height / 4
         return Furniture(x, y, width, height, FurnitureType.BED)
@@ -85,8 +75,8 @@ class BedPlacement:
 @register_strategy(FurnitureType.SOFA)
 class SofaPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = room.height - height - 0.5
         return Furniture(x, y, width, height, FurnitureType.SOFA)
@@ -94,8 +84,8 @@ class SofaPlacement:
 @register_strategy(FurnitureType.TABLE)
 class TablePlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = room.height / 2 - height / 2
         return Furniture(x, y, width, height, FurnitureType.TABLE)
@@ -103,8 +93,8 @@ class TablePlacement:
 @register_strategy(FurnitureType.CHAIR)
 class ChairPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = room.height / 2 - height / 2 + 1.0
         return Furniture(x, y, width, height, FurnitureType.CHAIR)
@@ -112,8 +102,8 @@ class ChairPlacement:
 @register_strategy(FurnitureType.WARDROBE)
 class WardrobePlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width - width - 0.5
         y = 0.5
         return Furniture(x, y, width, height, FurnitureType.WARDROBE)
@@ -121,8 +111,8 @@ class WardrobePlacement:
 @register_strategy(FurnitureType.TV_STAND)
 class TVStandPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = 0.5
         return Furniture(x, y, width, height, FurnitureType.TV_STAND)
@@ -130,8 +120,8 @@ class TVStandPlacement:
 @register_strategy(FurnitureType.COFFEE_TABLE)
 class CoffeeTablePlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = room.height / 2 - height / 2
         return Furniture(x, y, width, height, FurnitureType.COFFEE_TABLE)
@@ -139,8 +129,8 @@ class CoffeeTablePlacement:
 @register_strategy(FurnitureType.BOOKSHELF)
 class BookshelfPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = 0.5
         y = room.height - height - 0.5
         return Furniture(x, y, width, height, FurnitureType.BOOKSHELF)
@@ -148,8 +138,8 @@ class BookshelfPlacement:
 @register_strategy(FurnitureType.DESK)
 class DeskPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = 0.5
         y = room.height - height - 0.5
         return Furniture(x, y, width, height, FurnitureType.DESK)
@@ -157,8 +147,8 @@ class DeskPlacement:
 @register_strategy(FurnitureType.SHOE_CABINET)
 class ShoeCabinetPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = 0.5
         y = 0.5
         return Furniture(x, y, width, height, FurnitureType.SHOE_CABINET)
@@ -166,8 +156,8 @@ class ShoeCabinetPlacement:
 @register_strategy(FurnitureType.NIGHTSTAND)
 class NightstandPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = ref_item.x + ref_item.width + 0.2 if ref_item else 1.0
         y = ref_item.y if ref_item else 1.0
         return Furniture(x, y, width, height, FurnitureType.NIGHTSTAND)
@@ -175,8 +165,8 @@ class NightstandPlacement:
 @register_strategy(FurnitureType.DINING_SET)
 class DiningSetPlacement:
     @staticmethod
-    def place(room: Room, config: dict, ref_item: Optional[Furniture] = None) -> Furniture:
-        width, height = config["default_size"]
+    def place(room: Room, spec: FurnitureSpec, ref_item: Optional[Furniture] = None) -> Furniture:
+        width, height = spec.width, spec.height
         x = room.width / 2 - width / 2
         y = room.height / 2 - height / 2
         return Furniture(x, y, width, height, FurnitureType.DINING_SET)
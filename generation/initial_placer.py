@@ -28,13 +28,13 @@ class SmartPlacer:
 
     def place_furniture(self, furniture_type: FurnitureType):
         """Places a piece of furniture ensuring it does not overlap."""
-        config = ConfigLoader.get_furniture_config(furniture_type)
-        if not config:
+        spec = ConfigLoader.get_furniture_spec(furniture_type)
+        if spec is None:
             print(f"⚠️ No config found for {furniture_type}, skipping placement.")
             return
 
-        width, height = config.get("default_size", (1.0, 1.0))
-        clearance = config.get("clearance", 1.0)  # Ensure minimum spacing
+        width, height = spec.width, spec.height
+        clearance = spec.clearance  # Ensure minimum spacing
         furniture = FurnitureFactory.create(furniture_type, self.room)
 
         max_attempts = 100
@@ -155,11 +155,11 @@ class SmartPlacer:
 
     def _place_in_zone(self, f_type: FurnitureType, zone: dict) -> Optional[Furniture]:
         """Place furniture within a specified zone, or fallback if zone is missing."""
-        config = ConfigLoader.get_furniture_config(f_type)
-        if not config:
+        spec = ConfigLoader.get_furniture_spec(f_type)
+        if spec is None:
             return None
 
-        width, height = config["default_size"]
+        width, height = spec.width, spec.height
         
         # If no valid zone, allow placement anywhere in the room
         if not zone:
@@ -8,12 +8,12 @@ from generation.strategy_registry import register_strategy
 class BedStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.BED)
-        width, height = config["default_size"]
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.BED)
+        width, height = spec.default_size
 
         # 获取门的位置，避免床正对门
         doors = room.config.get("doors", [])
-        min_door_distance = config.get("min_door_distance", 2.0)
+        min_door_distance = spec.get("min_door_distance", 2.0)
 
         def is_too_close_to_door(x, y):
             """检查床是否太靠近门"""
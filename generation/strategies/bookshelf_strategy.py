@@ -14,8 +14,8 @@ class BookshelfStrategy:
         2. 需要避开窗户和门
         3. 不能与已有家具重叠
         """
-        config = ConfigLoader.get_furniture_config(FurnitureType.BOOKSHELF)
-        width, height = config["default_size"]
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.BOOKSHELF)
+        width, height = spec.default_size
         windows = room.config.get("windows", [])
         doors = room.config.get("doors", [])
 
@@ -8,10 +8,10 @@ from generation.strategy_registry import register_strategy
 class ChairStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.CHAIR)
-        if "default_size" not in config:
-            raise KeyError("Chair config missing 'default_size'")
-        chair_size = config["default_size"]
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.CHAIR)
+        if spec is None:
+            raise KeyError("Chair config missing")
+        chair_size = spec.default_size
 
         table = next((item for item in existing_items if item.type == FurnitureType.TABLE), None)
         if not table:
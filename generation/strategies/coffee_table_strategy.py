@@ -9,10 +9,10 @@ from generation.strategy_registry import register_strategy
 class CoffeeTableStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.COFFEE_TABLE)
-        width, height = config["default_size"]
-        sofa_spacing = config.get("sofa_spacing", 0.5)
-        margin = config.get("margin", 1.0)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.COFFEE_TABLE)
+        width, height = spec.default_size
+        sofa_spacing = spec.get("sofa_spacing", 0.5)
+        margin = spec.get("margin", 1.0)
 
         # Find sofa
         sofa = next((item for item in existing_items if item.type == FurnitureType.SOFA), None)
@@ -9,9 +9,9 @@ from generation.strategy_registry import register_strategy
 class DeskStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.DESK)
-        width, height = config["default_size"]
-        margin = config.get("margin", 1.0)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.DESK)
+        width, height = spec.default_size
+        margin = spec.get("margin", 1.0)
 
         # Check study zone
         if hasattr(room, "zones"):
@@ -8,11 +8,11 @@ import math
 class DiningSetStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.DINING_SET)
-        table_width, table_height = config["default_size"]
-        chair_count = config.get("chair_count", 4)
-        chair_size = config.get("chair_size", (6, 6))
-        chair_distance = config.get("chair_distance", 10)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.DINING_SET)
+        table_width, table_height = spec.default_size
+        chair_count = spec.get("chair_count", 4)
+        chair_size = spec.get("chair_size", (6, 6))
+        chair_distance = spec.get("chair_distance", 10)
 
         # Place table
         table = Furniture(
@@ -9,10 +9,10 @@ from generation.strategy_registry import register_strategy
 class NightstandStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.NIGHTSTAND)
-        width, height = config["default_size"]
-        base_offset = config.get("offset", 2.0)
-        margin = config.get("margin", 1.0)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.NIGHTSTAND)
+        width, height = spec.default_size
+        base_offset = spec.get("offset", 2.0)
+        margin = spec.get("margin", 1.0)
 
         # Find bed
         bed = next((item for item in existing_items if item.type == FurnitureType.BED), None)
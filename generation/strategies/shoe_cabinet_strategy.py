@@ -6,10 +6,10 @@ import random
 class ShoeCabinetStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.SHOE_CABINET)
-        width, height = config["default_size"]
-        door_spacing = config.get("door_spacing", 1.0)
-        margin = config.get("margin", 0.5)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.SHOE_CABINET)
+        width, height = spec.default_size
+        door_spacing = spec.get("door_spacing", 1.0)
+        margin = spec.get("margin", 0.5)
         doors = room.config.get("doors", [])
 
         # Prioritize door closest to origin (0,0)
@@ -13,8 +13,8 @@ class SofaStrategy:
         2. 如果有 `TV_STAND`，则与其对齐放置。
         3. 无 `TV_STAND`，则智能选择墙面靠放。
         """
-        config = ConfigLoader.get_furniture_config(FurnitureType.SOFA)
-        width, height = config["default_size"]
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.SOFA)
+        width, height = spec.default_size
 
         # 优先在 `living_room` 放置
         if hasattr(room, "zones"):
@@ -8,9 +8,9 @@ import random
 class TableStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.TABLE)
-        size = config["default_size"][0]
-        margin = config.get("margin", 2.0)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.TABLE)
+        size = spec.width
+        margin = spec.get("margin", 2.0)
 
         # Use spatial index for collision detection
         existing_polys = [item.polygon for item in existing_items]
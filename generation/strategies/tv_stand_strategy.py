@@ -7,10 +7,10 @@ import random
 class TvStandStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.TV_STAND)
-        width, height = config["default_size"]
-        sofa_spacing = config.get("sofa_spacing", 1.0)
-        margin = config.get("margin", 1.0)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.TV_STAND)
+        width, height = spec.default_size
+        sofa_spacing = spec.get("sofa_spacing", 1.0)
+        margin = spec.get("margin", 1.0)
 
         # Align with sofa
         sofa = next((item for item in existing_items if item.type == FurnitureType.SOFA), None)
@@ -7,9 +7,9 @@ import random
 class WardrobeStrategy:
     @staticmethod
     def place(room, existing_items):
-        config = ConfigLoader.get_furniture_config(FurnitureType.WARDROBE)
-        width, height = config["default_size"]
-        margin = config.get("margin", 1.0)
+        spec = ConfigLoader.get_furniture_spec(FurnitureType.WARDROBE)
+        width, height = spec.default_size
+        margin = spec.get("margin", 1.0)
 
         # Opposite wall from bed
         bed = next((item for item in existing_items if item.type == FurnitureType.BED), None)
@@ -0,0 +1,250 @@
+# model/inference_server.py
+
+import argparse
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+import numpy as np
+import torch
+from model.ppo_agent import FurniturePPOAgent, load_policy
+
+DEFAULT_ADDRESS = "/tmp/furniture_policy.sock"
+DEFAULT_AUTHKEY = b"furniture-ppo"
+SERVER_ENV_VAR = "FURNITURE_POLICY_SERVER"  # 设置后 get_policy 返回连接到该地址的客户端
+
+
+def parse_address(address):
+    """"host:port" → TCP 元组；其他字符串视为 Unix socket 路径"""
+    if isinstance(address, str) and ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        return host, int(port)
+    return address
+
+
+class PolicyServer:
+    """
+    本地策略推理服务：模型只加载一次，多个进程通过 multiprocessing.connection 发送 act 请求。
+    批处理线程收到第一个请求后最多再等待 max_latency 秒（或凑满 max_batch 行），
+    把这段时间内的所有请求拼成一个批次做一次前向，再按请求拆分返回。
+    policy 为提供 act_batch 的策略：FurniturePPOAgent（支持采样/确定性）或 load_policy 得到的 ScriptedPolicy（仅确定性）。
+    策略拒绝的请求（如对 ScriptedPolicy 请求采样）把异常发回客户端，由客户端抛出。
+    """
+
+    def __init__(self, policy, address=DEFAULT_ADDRESS, max_batch: int = 1024, max_latency: float = 0.002,
+                 authkey: bytes = DEFAULT_AUTHKEY):
+        self.policy = policy
+        self.address = parse_address(address)
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.authkey = authkey
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+        self._requests = queue.Queue()
+        self._closed = threading.Event()
+        self._listener = None
+        self._threads = []
+
+    # ------------------------------------------------------------------ 生命周期
+    def start(self) -> "PolicyServer":
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)  # 上次未清理的 socket 文件
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self.address = self._listener.address  # TCP 端口为 0 时取实际端口
+        for target in (self._accept_loop, self._batch_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def serve_forever(self) -> None:
+        self.start()
+        print(f"🚀 Policy server listening on {self.address}")
+        try:
+            while not self._closed.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._requests.put(None)
+        if self._listener is not None:
+            # 关闭监听 socket 不会唤醒阻塞中的 accept，先自连一次让接收线程退出
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            for thread in self._threads:
+                thread.join(timeout=1.0)
+            self._listener.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------ 连接
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break
+            if self._closed.is_set():
+                conn.close()
+                break
+            threading.Thread(target=self._read_loop, args=(conn, threading.Lock()), daemon=True).start()
+
+    def _read_loop(self, conn, send_lock):
+        """每个客户端一个读线程：请求 (states[B, D], deterministic) 放入批处理队列"""
+        try:
+            while not self._closed.is_set():
+                states, deterministic = conn.recv()
+                self._requests.put((conn, send_lock, np.asarray(states, dtype=np.float32), bool(deterministic)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------ 批处理
+    def _batch_loop(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                return
+            batch, rows = [first], len(first[2])
+            window_end = time.perf_counter() + self.max_latency
+            while rows < self.max_batch:
+                timeout = window_end - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._requests.put(None)
+                    break
+                batch.append(item)
+                rows += len(item[2])
+            for deterministic in (True, False):
+                group = [item for item in batch if item[3] == deterministic]
+                if group:
+                    self._run(group, deterministic)
+
+    def _run(self, group, deterministic: bool):
+        states = torch.from_numpy(np.concatenate([item[2] for item in group]))
+        actions = log_probs = error = None
+        try:
+            with torch.inference_mode():
+                actions, _, log_probs, _ = self.policy.act_batch(states, deterministic=deterministic)
+        except ValueError as e:
+            error = e
+        if log_probs is not None:
+            log_probs = log_probs.numpy()
+        self.stats["requests"] += len(group)
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(states)
+        start = 0
+        for conn, send_lock, request_states, _ in group:
+            end = start + len(request_states)
+            if error is not None:
+                reply = error
+            else:
+                reply = (actions[start:end], None if log_probs is None else log_probs[start:end])
+            start = end
+            try:
+                with send_lock:
+                    conn.send(reply)
+            except OSError:
+                pass  # 客户端已断开
+
+
+class PolicyClient:
+    """
+    PolicyServer 的客户端：act / act_batch 的返回形状与 FurniturePPOAgent 相同（服务端不返回的项为 None），
+    可直接替换本地模型用于 FurniturePlacementEnv rollout、scripts/main_layout.py 和 scripts/generate_seed_layouts.py。
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey: bytes = DEFAULT_AUTHKEY):
+        self.conn = Client(parse_address(address), authkey=authkey)
+        self._lock = threading.Lock()
+
+    def _request(self, states, deterministic):
+        states = states.detach().cpu().numpy() if isinstance(states, torch.Tensor) else np.asarray(states)
+        with self._lock:
+            self.conn.send((states.astype(np.float32, copy=False), deterministic))
+            reply = self.conn.recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def act(self, state, deterministic=False):
+        """单个状态 → (action numpy, log_prob 或 None)"""
+        actions, log_probs = self._request(np.asarray(state, dtype=np.float32)[None], deterministic)
+        return actions[0], None if log_probs is None else torch.tensor(log_probs[0])
+
+    def act_batch(self, states, deterministic=False):
+        """(B, D) → (actions (B, A) numpy, None, log_probs (B,) 或 None, None)"""
+        actions, log_probs = self._request(states, deterministic)
+        return actions, None, None if log_probs is None else torch.from_numpy(log_probs), None
+
+    def eval(self):
+        return self
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_agent(model_path: str, state_dim: int, action_dim: int):
+    """.pt 为 TorchScript 推理图（ScriptedPolicy），其余按 state_dict 加载 FurniturePPOAgent"""
+    if model_path.endswith(".pt"):
+        return load_policy(model_path)
+    agent = FurniturePPOAgent(state_dim, action_dim)
+    agent.load_state_dict(torch.load(model_path, map_location="cpu"))
+    agent.eval()
+    return agent
+
+
+def get_policy(model_path: str, state_dim: int, action_dim: int):
+    """设置了 FURNITURE_POLICY_SERVER 时连接推理服务，否则在本进程加载模型"""
+    address = os.environ.get(SERVER_ENV_VAR)
+    if address:
+        return PolicyClient(address)
+    return load_agent(model_path, state_dim, action_dim)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PPO policy server with dynamic batching")
+    parser.add_argument("--model", default="models/final_ppo.pth", help=".pth state_dict or TorchScript .pt")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Unix socket path or host:port")
+    parser.add_argument("--state_dim", type=int, default=None)
+    parser.add_argument("--action_dim", type=int, default=3)
+    parser.add_argument("--max_batch", type=int, default=1024)
+    parser.add_argument("--max_latency_ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    state_dim = args.state_dim
+    if state_dim is None:
+        from core.layout_state import MAX_FURNITURE, FEATURE_LEN
+        state_dim = MAX_FURNITURE * FEATURE_LEN
+    torch.set_num_threads(1)
+    policy = load_agent(args.model, state_dim, args.action_dim)
+    PolicyServer(policy, args.address, args.max_batch, args.max_latency_ms / 1000.0).serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
+import copy
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from torch.distributions import Normal
 
+def postprocess_actions(action):
+    """裁剪到 [0, 1] 并把 rotation 维量化为四分之一圈（不原地修改输入）"""
+    clipped = torch.clamp(action, 0.0, 1.0)
+    rotation = torch.floor(clipped[..., 2:3] * 4) / 4
+    return torch.cat([clipped[..., :2], rotation, clipped[..., 3:]], dim=-1)
+
 class FurniturePPOAgent(nn.Module):
     def __init__(self, state_dim, action_dim, hidden_dim=128):
         super(FurniturePPOAgent, self).__init__()
@@ -23,17 +30,30 @@ class FurniturePPOAgent(nn.Module):
         value = self.critic(state)
         return action_mean, value
 
-    def act(self, state):
+    def act(self, state, deterministic=False):
+        """单个状态：返回 (action numpy, log_prob)；内部走批量路径"""
+        env_action, _, log_prob, _ = self.act_batch(state.unsqueeze(0), deterministic=deterministic)
+        return env_action[0], log_prob[0]
+
+    def act_batch(self, states, deterministic=False):
+        """
+        批量采样：states (B, state_dim) → actions (B, action_dim) numpy、log_probs (B,)、values (B,)
+        一次前向同时得到动作与价值，供向量化环境使用；deterministic=True 时取均值动作
+        """
         with torch.no_grad():
-            action_mean, _ = self.forward(state)
-            std = self.log_std.exp()
-            dist = Normal(action_mean, std)
-            action = dist.sample()
-            log_prob = dist.log_prob(action).sum()
+            action_mean, value = self.forward(states)
+            dist = Normal(action_mean, self.log_std.exp())
+            action = action_mean if deterministic else dist.sample()
+            log_prob = dist.log_prob(action).sum(dim=-1)
+            return postprocess_actions(action).numpy(), action, log_prob, value.squeeze(-1)
 
-            clipped = torch.clamp(action, 0.0, 1.0)
-            clipped[2] = torch.floor(clipped[2] * 4) / 4
-            return clipped.detach().numpy(), log_prob
+    def export_torchscript(self, path):
+        """导出冻结的 CPU 推理图（只含 actor 与动作后处理，确定性均值动作）"""
+        policy = PolicyInference(self).cpu().eval()
+        example = torch.zeros(1, self.actor[0].in_features)
+        traced = torch.jit.freeze(torch.jit.trace(policy, example))
+        torch.jit.save(traced, path)
+        return traced
 
     def evaluate(self, states, actions):
         action_mean, value = self.forward(states)
@@ -42,3 +62,50 @@ class FurniturePPOAgent(nn.Module):
         log_probs = dist.log_prob(actions).sum(dim=-1)
         entropy = dist.entropy().sum(dim=-1)
         return log_probs, value, entropy
+
+
+class PolicyInference(nn.Module):
+    """推理专用策略：states (B, state_dim) → 环境动作 (B, action_dim)，不采样、不计算价值"""
+
+    def __init__(self, agent: FurniturePPOAgent):
+        super().__init__()
+        self.actor = copy.deepcopy(agent.actor)
+
+    def forward(self, states: torch.Tensor) -> torch.Tensor:
+        return postprocess_actions(self.actor(states))
+
+
+class ScriptedPolicy:
+    """
+    TorchScript 推理图的适配器：act / act_batch 的返回形状与 FurniturePPOAgent 相同，
+    推理图不含采样与价值头，对应位置为 None；仅支持确定性动作。
+    直接调用时返回推理图输出的动作张量。
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __call__(self, states):
+        return self.graph(states)
+
+    def act(self, state, deterministic=True):
+        """单个状态：返回 (action numpy, None)"""
+        env_action, _, log_prob, _ = self.act_batch(state.unsqueeze(0), deterministic=deterministic)
+        return env_action[0], log_prob
+
+    def act_batch(self, states, deterministic=True):
+        """states (B, state_dim) → (actions (B, action_dim) numpy, None, None, None)"""
+        if not deterministic:
+            raise ValueError("TorchScript policy only supports deterministic actions")
+        with torch.no_grad():
+            return self.graph(states).numpy(), None, None, None
+
+    def eval(self):
+        return self
+
+
+def load_policy(path):
+    """加载 export_torchscript 导出的推理图（CPU），包装为 ScriptedPolicy"""
+    graph = torch.jit.load(path, map_location="cpu")
+    graph.eval()
+    return ScriptedPolicy(graph)
@@ -0,0 +1,85 @@
+# optimization/anytime.py
+import math
+import time
+from typing import Callable, List, Optional, Tuple, Union
+from core.furniture import Furniture
+
+# on_improvement(layout, score, elapsed_seconds)
+ImprovementCallback = Callable[[List[Furniture], float, float], None]
+
+
+class Deadline:
+    """
+    墙钟截止时间：Deadline(0.5) 表示从现在起 0.5 秒。
+    seconds=None 表示不限时（expired() 恒为 False）。
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.start = time.perf_counter()
+        self.seconds = seconds
+        self.end = math.inf if seconds is None else self.start + seconds
+
+    @classmethod
+    def coerce(cls, deadline: Union["Deadline", float, None]) -> "Deadline":
+        """接受 Deadline / 秒数 / None"""
+        if isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float:
+        return max(0.0, self.end - time.perf_counter())
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.end
+
+    def fraction(self) -> float:
+        """已用时间占预算的比例（不限时为 0）"""
+        if self.seconds is None:
+            return 0.0
+        return min(1.0, self.elapsed() / max(self.seconds, 1e-9))
+
+
+class ImprovementTracker:
+    """
+    记录优化过程的分数-时间曲线，并在得到更优解时回调 on_improvement。
+    分数越高越好；布局以工厂函数形式传入，只有真正需要回调时才构造副本。
+    min_interval 用于节流高频改进（如退火每步都可能刷新最优）。
+    """
+
+    def __init__(self, deadline: Deadline, on_improvement: Optional[ImprovementCallback] = None,
+                 min_interval: float = 0.0):
+        self.deadline = deadline
+        self.on_improvement = on_improvement
+        self.min_interval = min_interval
+        self.best_score = -math.inf
+        self.history: List[Tuple[float, float]] = []
+        self._last_emit = -math.inf
+        self._pending = None
+
+    def offer(self, score: float, layout_fn: Callable[[], List[Furniture]]) -> bool:
+        """提交候选分数；更优时记录曲线并（按节流）回调，返回是否刷新最优"""
+        if score <= self.best_score:
+            return False
+        elapsed = self.deadline.elapsed()
+        self.best_score = score
+        self.history.append((elapsed, float(score)))
+        if self.on_improvement is not None:
+            if elapsed - self._last_emit >= self.min_interval:
+                self._emit(layout_fn(), score, elapsed)
+            else:
+                self._pending = (layout_fn, score)
+        return True
+
+    def flush(self) -> None:
+        """优化结束时补发被节流的最后一次改进"""
+        if self._pending is not None:
+            layout_fn, score = self._pending
+            self._emit(layout_fn(), score, self.deadline.elapsed())
+
+    def _emit(self, layout: List[Furniture], score: float, elapsed: float) -> None:
+        self._pending = None
+        self._last_emit = elapsed
+        self.on_improvement(layout, float(score), elapsed)
@@ -0,0 +1,137 @@
+# optimization/cma_es.py
+import math
+import multiprocessing
+from typing import Callable, Optional
+import numpy as np
+
+
+class SepCMAES:
+    """
+    sep-CMA-ES（对角协方差，Ros & Hansen 2008）：
+    每代 ask() 返回整个种群，tell() 一次性接收种群的适应度。
+    维度 n 时每代开销 O(λ·n)，适合 15+ 件家具 × 2~3 维的规模。
+
+    边界处理：采样点先裁剪到 [lower, upper] 再交给评估器，
+    tell() 时对裁剪距离加二次惩罚，使分布均值被拉回可行域。
+    """
+
+    def __init__(self, x0, sigma0, lower=None, upper=None, popsize: Optional[int] = None,
+                 seed: Optional[int] = None, bound_penalty: float = 1e3, tolx: float = 1e-6):
+        self.mean = np.asarray(x0, dtype=float).copy()
+        self.n = n = self.mean.size
+        self.lower = np.full(n, -np.inf) if lower is None else np.asarray(lower, dtype=float)
+        self.upper = np.full(n, np.inf) if upper is None else np.asarray(upper, dtype=float)
+        self.mean = np.clip(self.mean, self.lower, self.upper)
+        self.rng = np.random.default_rng(seed)
+        self.bound_penalty = bound_penalty
+        self.tolx = tolx
+
+        # 以单一步长 sigma 加对角尺度表示各维不同的初始步长
+        sigma0 = np.broadcast_to(np.asarray(sigma0, dtype=float), (n,))
+        self.sigma = float(sigma0.max())
+        self.diag = (sigma0 / self.sigma) ** 2
+
+        self.lam = popsize or 4 + int(3 * math.log(n))
+        self.mu = self.lam // 2
+        w = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = w / w.sum()
+        self.mu_eff = 1.0 / np.sum(self.weights ** 2)
+
+        self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.d_sigma = 1 + 2 * max(0.0, math.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        self.c_c = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+        c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        c_mu = min(1 - c_1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+        # 对角版本可使用更大的学习率
+        scale = (n + 2) / 3
+        self.c_1 = min(1.0, c_1 * scale)
+        self.c_mu = min(1.0 - self.c_1, c_mu * scale)
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.p_sigma = np.zeros(n)
+        self.p_c = np.zeros(n)
+        self.generation = 0
+        self.evaluations = 0
+        self.best_x = self.mean.copy()
+        self.best_f = math.inf
+        self._z = None
+        self._raw = None
+        self._feasible = None
+
+    def ask(self) -> np.ndarray:
+        """采样一代种群，返回已裁剪到边界内的 (λ, n) 候选矩阵"""
+        self._z = self.rng.standard_normal((self.lam, self.n))
+        self._raw = self.mean + self.sigma * np.sqrt(self.diag) * self._z
+        self._feasible = np.clip(self._raw, self.lower, self.upper)
+        return self._feasible
+
+    def tell(self, fitness) -> None:
+        """接收 ask() 返回种群的适应度（越小越好）并更新分布"""
+        fitness = np.asarray(fitness, dtype=float)
+        self.evaluations += len(fitness)
+        best = int(np.argmin(fitness))
+        if fitness[best] < self.best_f:
+            self.best_f = float(fitness[best])
+            self.best_x = self._feasible[best].copy()
+
+        penalized = fitness + self.bound_penalty * np.sum((self._raw - self._feasible) ** 2, axis=1)
+        order = np.argsort(penalized)[:self.mu]
+        sqrt_diag = np.sqrt(self.diag)
+        y = sqrt_diag * self._z[order]
+        y_w = self.weights @ y
+        z_w = self.weights @ self._z[order]
+
+        self.mean = self.mean + self.sigma * y_w
+        self.p_sigma = (1 - self.c_sigma) * self.p_sigma + math.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff) * z_w
+        norm_p = np.linalg.norm(self.p_sigma)
+        self.generation += 1
+        h_sigma = norm_p / math.sqrt(1 - (1 - self.c_sigma) ** (2 * self.generation)) < (1.4 + 2 / (self.n + 1)) * self.chi_n
+        self.p_c = (1 - self.c_c) * self.p_c + h_sigma * math.sqrt(self.c_c * (2 - self.c_c) * self.mu_eff) * y_w
+
+        rank_one = self.p_c ** 2 + (1 - h_sigma) * self.c_c * (2 - self.c_c) * self.diag
+        rank_mu = self.weights @ (y ** 2)
+        self.diag = (1 - self.c_1 - self.c_mu) * self.diag + self.c_1 * rank_one + self.c_mu * rank_mu
+        self.sigma *= math.exp((self.c_sigma / self.d_sigma) * (norm_p / self.chi_n - 1))
+
+    def stop(self) -> bool:
+        return self.sigma * math.sqrt(float(self.diag.max())) < self.tolx
+
+
+_worker_fn = None
+
+
+def _init_worker(fn):
+    global _worker_fn
+    _worker_fn = fn
+
+
+def _evaluate_row(x):
+    return _worker_fn(x)
+
+
+class PopulationEvaluator:
+    """
+    种群评估器：workers <= 1 时在当前进程中逐行评估；
+    否则用进程池并行评估，fn 只在每个工作进程初始化时传输一次。
+    """
+
+    def __init__(self, fn: Callable[[np.ndarray], float], workers: int = 0):
+        self.fn = fn
+        self.workers = workers
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.fn,))
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __call__(self, population: np.ndarray) -> np.ndarray:
+        if self.pool is not None:
+            return np.asarray(self.pool.map(_evaluate_row, list(population)), dtype=float)
+        return np.asarray([self.fn(x) for x in population], dtype=float)
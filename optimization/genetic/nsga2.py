@@ -1,10 +1,9 @@
 import numpy as np
-import copy
 import multiprocessing
 from deap import base, creator, tools
 from core.room import Room
 from evaluation.scorer import MultiObjectiveScorer
-from rules.rule_engine import RuleEngine  
+from rules.rule_engine import RuleEngine, decode_genome
 
 class NSGA2Optimizer:
     def __init__(self, room: Room, population_size: int = 100, max_workers: int = 8, mutation_rate: float = 0.2, crossover_rate: float = 0.7):
@@ -32,17 +31,18 @@ class NSGA2Optimizer:
         self.toolbox.register("select", tools.selNSGA2)
         self.toolbox.register("evaluate", self._multi_objective_evaluate)
 
+    def _get_engine(self) -> RuleEngine:
+        """每个进程只构造一次规则引擎"""
+        if getattr(self, "_engine", None) is None:
+            self._engine = RuleEngine(self.room.config)
+        return self._engine
+
     def _decode_layout(self, vector):
         """从优化向量解码布局，并强制规则修正"""
-        layout = []
         n = len(vector) // 2
-        for i in range(n):
-            x = vector[i] * self.room.width
-            y = vector[i + n] * self.room.height
-            item = copy.deepcopy(self.room.default_layout[i])
-            item.x, item.y = x, y
-            layout.append(item)
-        return RuleEngine(self.room.config).apply_rules(layout, self.room)  # Apply rule validation
+        scale = np.repeat([self.room.width, self.room.height], n)
+        layout = decode_genome(np.asarray(vector[:2 * n]) * scale, self.room.default_layout[:n])
+        return self._get_engine().apply_rules(layout, self.room, inplace=True)  # Apply rule validation
 
     def _multi_objective_evaluate(self, individual):
         """统一评分逻辑"""
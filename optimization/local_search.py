@@ -1,31 +1,51 @@
+import contextlib
 import copy
-from typing import List, Dict, Optional
-from core.furniture import Furniture
+from typing import List, Dict, Optional, Union
+import numpy as np
+from core.furniture import Furniture, FurnitureType
 from core.room import Room
-from rules.evaluation import RuleEvaluator
-from generation.collision.buffer_check import CollisionChecker
-from optimization.genetic.nsga2 import NSGA2Optimizer
+from evaluation.layout_metrics import RuleEvaluator
 from evaluation.scorer import MultiObjectiveScorer
-from rules.rule_engine import RuleEngine  # 确保导入增强版规则引擎
-from scipy.optimize import minimize
+from rules.rule_engine import RuleEngine, decode_genome  # 确保导入增强版规则引擎
+from rules.pair_tables import TYPE_INDEX, compile_pair_tables
 from optimization.constraints import ConstraintManager
+from optimization.anytime import Deadline, ImprovementTracker, ImprovementCallback
+from optimization.cma_es import SepCMAES
+from optimization.move_log import MoveLog
+
+# 双向最小间距表（CLEARANCE_RULES 编译结果）
+MIN_CLEAR = compile_pair_tables().min_clear
+# 邻域半径：超过最大间距规则的家具不可能因本次移动产生新的冲突
+NEIGHBOUR_RADIUS = float(MIN_CLEAR.max())
 
 class TryFailOptimizer:
     def __init__(self, max_attempts: int = 100):
         """初始化局部优化器"""
         self.max_attempts = max_attempts
         self.constraint_manager = ConstraintManager()
+        self.last_history: List[tuple] = []
 
     def optimize(
         self,
         layout: List[Furniture],
         room: Room,
         constraints: Optional[Dict[str, tuple]] = None,
-        verbose: bool = False
+        verbose: bool = False,
+        deadline: Union[Deadline, float, None] = None,
+        on_improvement: Optional[ImprovementCallback] = None
     ) -> List[Furniture]:
-        """Perform local search optimization with constraints."""
+        """
+        Perform local search optimization with constraints.
+        候选移动原地执行并记入撤销日志，只对被移动家具及其邻居做增量校验，
+        被拒绝时通过日志回滚；整个过程只复制一次布局。
+        deadline 到期后立即停止并返回当前最优布局（局部搜索只接受改进，当前即最优）。
+        """
+        deadline = Deadline.coerce(deadline)
         current_layout = copy.deepcopy(layout)
         current_score = RuleEvaluator.evaluate(current_layout, room)
+        tracker = ImprovementTracker(deadline, on_improvement)
+        tracker.offer(current_score, lambda: copy.deepcopy(current_layout))
+        move_log = MoveLog()
         if verbose:
             print(f"Initial score: {current_score:.2f}")
 
@@ -33,22 +53,23 @@ class TryFailOptimizer:
         if constraints:
             for fid, values in constraints.items():
                 try:
-                    if len(values) == 4:
-                        x, y, w, h = values  # Expected case
-                    elif len(values) == 2:
-                        x, y = values  # Handle missing width/height
-                        w, h = 1.0, 1.0  # Assign default small size
+                    if len(values) in (2, 4):
+                        x, y = values[0], values[1]  # 宽高不参与位置约束
                     else:
                         raise ValueError(f"⚠️ Invalid constraint format for {fid}: {values}")
-                    
-                    self.constraint_manager.add_fixed_position(fid, x, y, w, h)
+
+                    self.constraint_manager.add_position_constraints({fid: (x, y)})
 
                 except ValueError as e:
                     print(e)
                     continue  # Skip invalid constraints
 
         for attempt in range(self.max_attempts):
-            hints = RuleEvaluator.get_optimization_hints(current_layout, room)
+            if deadline.expired():
+                if verbose:
+                    print(f"⏱️ Deadline reached at attempt {attempt}")
+                break
+            hints = RuleEvaluator.get_optimization_hints(current_layout)
             valid_hints = {k: v for k, v in hints.items() if not self.constraint_manager.is_constrained(k)}
 
             if not valid_hints:
@@ -57,63 +78,87 @@ class TryFailOptimizer:
                 break
 
             target_id, suggestion = self._select_best_hint(valid_hints)
-            new_layout = self._apply_suggestion(current_layout, target_id, suggestion, room)
 
-            # Rule validation check
-            if new_layout is not None and self._is_valid(new_layout, room):
-                new_score = RuleEvaluator.evaluate(new_layout, room)
-                if new_score > current_score:
-                    current_layout = new_layout
-                    current_score = new_score
-                    if verbose:
-                        print(f"Attempt {attempt}: Score improved to {new_score:.2f}")
+            move_log.begin()
+            if not self._apply_suggestion(current_layout, target_id, suggestion, room, move_log):
+                move_log.rollback()
+                continue
+
+            new_score = RuleEvaluator.evaluate(current_layout, room)
+            if new_score > current_score:
+                move_log.commit()
+                current_score = new_score
+                tracker.offer(current_score, lambda: copy.deepcopy(current_layout))
+                if verbose:
+                    print(f"Attempt {attempt}: Score improved to {new_score:.2f}")
+            else:
+                move_log.rollback()
 
+        self.last_history = tracker.history
         return current_layout
     
     def _select_best_hint(self, hints: dict) -> tuple:
         """选择最有价值的优化建议"""
-        return max(hints.items(), key=lambda item: item[1]["delta_score"])
+        return max(hints.items(), key=lambda item: item[1].get("delta_score", 0.0))
+
+    @staticmethod
+    def _find_target(layout: List[Furniture], target_id: str) -> Optional[Furniture]:
+        """按 id 查找目标家具（兼容 RuleEvaluator 的 item_{i} 键）"""
+        for item in layout:
+            if item.id == target_id:
+                return item
+        if target_id.startswith("item_") and target_id[5:].isdigit():
+            index = int(target_id[5:])
+            if index < len(layout):
+                return layout[index]
+        return None
 
     def _apply_suggestion(
         self,
         layout: List[Furniture],
         target_id: str,
         suggestion: dict,
-        room: Room
-    ) -> Optional[List[Furniture]]:
-        """尝试应用优化建议"""
-        new_layout = copy.deepcopy(layout)
-        
-        target_item = next((item for item in new_layout if item.id == target_id), None)
+        room: Room,
+        move_log: MoveLog
+    ) -> bool:
+        """尝试原地应用优化建议；返回 False 时由调用方回滚"""
+        target_item = self._find_target(layout, target_id)
         if not target_item:
-            return None
+            return False
 
-        original_position = (target_item.x, target_item.y)
-        target_item.x = suggestion["suggested_x"]
-        target_item.y = suggestion["suggested_y"]
-        
-        if self._is_valid(new_layout, room):
-            return new_layout
-        
-        target_item.x, target_item.y = original_position
-        return None
+        move_log.move(target_item, suggestion["suggested_x"], suggestion["suggested_y"])
+        return self._is_valid_move(target_item, layout, room)
+
+    @staticmethod
+    def _neighbours(item: Furniture, layout: List[Furniture], radius: float = NEIGHBOUR_RADIUS) -> List[Furniture]:
+        """包围盒外扩 radius 后与 item 相交的其他家具"""
+        min_x, min_y, max_x, max_y = item.polygon.bounds
+        neighbours = []
+        for other in layout:
+            if other is item:
+                continue
+            o_min_x, o_min_y, o_max_x, o_max_y = other.polygon.bounds
+            if (o_min_x <= max_x + radius and o_max_x >= min_x - radius and
+                    o_min_y <= max_y + radius and o_max_y >= min_y - radius):
+                neighbours.append(other)
+        return neighbours
 
-    def _is_valid(self, layout: List[Furniture], room: Room) -> bool:
-        """全面有效性检查（新增规则引擎验证）"""
-        if not CollisionChecker(layout).validate_all():
+    def _is_valid_move(self, item: Furniture, layout: List[Furniture], room: Room) -> bool:
+        """增量有效性检查：只校验被移动家具与其邻居（碰撞、间距规则、约束）"""
+        if not room.is_within_bounds(item):
             return False
 
-        for item in layout:
-            if not room.is_within_bounds(item.x, item.y, item.width, item.height):
+        polygon = item.polygon
+        for other in self._neighbours(item, layout):
+            other_polygon = other.polygon
+            if polygon.intersects(other_polygon):
+                return False
+            # 与 RuleEngine 硬性规则一致的双向最小间距
+            distance = polygon.distance(other_polygon)
+            if distance < MIN_CLEAR[TYPE_INDEX[item.type], TYPE_INDEX[other.type]]:
                 return False
 
-        if not self.constraint_manager.validate(layout):
-            return False
-
-        # 规则引擎检查
-        engine = RuleEngine(room.config)
-        validated_layout = engine.apply_rules(copy.deepcopy(layout), room)
-        return validated_layout == layout  # 未被修正才视为有效
+        return self.constraint_manager.validate_item(item, layout)
 
 class ConstraintManager:
     """约束管理模块"""
@@ -153,34 +198,126 @@ class ConstraintManager:
             distance = item_a.polygon.distance(item_b.polygon)
             if not (min_d <= distance <= max_d):
                 return False
-        
+
+        return True
+
+    def validate_item(self, item: Furniture, layout: List[Furniture]) -> bool:
+        """只验证与单个家具相关的约束（增量检查用）"""
+        if item.id in self.constraints["position"]:
+            req_x, req_y = self.constraints["position"][item.id]
+            if not (abs(item.x - req_x) < 0.1 and abs(item.y - req_y) < 0.1):
+                return False
+
+        for (id_a, id_b), (min_d, max_d) in self.constraints["relative"].items():
+            if item.id not in (id_a, id_b):
+                continue
+            other_id = id_b if item.id == id_a else id_a
+            other = next((i for i in layout if i.id == other_id), None)
+            if not other:
+                continue
+
+            distance = item.polygon.distance(other.polygon)
+            if not (min_d <= distance <= max_d):
+                return False
+
         return True
-    
+
 
 class MultiObjectiveLocalSearch:
-    def __init__(self, max_iterations, objective_weights):
+    def __init__(self, max_iterations, objective_weights, time_budget: Optional[float] = None,
+                 population_size: Optional[int] = None, sigma0: float = 0.1,
+                 optimize_rotation: bool = False, max_workers: int = 0, seed: Optional[int] = None):
+        """
+        max_iterations: 最大代数；time_budget: 评估预算（秒）
+        sigma0: 初始步长（相对于各维可行区间宽度）
+        max_workers > 1 时按种群并行评估
+        """
         self.max_iter = max_iterations
         self.weights = objective_weights
-        self.nm = NelderMead()
-
-    def refine(self, layout, room):
-        """多目标Nelder-Mead优化"""
-        problem = {
-            'fun': self._multi_objective_loss,
-            'x0': self._layout_to_vector(layout),
-            'bounds': self._get_bounds(layout),
-            'args': (room,)
+        self.time_budget = time_budget
+        self.population_size = population_size
+        self.sigma0 = sigma0
+        self.optimize_rotation = optimize_rotation
+        self.max_workers = max_workers
+        self.seed = seed
+        self._template: List[Furniture] = []
+        self._engine = None
+        self._engine_room = None
+        self.last_stats: Dict[str, float] = {}
+
+    def refine(self, layout, room, deadline: Union[Deadline, float, None] = None,
+               on_improvement: Optional[ImprovementCallback] = None):
+        """多目标 sep-CMA-ES 精修：每代整体采样一个种群并批量评估"""
+        deadline = Deadline.coerce(self.time_budget if deadline is None else deadline)
+        self._template = list(layout)
+        self._engine = self._engine_room = None
+        x0 = self._layout_to_vector(layout)
+        lower, upper = self._get_bounds(layout, room)
+        span = np.maximum(upper - lower, 1e-6)
+        es = SepCMAES(x0, self.sigma0 * span, lower, upper, popsize=self.population_size, seed=self.seed)
+        tracker = ImprovementTracker(deadline, on_improvement)
+
+        engine = self._get_engine(room)
+        pool = engine.repair_pool(room, self.max_workers, self._template) if self.max_workers > 1 else None
+        with pool or contextlib.nullcontext():
+            while True:
+                es.tell(self._population_loss(es.ask(), room, pool))
+                best_x = es.best_x
+                tracker.offer(-es.best_f, lambda: self._vector_to_layout(best_x))
+                if es.generation >= self.max_iter or es.stop() or deadline.expired():
+                    break
+        tracker.flush()
+
+        self.last_stats = {
+            "generations": es.generation,
+            "evaluations": es.evaluations,
+            "best_loss": es.best_f,
+            "seconds": deadline.elapsed(),
+            "history": tracker.history,
         }
-        
-        result = minimize(**problem, method='Nelder-Mead', options={'maxiter': self.max_iter})
-        
-        return self._vector_to_layout(result.x)
+        return self._vector_to_layout(es.best_x)
+
+    def optimize(self, layout, room, deadline: Union[Deadline, float, None] = None,
+                 on_improvement: Optional[ImprovementCallback] = None):
+        """统一的 anytime 接口"""
+        return self.refine(layout, room, deadline=deadline, on_improvement=on_improvement)
+
+    def _layout_to_vector(self, layout) -> np.ndarray:
+        """布局 → [x_0..x_n, y_0..y_n(, rot_0..rot_n)]"""
+        parts = [[item.x for item in layout], [item.y for item in layout]]
+        if self.optimize_rotation:
+            parts.append([(item.rotation % 360) / 90.0 for item in layout])
+        return np.asarray(parts, dtype=float).ravel()
+
+    def _get_bounds(self, layout, room):
+        """房间边界：x ∈ [0, W - w]，y ∈ [0, H - h]，旋转 ∈ [0, 4)"""
+        lower = [0.0] * len(layout) * 2
+        upper = ([max(0.0, room.width - item.width) for item in layout] +
+                 [max(0.0, room.height - item.height) for item in layout])
+        if self.optimize_rotation:
+            lower += [0.0] * len(layout)
+            upper += [3.999] * len(layout)
+        return np.asarray(lower), np.asarray(upper)
+
+    def _vector_to_layout(self, x):
+        """向量 → 布局（浅拷贝模板家具，避免每次评估 deepcopy）"""
+        return decode_genome(x, self._template)
+
+    def _get_engine(self, room):
+        """每个进程对同一房间只构造一次规则引擎，换房间时重建"""
+        if self._engine is None or self._engine_room is not room:
+            self._engine = RuleEngine(room.config)
+            self._engine_room = room
+        return self._engine
+
+    def _population_loss(self, population, room, pool=None) -> np.ndarray:
+        """整代种群先批量规则修正（进程池中每个工作进程一个引擎），再在本进程打分"""
+        layouts, _ = self._get_engine(room).apply_rules_batch(
+            population, room, workers=self.max_workers, template=self._template, pool=pool)
+        return np.asarray([self._multi_objective_loss(layout, room) for layout in layouts], dtype=float)
 
-    def _multi_objective_loss(self, x, room):
-        """多目标损失函数（新增规则修正）"""
-        layout = self._vector_to_layout(x)
-        engine = RuleEngine(room.config)
-        validated_layout = engine.apply_rules(layout, room)  # 强制规则修正
+    def _multi_objective_loss(self, validated_layout, room):
+        """多目标损失函数（输入为已规则修正的布局）"""
         return (
             -MultiObjectiveScorer.comfort_score(validated_layout, room) * self.weights['comfort'] +
             -MultiObjectiveScorer.space_utilization_score(validated_layout, room) * self.weights['space_utilization'] +
@@ -0,0 +1,59 @@
+# optimization/move_log.py
+from typing import List, Tuple
+from core.furniture import Furniture
+
+
+class MoveLog:
+    """
+    原地移动 + 撤销日志：
+    候选移动直接作用在布局中的家具上，被拒绝时按日志逆序恢复，
+    避免每次尝试都 deepcopy 整个布局。
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[Furniture, float, float, float]] = []
+        self._marks: List[int] = []
+
+    def begin(self) -> None:
+        """开始一个事务（可嵌套）"""
+        self._marks.append(len(self._entries))
+
+    def _record(self, item: Furniture) -> None:
+        self._entries.append((item, item.x, item.y, item.rotation))
+
+    def move(self, item: Furniture, new_x: float, new_y: float) -> None:
+        """记录旧位置后原地移动家具"""
+        self._record(item)
+        item.set_position(new_x, new_y)
+
+    def rotate(self, item: Furniture, angle: float) -> None:
+        """记录旧朝向后原地旋转家具"""
+        self._record(item)
+        item.rotate(angle)
+
+    def commit(self) -> None:
+        """接受当前事务的所有移动"""
+        mark = self._marks.pop()
+        if not self._marks:
+            del self._entries[mark:]
+
+    def rollback(self) -> None:
+        """按逆序撤销当前事务的所有移动"""
+        mark = self._marks.pop()
+        while len(self._entries) > mark:
+            item, x, y, rotation = self._entries.pop()
+            item.set_position(x, y)
+            item.rotation = rotation
+
+    def touched(self) -> List[Furniture]:
+        """当前事务中被移动过的家具（去重，保持顺序）"""
+        mark = self._marks[-1] if self._marks else 0
+        seen, items = set(), []
+        for item, *_ in self._entries[mark:]:
+            if id(item) not in seen:
+                seen.add(id(item))
+                items.append(item)
+        return items
+
+    def __len__(self) -> int:
+        return len(self._entries)
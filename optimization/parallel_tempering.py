@@ -0,0 +1,250 @@
+# optimization/parallel_tempering.py
+import copy
+import functools
+import math
+import random
+import multiprocessing
+from typing import List, Dict, Optional, Union
+from core.furniture import Furniture
+from core.room import Room
+from evaluation.scorer import RuleIntegratedScorer
+from optimization.anytime import Deadline, ImprovementTracker, ImprovementCallback
+from optimization.move_log import MoveLog
+from optimization.simulated_annealing import AnnealingState, LayoutEnergy, MoveGenerator
+
+# 只保留硬约束惩罚：评分本身由 RuleIntegratedScorer 给出
+DEFAULT_PENALTY_WEIGHTS = {
+    "overlap": 50.0,
+    "bounds": 50.0,
+    "clearance": 0.0,
+    "relation": 0.0,
+    "access": 20.0,
+}
+
+
+class Replica:
+    """单个副本：家具对象 + 数组状态，能量 = -RuleIntegratedScorer 总分 + 硬约束惩罚"""
+
+    def __init__(self, layout: List[Furniture], room: Room, scorer: RuleIntegratedScorer,
+                 penalty_weights: Dict[str, float], seed: int):
+        self.items = layout
+        self.scorer = scorer
+        self.state = AnnealingState.from_layout(layout, LayoutEnergy.from_room(room, penalty_weights))
+        self.rng = random.Random(seed)
+        self.moves = MoveGenerator(self.state, self.rng, step_size=max(room.width, room.height) / 4)
+        self.log = MoveLog()
+        self.score = scorer.calculate_layout_score(self.items)
+        self.energy = -self.score + self.state.total
+        self.best_energy = self.energy
+        self.best_score = self.score
+        self.best = self.state.snapshot()
+        self.accepted = 0
+        self.steps = 0
+
+    def run(self, steps: int, temperature: float, scale: float = 1.0) -> float:
+        """在固定温度下执行 steps 步 Metropolis 更新，返回当前能量"""
+        state = self.state
+        for _ in range(steps):
+            proposal = self.moves.propose(scale)
+            d_penalty, unaries, rows = state.delta(proposal)
+
+            self.log.begin()
+            for i, cx, cy, rot in proposal:
+                item = self.items[i]
+                self.log.move(item, cx - state.width[i] / 2, cy - state.height[i] / 2)
+                self.log.rotate(item, rot * 90)
+            score = self.scorer.calculate_layout_score(self.items)
+            new_energy = -score + state.total + d_penalty
+            d = new_energy - self.energy
+
+            self.steps += 1
+            if d <= 0 or self.rng.random() < math.exp(-d / temperature):
+                state.apply(proposal, d_penalty, unaries, rows)
+                self.log.commit()
+                self.energy, self.score = new_energy, score
+                self.accepted += 1
+                if new_energy < self.best_energy:
+                    self.best_energy, self.best_score = new_energy, score
+                    self.best = state.snapshot()
+            else:
+                self.log.rollback()
+        return self.energy
+
+
+def _replica_worker(conn, layout: List[Furniture], room_size, room_config: dict,
+                    replica_ids: List[int], seeds: List[int], penalty_weights: Dict[str, float]):
+    """工作进程：持有一组副本，按主进程指令推进/汇报"""
+    room = Room(room_size[0], room_size[1], room_config)
+    scorer = RuleIntegratedScorer(room_config)
+    replicas = {
+        rid: Replica(copy.deepcopy(layout), room, scorer, penalty_weights, seed)
+        for rid, seed in zip(replica_ids, seeds)
+    }
+    while True:
+        cmd, payload = conn.recv()
+        if cmd == "run":
+            steps, temperatures, scales = payload
+            conn.send({
+                rid: (r.run(steps, temperatures[rid], scales[rid]), r.best_energy)
+                for rid, r in replicas.items()
+            })
+        elif cmd == "snapshot":
+            conn.send(replicas[payload].best)
+        elif cmd == "best":
+            conn.send({
+                rid: (r.best_energy, r.best_score, r.best, r.accepted / max(1, r.steps))
+                for rid, r in replicas.items()
+            })
+        elif cmd == "close":
+            conn.close()
+            return
+
+
+def _send(conn, message) -> None:
+    try:
+        conn.send(message)
+    except (BrokenPipeError, OSError) as err:
+        raise RuntimeError("Parallel tempering worker exited unexpectedly") from err
+
+
+def _recv(conn):
+    """父进程已关闭子端，工作进程退出时 recv 抛出 EOFError 而不是一直阻塞"""
+    try:
+        return conn.recv()
+    except (EOFError, OSError) as err:
+        raise RuntimeError("Parallel tempering worker exited unexpectedly") from err
+
+
+def _shutdown(conns, procs) -> None:
+    """通知工作进程退出；管道已断开的忽略，未按时退出的直接终止"""
+    for conn in conns:
+        try:
+            conn.send(("close", None))
+        except (BrokenPipeError, OSError):
+            pass
+        conn.close()
+    for proc in procs:
+        proc.join(timeout=5.0)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join()
+
+
+class ParallelTemperingOptimizer:
+    def __init__(self, num_replicas: int = 8, t_min: float = 0.5, t_max: float = 50.0,
+                 steps_per_exchange: int = 20, exchanges: int = 50, max_workers: Optional[int] = None,
+                 penalty_weights: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        """
+        副本交换（并行回火）优化器：
+        M 条链按几何级数温度分布在多个工作进程中，每 steps_per_exchange 步
+        在相邻温度之间尝试交换（交换的是温度，等价于交换状态，但无需传输布局）。
+        """
+        self.num_replicas = max(2, num_replicas)
+        self.t_min = t_min
+        self.t_max = t_max
+        self.steps_per_exchange = steps_per_exchange
+        self.exchanges = exchanges
+        self.max_workers = max_workers or min(self.num_replicas, multiprocessing.cpu_count())
+        self.penalty_weights = dict(DEFAULT_PENALTY_WEIGHTS, **(penalty_weights or {}))
+        self.seed = seed
+        self.last_stats: Dict[str, object] = {}
+
+    def temperatures(self) -> List[float]:
+        """几何级数温度阶梯"""
+        m = self.num_replicas
+        ratio = self.t_max / self.t_min
+        return [self.t_min * ratio ** (k / (m - 1)) for k in range(m)]
+
+    def optimize(self, layout: List[Furniture], room: Room, deadline: Union[Deadline, float, None] = None,
+                 on_improvement: Optional[ImprovementCallback] = None) -> List[Furniture]:
+        """
+        exchanges 为交换轮数上限；deadline 在每轮交换之间检查。
+        on_improvement 收到的分数为 -energy，布局快照只在回调时才从工作进程取回。
+        """
+        deadline = Deadline.coerce(deadline)
+        tracker = ImprovementTracker(deadline, on_improvement)
+        template = AnnealingState.from_layout(layout, LayoutEnergy.from_room(room, self.penalty_weights))
+        temps = self.temperatures()
+        rng = random.Random(self.seed)
+        base_seed = rng.randrange(2 ** 31)
+
+        # 副本 rid 的初始温度下标为 rid；slot_of[rid] 随交换变化
+        slot_of = list(range(self.num_replicas))
+        workers = min(self.max_workers, self.num_replicas)
+        assignment = [list(range(w, self.num_replicas, workers)) for w in range(workers)]
+        room_config = getattr(room, "config", {}) or {}
+
+        conns, procs = [], []
+        for rids in assignment:
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_replica_worker,
+                args=(child, layout, (room.width, room.height), room_config, rids,
+                      [base_seed + rid for rid in rids], self.penalty_weights),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            conns.append(parent)
+            procs.append(proc)
+
+        pair_attempts = [0] * (self.num_replicas - 1)
+        pair_accepts = [0] * (self.num_replicas - 1)
+        owner = {rid: conns[w] for w, rids in enumerate(assignment) for rid in rids}
+        rounds = 0
+        try:
+            for round_idx in range(self.exchanges):
+                if deadline.expired():
+                    break
+                rounds += 1
+                temperatures = {rid: temps[slot_of[rid]] for rid in range(self.num_replicas)}
+                scales = {rid: max(0.05, math.sqrt(temperatures[rid] / self.t_max)) for rid in range(self.num_replicas)}
+                for conn in conns:
+                    _send(conn, ("run", (self.steps_per_exchange, temperatures, scales)))
+                replies = {}
+                for conn in conns:
+                    replies.update(_recv(conn))
+                energies = {rid: reply[0] for rid, reply in replies.items()}
+
+                leader = min(replies, key=lambda rid: replies[rid][1])
+                if -replies[leader][1] > tracker.best_score:
+                    tracker.offer(-replies[leader][1], functools.partial(self._fetch_layout, owner[leader],
+                                                                         leader, template, layout))
+
+                # 奇偶交替尝试相邻温度交换
+                replica_at = {slot: rid for rid, slot in enumerate(slot_of)}
+                for k in range(round_idx % 2, self.num_replicas - 1, 2):
+                    a, b = replica_at[k], replica_at[k + 1]
+                    log_ratio = (1.0 / temps[k] - 1.0 / temps[k + 1]) * (energies[a] - energies[b])
+                    pair_attempts[k] += 1
+                    if log_ratio >= 0 or rng.random() < math.exp(log_ratio):
+                        slot_of[a], slot_of[b] = k + 1, k
+                        pair_accepts[k] += 1
+
+            bests = {}
+            for conn in conns:
+                _send(conn, ("best", None))
+                bests.update(_recv(conn))
+        finally:
+            _shutdown(conns, procs)
+
+        best_rid = min(bests, key=lambda rid: bests[rid][0])
+        best_energy, best_score, snapshot, _ = bests[best_rid]
+
+        self.last_stats = {
+            "best_energy": float(best_energy),
+            "best_score": float(best_score),
+            "seconds": deadline.elapsed(),
+            "rounds": rounds,
+            "history": tracker.history,
+            "temperatures": temps,
+            "swap_acceptance": [acc / max(1, att) for acc, att in zip(pair_accepts, pair_attempts)],
+            "replica_acceptance": [bests[rid][3] for rid in range(self.num_replicas)],
+        }
+        return template.write_back(copy.deepcopy(layout), snapshot)
+
+    @staticmethod
+    def _fetch_layout(conn, rid: int, template: AnnealingState, layout: List[Furniture]) -> List[Furniture]:
+        """从工作进程取回副本 rid 的最优快照并写回布局副本"""
+        _send(conn, ("snapshot", rid))
+        return template.write_back(copy.deepcopy(layout), _recv(conn))
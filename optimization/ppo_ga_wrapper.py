@@ -5,6 +5,7 @@ from optimization.genetic.parallel_ga import ParallelGeneticAlgorithm
 from optimization.genetic.nsga2 import NSGA2Optimizer
 from optimization.local_search import MultiObjectiveLocalSearch
 from core.config_loader import load_room_from_json
+from core.furniture import Furniture, FurnitureType
 from core.layout_state import Layout
 from evaluation.scorer import MultiObjectiveScorer
 from utils.logger import log_info
@@ -54,8 +55,16 @@ class PPOGABoostedOptimizer:
         if os.path.exists(seed_layout_path):
             with open(seed_layout_path) as f:
                 data = json.load(f)
-                layout = Layout.from_dict(data)
-                self.seed_layouts.append(layout)
+            if isinstance(data, list):
+                # scripts/generate_seed_layouts.py 批量生成的布局列表
+                for items in data[:max_seeds]:
+                    self.seed_layouts.append([
+                        Furniture(d["x"], d["y"], d["width"], d["height"], FurnitureType(d["type"]), d["rotation"])
+                        for d in items
+                    ])
+                log_info(f"✅ {len(self.seed_layouts)} PPO layouts loaded as seeds for GA.")
+            else:
+                self.seed_layouts.append(Layout.from_dict(data))
                 log_info("✅ PPO layout loaded as seed for GA.")
         else:
             log_info("⚠️ No PPO layout found. Using random initialization.")
@@ -89,9 +98,9 @@ class PPOGABoostedOptimizer:
 
         # 局部搜索精修
         refined = []
-        local = MultiObjectiveLocalSearch(self.room, scorer)
+        local = MultiObjectiveLocalSearch(max_iterations=50, objective_weights=self.objectives, time_budget=5.0)
         for ind in pareto_front:
-            improved = local.refine(ind)
+            improved = local.refine(ind, self.room)
             refined.append(improved)
 
         log_info(f"✅ Refined {len(refined)} layouts after NSGA-II")
@@ -0,0 +1,399 @@
+# optimization/simulated_annealing.py
+import copy
+import math
+import random
+import time
+import multiprocessing
+from typing import Callable, List, Dict, Optional, Tuple, Union
+import numpy as np
+from core.furniture import Furniture
+from core.room import DOOR_ZONE_BUFFER, Room
+from optimization.anytime import Deadline, ImprovementTracker, ImprovementCallback
+from rules.pair_tables import TYPE_INDEX, compile_pair_tables
+
+DEFAULT_ENERGY_WEIGHTS = {
+    "overlap": 10.0,     # 家具重叠面积（硬约束）
+    "bounds": 10.0,      # 超出房间边界（硬约束）
+    "clearance": 1.0,    # CLEARANCE_RULES 最小间距不足
+    "relation": 0.5,     # RELATIONSHIPS / must_near 距离范围
+    "access": 5.0,       # 门前通行区被占用
+}
+
+DEFAULT_MOVE_WEIGHTS = {
+    "translate": 0.6,
+    "rotate": 0.15,
+    "swap": 0.1,
+    "snap": 0.15,
+}
+
+
+class LayoutEnergy:
+    """
+    可增量计算的布局能量：
+    E = Σ_i unary(i) + Σ_{i<j} pair(i, j)
+    unary 包含越界与门前通行区占用，pair 包含重叠、间距与关联距离。
+    家具旋转限定为 90° 的倍数，因此所有几何量都按轴对齐矩形计算。
+    """
+
+    def __init__(self, room_width: float, room_height: float, door_zones: List[Tuple[float, float, float, float]],
+                 weights: Optional[Dict[str, float]] = None):
+        self.room_width = room_width
+        self.room_height = room_height
+        self.door_zones = [tuple(map(float, z)) for z in door_zones]
+        self.weights = dict(DEFAULT_ENERGY_WEIGHTS, **(weights or {}))
+        tables = compile_pair_tables()
+        self.min_clear, self.rel_weight, self.rel_min, self.rel_max = (
+            tables.min_clear, tables.rel_weight, tables.rel_min, tables.rel_max)
+
+    @classmethod
+    def from_room(cls, room: Room, weights: Optional[Dict[str, float]] = None) -> "LayoutEnergy":
+        return cls(room.width, room.height, room.zone_bounds("door", DOOR_ZONE_BUFFER), weights)
+
+    def unary(self, cx: float, cy: float, hx: float, hy: float) -> float:
+        """单个家具的越界与门区占用惩罚"""
+        out = (max(0.0, hx - cx) + max(0.0, cx + hx - self.room_width) +
+               max(0.0, hy - cy) + max(0.0, cy + hy - self.room_height))
+        blocked = 0.0
+        for x0, y0, x1, y1 in self.door_zones:
+            ox = min(cx + hx, x1) - max(cx - hx, x0)
+            oy = min(cy + hy, y1) - max(cy - hy, y0)
+            if ox > 0 and oy > 0:
+                blocked += ox * oy
+        return self.weights["bounds"] * out + self.weights["access"] * blocked
+
+    def bind(self, tid: np.ndarray) -> Dict[str, np.ndarray]:
+        """按布局的类型 id 向量预先展开 (n, n) 规则矩阵，之后每步只做行索引"""
+        ix = np.ix_(tid, tid)
+        return {
+            "clear": self.min_clear[ix],
+            "rel_w": self.rel_weight[ix],
+            "rel_min": self.rel_min[ix],
+            "rel_max": self.rel_max[ix],
+        }
+
+    def pair_row(self, i: int, xi: float, yi: float, hxi: float, hyi: float, tables: Dict[str, np.ndarray],
+                 cx: np.ndarray, cy: np.ndarray, hx: np.ndarray, hy: np.ndarray) -> np.ndarray:
+        """家具 i 与所有家具的成对能量（第 i 项为 0）"""
+        dxg = np.abs(cx - xi) - (hx + hxi)
+        dyg = np.abs(cy - yi) - (hy + hyi)
+        overlap = np.maximum(-dxg, 0.0) * np.maximum(-dyg, 0.0)
+        gap = np.hypot(np.maximum(dxg, 0.0), np.maximum(dyg, 0.0))
+
+        w = self.weights
+        row = w["overlap"] * overlap + w["clearance"] * np.maximum(tables["clear"][i] - gap, 0.0)
+        rel_w = tables["rel_w"]
+        if rel_w[i].any() or rel_w[:, i].any():
+            rel_min, rel_max = tables["rel_min"], tables["rel_max"]
+            rel = (rel_w[i] * (np.maximum(rel_min[i] - gap, 0.0) + np.maximum(gap - rel_max[i], 0.0)) +
+                   rel_w[:, i] * (np.maximum(rel_min[:, i] - gap, 0.0) + np.maximum(gap - rel_max[:, i], 0.0)))
+            row += w["relation"] * rel
+        row[i] = 0.0
+        return row
+
+
+class AnnealingState:
+    """以数组形式保存的布局状态（中心点、基础尺寸、四分之一旋转数、类型 id）"""
+
+    def __init__(self, cx, cy, width, height, rot, tid, energy: LayoutEnergy):
+        self.cx = np.asarray(cx, dtype=float)
+        self.cy = np.asarray(cy, dtype=float)
+        self.width = np.asarray(width, dtype=float)
+        self.height = np.asarray(height, dtype=float)
+        self.rot = np.asarray(rot, dtype=int)
+        self.tid = np.asarray(tid, dtype=int)
+        self.energy = energy
+        self.tables = energy.bind(self.tid)
+        self.n = len(self.cx)
+        self.hx = np.where(self.rot % 2 == 0, self.width, self.height) / 2
+        self.hy = np.where(self.rot % 2 == 0, self.height, self.width) / 2
+        self.unary = np.zeros(self.n)
+        self.pair = np.zeros((self.n, self.n))
+        self.total = 0.0
+        self.recompute()
+
+        # 同尺寸家具分组（用于 swap；不区分长宽方向，交换时由 fit_rotation 对齐占地）
+        groups: Dict[Tuple[float, float], List[int]] = {}
+        for i in range(self.n):
+            key = tuple(sorted((round(float(self.width[i]), 3), round(float(self.height[i]), 3))))
+            groups.setdefault(key, []).append(i)
+        self.swap_groups = [g for g in groups.values() if len(g) >= 2]
+
+    @classmethod
+    def from_layout(cls, layout: List[Furniture], energy: LayoutEnergy) -> "AnnealingState":
+        cx = [f.x + f.width / 2 for f in layout]
+        cy = [f.y + f.height / 2 for f in layout]
+        rot = [int(round(f.rotation / 90.0)) % 4 for f in layout]
+        tid = [TYPE_INDEX.get(f.type, 0) for f in layout]
+        return cls(cx, cy, [f.width for f in layout], [f.height for f in layout], rot, tid, energy)
+
+    def recompute(self) -> float:
+        """全量计算能量（初始化或校验用）"""
+        for i in range(self.n):
+            self.unary[i] = self.energy.unary(self.cx[i], self.cy[i], self.hx[i], self.hy[i])
+            self.pair[i] = self.energy.pair_row(i, self.cx[i], self.cy[i], self.hx[i], self.hy[i], self.tables,
+                                                self.cx, self.cy, self.hx, self.hy)
+        self.total = float(self.unary.sum() + np.triu(self.pair, 1).sum())
+        return self.total
+
+    def half_extents(self, i: int, rot: int) -> Tuple[float, float]:
+        if rot % 2 == 0:
+            return self.width[i] / 2, self.height[i] / 2
+        return self.height[i] / 2, self.width[i] / 2
+
+    def fit_rotation(self, i: int, j: int) -> int:
+        """i 移到 j 的位置时的朝向：保持自身朝向，占地与 j 不一致（如 2×1 与 1×2）时转 90°"""
+        rot = int(self.rot[i])
+        own = tuple(round(float(v), 3) for v in self.half_extents(i, rot))
+        other = tuple(round(float(v), 3) for v in self.half_extents(j, int(self.rot[j])))
+        return rot if own == other else (rot + 1) % 4
+
+    def delta(self, moves: List[Tuple[int, float, float, int]]):
+        """
+        计算一组移动 (i, cx, cy, rot) 的能量变化，不修改状态。
+        返回 (delta, 新 unary, 新 pair 行)，供 apply 直接复用。
+        """
+        if len(moves) == 1:
+            i, x, y, r = moves[0]
+            hx, hy = self.half_extents(i, r)
+            u = self.energy.unary(x, y, hx, hy)
+            row = self.energy.pair_row(i, x, y, hx, hy, self.tables, self.cx, self.cy, self.hx, self.hy)
+            d = u - self.unary[i] + float(row.sum() - self.pair[i].sum())
+            return d, [u], [row]
+
+        cx, cy, hx_arr, hy_arr = self.cx.copy(), self.cy.copy(), self.hx.copy(), self.hy.copy()
+        for i, x, y, r in moves:
+            cx[i], cy[i] = x, y
+            hx_arr[i], hy_arr[i] = self.half_extents(i, r)
+        unaries, rows, d = [], [], 0.0
+        for i, *_ in moves:
+            u = self.energy.unary(cx[i], cy[i], hx_arr[i], hy_arr[i])
+            row = self.energy.pair_row(i, cx[i], cy[i], hx_arr[i], hy_arr[i], self.tables, cx, cy, hx_arr, hy_arr)
+            unaries.append(u)
+            rows.append(row)
+            d += u - self.unary[i] + float(row.sum() - self.pair[i].sum())
+        # 移动集合内部的家具对被计算了两次
+        idx = [m[0] for m in moves]
+        for a in range(len(idx)):
+            for b in range(a + 1, len(idx)):
+                d -= rows[a][idx[b]] - self.pair[idx[a], idx[b]]
+        return d, unaries, rows
+
+    def apply(self, moves, d: float, unaries, rows) -> None:
+        for (i, x, y, r), u, row in zip(moves, unaries, rows):
+            self.cx[i], self.cy[i], self.rot[i] = x, y, r
+            self.hx[i], self.hy[i] = self.half_extents(i, r)
+            self.unary[i] = u
+            self.pair[i, :] = row
+            self.pair[:, i] = row
+        self.total += d
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self.cx.copy(), self.cy.copy(), self.rot.copy()
+
+    def restore(self, snapshot) -> None:
+        self.cx[:], self.cy[:], self.rot[:] = snapshot
+        self.hx = np.where(self.rot % 2 == 0, self.width, self.height) / 2
+        self.hy = np.where(self.rot % 2 == 0, self.height, self.width) / 2
+        self.recompute()
+
+    def write_back(self, layout: List[Furniture], snapshot=None) -> List[Furniture]:
+        """把数组状态（或给定快照）写回家具对象（旋转绕中心进行，基础角点 = 中心 - 基础尺寸/2）"""
+        cx, cy, rot = snapshot if snapshot is not None else (self.cx, self.cy, self.rot)
+        for i, item in enumerate(layout):
+            item.set_position(float(cx[i] - self.width[i] / 2), float(cy[i] - self.height[i] / 2))
+            item.rotation = int(rot[i]) * 90
+        return layout
+
+
+class MoveGenerator:
+    """平移 / 旋转 90° / 同尺寸交换 / 贴墙 四类邻域移动"""
+
+    def __init__(self, state: AnnealingState, rng: random.Random, move_weights: Optional[Dict[str, float]] = None,
+                 step_size: float = 1.0):
+        self.state = state
+        self.rng = rng
+        self.step_size = step_size
+        weights = dict(DEFAULT_MOVE_WEIGHTS, **(move_weights or {}))
+        if not state.swap_groups:
+            weights["swap"] = 0.0
+        total = sum(weights.values())
+        self.kinds = list(weights.keys())
+        self.cum_weights = []
+        acc = 0.0
+        for kind in self.kinds:
+            acc += weights[kind] / total
+            self.cum_weights.append(acc)
+
+    def propose(self, scale: float = 1.0) -> List[Tuple[int, float, float, int]]:
+        s, rng = self.state, self.rng
+        r = rng.random()
+        kind = next((k for k, c in zip(self.kinds, self.cum_weights) if r <= c), self.kinds[-1])
+        i = rng.randrange(s.n)
+        x, y, rot = float(s.cx[i]), float(s.cy[i]), int(s.rot[i])
+
+        if kind == "translate":
+            sigma = self.step_size * scale
+            return [(i, x + rng.gauss(0.0, sigma), y + rng.gauss(0.0, sigma), rot)]
+        if kind == "rotate":
+            return [(i, x, y, (rot + rng.choice((1, 3))) % 4)]
+        if kind == "swap":
+            a, b = rng.sample(rng.choice(s.swap_groups), 2)
+            return [(a, float(s.cx[b]), float(s.cy[b]), s.fit_rotation(a, b)),
+                    (b, float(s.cx[a]), float(s.cy[a]), s.fit_rotation(b, a))]
+
+        # snap：贴到随机一面墙
+        hx, hy = s.half_extents(i, rot)
+        wall = rng.randrange(4)
+        energy = s.energy
+        if wall == 0:
+            y = hy
+        elif wall == 1:
+            x = energy.room_width - hx
+        elif wall == 2:
+            y = energy.room_height - hy
+        else:
+            x = hx
+        return [(i, x, y, rot)]
+
+
+def anneal(state: AnnealingState, steps: int, rng: random.Random, schedule: str = "adaptive",
+           t_start: Optional[float] = None, t_end_ratio: float = 1e-3, move_weights: Optional[Dict[str, float]] = None,
+           window: int = 200, deadline: Optional[Deadline] = None,
+           on_best: Optional[Callable[[float, tuple], None]] = None, check_every: int = 64) -> Dict[str, object]:
+    """
+    在 state 上原地执行一条退火链，结束时 state 恢复为链上最优解。
+    schedule:
+      - "geometric": T_k = T0 * ratio^progress
+      - "adaptive":  每 window 步根据接受率向目标接受率（从 0.8 指数衰减到 0.01）调整温度
+    给定 deadline 时 progress 取步数进度与时间进度的较大者，到期即停止；
+    on_best(energy, snapshot) 在链上最优解刷新时调用。
+    """
+    moves = MoveGenerator(state, rng, move_weights, step_size=max(state.energy.room_width, state.energy.room_height) / 4)
+
+    if t_start is None:
+        # 以约 80% 的上坡接受率估计初始温度
+        uphill = [d for d in (state.delta(moves.propose())[0] for _ in range(100)) if d > 0]
+        t_start = (sum(uphill) / len(uphill)) / math.log(1 / 0.8) if uphill else 1.0
+    t_start = max(t_start, 1e-9)
+    temperature = t_start
+    t_end = t_start * t_end_ratio
+
+    best_energy = state.total
+    best = state.snapshot()
+    if on_best is not None:
+        on_best(best_energy, best)
+    accepted = window_accepted = 0
+    start = time.perf_counter()
+    progress = 0.0
+
+    step = -1
+    for step in range(steps):
+        if step % check_every == 0:
+            progress = step / steps
+            if deadline is not None:
+                if deadline.expired():
+                    break
+                progress = max(progress, deadline.fraction())
+            if schedule == "geometric":
+                temperature = t_start * t_end_ratio ** progress
+        scale = max(0.05, math.sqrt(temperature / t_start))
+        proposal = moves.propose(scale)
+        d, unaries, rows = state.delta(proposal)
+        if d <= 0 or rng.random() < math.exp(-d / temperature):
+            state.apply(proposal, d, unaries, rows)
+            accepted += 1
+            window_accepted += 1
+            if state.total < best_energy - 1e-12:
+                best_energy = state.total
+                best = state.snapshot()
+                if on_best is not None:
+                    on_best(best_energy, best)
+
+        if schedule != "geometric" and (step + 1) % window == 0:
+            target = 0.8 * (0.01 / 0.8) ** progress
+            rate = window_accepted / window
+            temperature *= math.exp(-2.0 * (rate - target))
+            temperature = min(max(temperature, t_end), t_start)
+            window_accepted = 0
+
+    elapsed = time.perf_counter() - start
+    done = step + 1
+    state.restore(best)
+    return {
+        "best_energy": float(best_energy),
+        "acceptance_rate": accepted / max(1, done),
+        "steps": done,
+        "seconds": elapsed,
+        "us_per_step": 1e6 * elapsed / max(1, done),
+        "t_start": float(t_start),
+    }
+
+
+def _run_chain(args):
+    """进程池工作函数：在子进程中独立运行一条链"""
+    state, params, seed = args
+    stats = anneal(state, rng=random.Random(seed), **params)
+    return stats["best_energy"], state.snapshot(), stats
+
+
+class SimulatedAnnealingOptimizer:
+    def __init__(self, steps: int = 20000, schedule: str = "adaptive", t_start: Optional[float] = None,
+                 t_end_ratio: float = 1e-3, energy_weights: Optional[Dict[str, float]] = None,
+                 move_weights: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        """单轨迹模拟退火优化器（增量能量，每步微秒级）"""
+        self.steps = steps
+        self.schedule = schedule
+        self.t_start = t_start
+        self.t_end_ratio = t_end_ratio
+        self.energy_weights = energy_weights
+        self.move_weights = move_weights
+        self.seed = seed
+        self.last_stats: Dict[str, object] = {}
+
+    def _params(self) -> Dict[str, object]:
+        return {
+            "steps": self.steps,
+            "schedule": self.schedule,
+            "t_start": self.t_start,
+            "t_end_ratio": self.t_end_ratio,
+            "move_weights": self.move_weights,
+        }
+
+    def optimize(self, layout: List[Furniture], room: Room, deadline: Union[Deadline, float, None] = None,
+                 on_improvement: Optional[ImprovementCallback] = None) -> List[Furniture]:
+        """
+        运行一条退火链，返回优化后的布局副本。
+        给定 deadline 时 steps 只作为上限，温度按时间进度下降；
+        on_improvement 收到的分数为 -energy（节流到每 50ms 至多一次）。
+        """
+        deadline = Deadline.coerce(deadline)
+        state = AnnealingState.from_layout(layout, LayoutEnergy.from_room(room, self.energy_weights))
+        tracker = ImprovementTracker(deadline, on_improvement, min_interval=0.05)
+
+        def on_best(energy, snapshot):
+            tracker.offer(-energy, lambda: state.write_back(copy.deepcopy(layout), snapshot))
+
+        self.last_stats = anneal(state, rng=random.Random(self.seed), deadline=deadline, on_best=on_best,
+                                 **self._params())
+        tracker.flush()
+        self.last_stats["history"] = tracker.history
+        return state.write_back(copy.deepcopy(layout))
+
+    def run_chains(self, layout: List[Furniture], room: Room, chains: int = 4,
+                   max_workers: Optional[int] = None) -> List[Furniture]:
+        """在进程池中运行 K 条独立链，返回能量最低的结果"""
+        state = AnnealingState.from_layout(layout, LayoutEnergy.from_room(room, self.energy_weights))
+        base_seed = self.seed if self.seed is not None else random.randrange(2 ** 31)
+        jobs = [(state, self._params(), base_seed + k) for k in range(chains)]
+
+        with multiprocessing.Pool(max_workers or min(chains, multiprocessing.cpu_count())) as pool:
+            results = pool.map(_run_chain, jobs)
+
+        best_energy, best_snapshot, _ = min(results, key=lambda r: r[0])
+        state.restore(best_snapshot)
+        self.last_stats = {
+            "best_energy": best_energy,
+            "chain_energies": [r[0] for r in results],
+            "chains": [r[2] for r in results],
+        }
+        return state.write_back(copy.deepcopy(layout))
@@ -0,0 +1,62 @@
+# rules/layout_index.py
+from typing import Dict, Iterable, List, Optional
+from core.furniture import Furniture, FurnitureType
+from rules.nearest_neighbors import NearestNeighborService
+
+
+class LayoutIndex:
+    """
+    按 FurnitureType 分桶的布局视图：by_type(X) 为 O(1)，增删家具时增量维护分桶。
+    最近邻/半径查询由 neighbors（NearestNeighborService，每种类型一棵 KD 树）负责。
+    规则移动了某类家具后调用 invalidate(类型)，下次查询时重建该类型的 KD 树。
+    """
+
+    def __init__(self, layout: Iterable[Furniture] = ()):
+        self._buckets: Dict[FurnitureType, List[Furniture]] = {}
+        self.neighbors = NearestNeighborService(self)
+        for item in layout:
+            self.add(item)
+
+    @classmethod
+    def of(cls, layout: Iterable[Furniture], index: Optional["LayoutIndex"] = None) -> "LayoutIndex":
+        """调用方已持有索引时直接复用，否则为 layout 建一个"""
+        return index if index is not None else cls(layout)
+
+    def types(self) -> List:
+        """当前有家具的类型"""
+        return [f_type for f_type, bucket in self._buckets.items() if bucket]
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def by_type(self, f_type) -> List[Furniture]:
+        """该类型的全部家具（按加入顺序；返回内部列表，调用方不要修改）"""
+        return self._buckets.get(f_type, [])
+
+    def add(self, item: Furniture) -> None:
+        self._buckets.setdefault(item.type, []).append(item)
+        self.neighbors.invalidate(item.type)
+
+    def remove(self, item: Furniture) -> None:
+        bucket = self._buckets.get(item.type, [])
+        for k, other in enumerate(bucket):
+            if other is item:
+                del bucket[k]
+                self.neighbors.invalidate(item.type)
+                return
+
+    def invalidate(self, f_type) -> None:
+        """该类型家具的位置已改变"""
+        self.neighbors.invalidate(f_type)
+
+    def nearest(self, item: Furniture, f_type) -> Optional[Furniture]:
+        """与 item 多边形距离最近的 f_type 家具（不含 item 自身）"""
+        return self.neighbors.nearest(item, f_type)
+
+    def within(self, item: Furniture, f_types: Iterable, radius: float) -> List[Furniture]:
+        """多边形距离小于 radius 的 f_types 家具（不含 item 自身）"""
+        return self.neighbors.within(item, f_types, radius)
+
+    def near(self, item: Furniture, gap: float, f_types: Optional[Iterable] = None) -> List[Furniture]:
+        """外接圆间隙不超过 gap 的家具（f_types 缺省为全部类型，不含 item 自身）"""
+        return self.neighbors.near(item, self.types() if f_types is None else f_types, gap)
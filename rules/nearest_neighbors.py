@@ -0,0 +1,102 @@
+# rules/nearest_neighbors.py
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scipy.spatial import cKDTree
+from core.furniture import Furniture
+
+LINEAR_SCAN_MAX = 8  # 同类家具不超过该数量时直接逐个计算多边形距离，不建 KD 树
+
+
+def center_radius(item: Furniture) -> Tuple[float, float, float]:
+    """中心与外接圆半径（旋转绕 (x + w/2, y + h/2) 进行，按位姿计算，不依赖可能未刷新的多边形）"""
+    return item.x + item.width / 2, item.y + item.height / 2, math.hypot(item.width, item.height) / 2
+
+
+class NearestNeighborService:
+    """
+    按家具类型的最近邻查询：每种类型一棵中心点 cKDTree（首次查询时构建）。
+    KD 树只负责按中心距离给出候选，候选再用精确的多边形距离排序/过滤：
+    多边形距离 ≥ 中心距离 - 两者外接圆半径，下界不可能更近时停止，结果与逐个比较多边形距离一致。
+    buckets 为提供 by_type(f_type) 的对象（LayoutIndex）；家具移动后需调用 invalidate(类型)。
+    """
+
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._trees: Dict[object, tuple] = {}
+
+    def invalidate(self, f_type) -> None:
+        self._trees.pop(f_type, None)
+
+    def _tree(self, f_type):
+        """(KD 树, 该类型家具, 最大外接圆半径)"""
+        cached = self._trees.get(f_type)
+        if cached is None:
+            items = list(self._buckets.by_type(f_type))
+            geometry = np.array([center_radius(item) for item in items]).reshape(-1, 3)
+            cached = (cKDTree(geometry[:, :2]), items, float(geometry[:, 2].max(initial=0.0)))
+            self._trees[f_type] = cached
+        return cached
+
+    def k_nearest(self, item: Furniture, f_type, k: int = 1) -> List[Tuple[float, Furniture]]:
+        """与 item 多边形距离最近的 k 件 f_type 家具（不含 item 自身），返回按距离升序的 (距离, 家具)"""
+        bucket = self._buckets.by_type(f_type)
+        polygon = item.polygon
+        if len(bucket) <= max(LINEAR_SCAN_MAX, k):
+            found = [(polygon.distance(other.polygon), other) for other in bucket if other is not item]
+            return sorted(found, key=lambda pair: pair[0])[:k]
+
+        tree, items, max_radius = self._tree(f_type)
+        cx, cy, radius = center_radius(item)
+        best: List[Tuple[float, Furniture]] = []
+        seen, batch = 0, min(k + LINEAR_SCAN_MAX, len(items))
+        while True:
+            dists, idx = tree.query((cx, cy), k=batch)
+            for d, i in zip(dists[seen:], idx[seen:]):
+                other = items[i]
+                if other is item or (len(best) == k and d - radius - max_radius > best[-1][0]):
+                    continue
+                best.append((polygon.distance(other.polygon), other))
+                best.sort(key=lambda pair: pair[0])
+                del best[k:]
+            if batch == len(items) or (len(best) == k and dists[-1] - radius - max_radius > best[-1][0]):
+                return best
+            seen, batch = batch, min(2 * batch, len(items))
+
+    def nearest(self, item: Furniture, f_type) -> Optional[Furniture]:
+        found = self.k_nearest(item, f_type, 1)
+        return found[0][1] if found else None
+
+    def within(self, item: Furniture, f_types: Iterable, radius: float) -> List[Furniture]:
+        """多边形距离小于 radius 的各类型家具（不含 item 自身），按类型及加入顺序返回"""
+        polygon = item.polygon
+        cx, cy, item_radius = center_radius(item)
+        found = []
+        for f_type in f_types:
+            bucket = self._buckets.by_type(f_type)
+            if len(bucket) <= LINEAR_SCAN_MAX:
+                candidates = bucket
+            else:
+                tree, items, max_radius = self._tree(f_type)
+                candidates = [items[i] for i in sorted(tree.query_ball_point((cx, cy), radius + item_radius + max_radius))]
+            found.extend(other for other in candidates
+                         if other is not item and polygon.distance(other.polygon) < radius)
+        return found
+
+    def near(self, item: Furniture, f_types: Iterable, gap: float) -> List[Furniture]:
+        """外接圆间隙不超过 gap 的各类型家具（不含 item 自身）：精确几何判断前的粗筛"""
+        cx, cy, item_radius = center_radius(item)
+        found = []
+        for f_type in f_types:
+            bucket = self._buckets.by_type(f_type)
+            if len(bucket) <= LINEAR_SCAN_MAX:
+                candidates = bucket
+            else:
+                tree, items, max_radius = self._tree(f_type)
+                candidates = [items[i] for i in sorted(tree.query_ball_point((cx, cy), gap + item_radius + max_radius))]
+            for other in candidates:
+                if other is not item:
+                    ox, oy, other_radius = center_radius(other)
+                    if math.hypot(ox - cx, oy - cy) - item_radius - other_radius <= gap:
+                        found.append(other)
+        return found
@@ -0,0 +1,107 @@
+# rules/pair_tables.py
+import functools
+from typing import Iterable, NamedTuple
+import numpy as np
+from core.furniture import FurnitureType, TYPE_INDEX, TYPE_LIST
+from generation.collision.relation_rules import COMPATIBILITY_MATRIX, FURNITURE_RELATIONS
+from rules.relation_rules import RELATIONSHIPS
+from rules.reward_components.clearance import CLEARANCE_RULES
+
+_NAME_INDEX = {ft.name: i for i, ft in enumerate(TYPE_LIST)}
+
+DEFAULT_CLEARANCE = 0.3   # 与 check_all_clearances 一致
+MUST_NEAR_DISTANCE = 1.5  # 与 must_be_near_reward 一致
+DEFAULT_FACING_THRESHOLD = 30
+
+
+class PairTables(NamedTuple):
+    """
+    编译后的家具类型两两规则表，均为 (n_types, n_types) 只读数组，按 TYPE_INDEX 下标：
+    - min_clear:     最小间距（CLEARANCE_RULES，双向取大，缺省 DEFAULT_CLEARANCE）
+    - compatibility: 1 兼容 / 0 中性 / -1 避免相邻（COMPATIBILITY_MATRIX，对称）
+    - must_near:     a 需要靠近 b（FURNITURE_RELATIONS.must_near）
+    - facing:        a 朝向 b 的角度阈值（度），0 表示无朝向要求
+    - rel_weight / rel_min / rel_max: a 到 b 的间隙应处于 [rel_min, rel_max]（RELATIONSHIPS + must_near）
+    """
+    min_clear: np.ndarray
+    compatibility: np.ndarray
+    must_near: np.ndarray
+    facing: np.ndarray
+    rel_weight: np.ndarray
+    rel_min: np.ndarray
+    rel_max: np.ndarray
+
+    def bind(self, tid: np.ndarray) -> "PairTables":
+        """按布局的类型 id 向量一次性展开为 (n, n) 的成对矩阵"""
+        ix = np.ix_(tid, tid)
+        return PairTables(*(table[ix] for table in self))
+
+
+def _index(name) -> int:
+    """枚举或 "SOFA" 这样的名字 → 下标；非家具条目（WALL、LAMP 等）返回 -1"""
+    if isinstance(name, FurnitureType):
+        return TYPE_INDEX[name]
+    return _NAME_INDEX.get(name, -1)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_pair_tables() -> PairTables:
+    """把分散在各模块中的嵌套规则 dict 编译成稠密数组（进程内只编译一次，结果只读共享）"""
+    n = len(TYPE_LIST)
+    min_clear = np.full((n, n), DEFAULT_CLEARANCE)
+    compatibility = np.zeros((n, n), dtype=np.int8)
+    must_near = np.zeros((n, n), dtype=bool)
+    facing = np.zeros((n, n))
+    rel_weight = np.zeros((n, n))
+    rel_min = np.zeros((n, n))
+    rel_max = np.full((n, n), np.inf)
+
+    for a, rules in CLEARANCE_RULES.items():
+        for b, dist in rules.items():
+            if isinstance(b, FurnitureType):
+                min_clear[TYPE_INDEX[a], TYPE_INDEX[b]] = dist
+    min_clear = np.maximum(min_clear, min_clear.T)
+
+    for (a_name, b_name), score in COMPATIBILITY_MATRIX.items():
+        a, b = _index(a_name), _index(b_name)
+        if a >= 0 and b >= 0:
+            compatibility[a, b] = compatibility[b, a] = score
+
+    for a_name, rule in FURNITURE_RELATIONS.items():
+        a = _index(a_name)
+        if a < 0:
+            continue
+        for b_name in rule.get("must_near", []):
+            b = _index(b_name)
+            if b >= 0:
+                must_near[a, b] = True
+                rel_weight[a, b] = 1.0
+                rel_max[a, b] = MUST_NEAR_DISTANCE
+        face = rule.get("facing")
+        if face and _index(face.get("type")) >= 0:
+            facing[a, _index(face["type"])] = face.get("threshold", DEFAULT_FACING_THRESHOLD)
+
+    for a, relations in RELATIONSHIPS.items():
+        for rel in relations:
+            b = rel.get("related")
+            if not isinstance(b, FurnitureType):
+                continue
+            i, j = TYPE_INDEX[a], TYPE_INDEX[b]
+            if "min_distance" in rel and "max_distance" in rel:
+                rel_weight[i, j] = 1.0
+                rel_min[i, j], rel_max[i, j] = rel["min_distance"], rel["max_distance"]
+            elif "distance_multiplier" in rel:
+                # 与 _enforce_distance_multiplier 相同：默认 tv_size=0.5，容差 0.1
+                desired = 0.5 * rel["distance_multiplier"]
+                rel_weight[i, j] = 1.0
+                rel_min[i, j], rel_max[i, j] = desired - 0.1, desired + 0.1
+
+    tables = PairTables(min_clear, compatibility, must_near, facing, rel_weight, rel_min, rel_max)
+    for table in tables:
+        table.flags.writeable = False
+    return tables
+
+
+def type_ids(items: Iterable) -> np.ndarray:
+    """家具列表 → 类型 id 向量 (n,)，与 PairTables 下标一致"""
+    return np.fromiter((TYPE_INDEX[f.type] for f in items), dtype=np.int64)
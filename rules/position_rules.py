@@ -1,5 +1,10 @@
+import inspect
 import math
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
 from core.furniture import FurnitureType
+from rules.layout_index import LayoutIndex
+from rules.rule_stats_logger import RuleStatsLogger, count_changed, layout_poses
 
 # 定义各家具的定位规则及优先级和硬性/软性分类
 POSITION_RULES = {
@@ -53,97 +58,148 @@ POSITION_RULES = {
     ]
 }
 
-def apply_position_rules(layout):
+class CompiledRule(NamedTuple):
+    name: str
+    priority: int
+    hard: bool
+    handler: Callable      # handler(item, layout, index=None)
+    reads: FrozenSet       # 除自身外读取/调整的家具类型（增量规则引擎据此判断依赖）
+
+
+# 规则名 → 处理函数(item, layout, index=None)；新规则用 @register_position_rule 注册即可，无需修改分派逻辑
+RULE_HANDLERS: Dict[str, Callable] = {}
+RULE_READS: Dict[str, FrozenSet] = {}
+
+def _as_handler(fn: Callable) -> Callable:
+    """只接收 item 或 (item, layout) 的函数包装成 (item, layout, index=None) 形式"""
+    params = len(inspect.signature(fn).parameters)
+    if params == 1:
+        return lambda item, layout, index=None: fn(item)
+    if params == 2:
+        return lambda item, layout, index=None: fn(item, layout)
+    return fn
+
+def register_position_rule(name: str, reads: Iterable[FurnitureType] = ()):
+    """注册定位规则处理函数"""
+    def decorator(fn):
+        RULE_HANDLERS[name] = _as_handler(fn)
+        RULE_READS[name] = frozenset(reads)
+        return fn
+    return decorator
+
+
+class PositionRuleSet:
+    """
+    编译后的定位规则：每种家具一份按优先级排好序的 (规则名, 处理函数) 列表，只编译一次。
+    - set_enabled(name, flag) 按规则名启用/禁用（重建活动列表，执行时不再逐条判断）
+    - calls / elapsed_ns 记录每条规则的调用次数与累计耗时
+    - 给定已开启的 logger 时额外记录每次调用的耗时直方图与改动家具数
+    """
+
+    def __init__(self, rules: Dict[FurnitureType, List[dict]] = None, handlers: Dict[str, Callable] = None,
+                 logger: Optional[RuleStatsLogger] = None):
+        self.logger = logger
+        rules = POSITION_RULES if rules is None else rules
+        handlers = RULE_HANDLERS if handlers is None else handlers
+        self.compiled: Dict[FurnitureType, Tuple[CompiledRule, ...]] = {}
+        for f_type, entries in rules.items():
+            compiled = []
+            for entry in sorted(entries, key=lambda x: x["priority"]):
+                if entry["rule"] not in handlers:
+                    raise KeyError(f"No handler registered for position rule {entry['rule']!r} ({f_type})")
+                compiled.append(CompiledRule(entry["rule"], entry["priority"], entry.get("type") == "hard",
+                                             _as_handler(handlers[entry["rule"]]), RULE_READS.get(entry["rule"], frozenset())))
+            self.compiled[f_type] = tuple(compiled)
+        names = {rule.name for compiled in self.compiled.values() for rule in compiled}
+        self.enabled: Dict[str, bool] = dict.fromkeys(sorted(names), True)
+        self.calls: Dict[str, int] = dict.fromkeys(self.enabled, 0)
+        self.elapsed_ns: Dict[str, int] = dict.fromkeys(self.enabled, 0)
+        self._rebuild()
+
+    def _rebuild(self):
+        self._active = {
+            f_type: tuple((rule.name, rule.handler) for rule in compiled if self.enabled[rule.name])
+            for f_type, compiled in self.compiled.items()
+        }
+
+    def set_enabled(self, name: str, enabled: bool = True) -> None:
+        if name not in self.enabled:
+            raise KeyError(f"Unknown position rule {name!r}")
+        self.enabled[name] = enabled
+        self._rebuild()
+
+    def apply(self, layout):
+        """按家具类型依次执行已启用的规则（每条规则一次直接调用，共享一个按类型分桶的索引）"""
+        active, calls, elapsed = self._active, self.calls, self.elapsed_ns
+        index = LayoutIndex(layout)
+        clock = time.perf_counter_ns
+        logger = self.logger if self.logger is not None and self.logger.enabled else None
+        for item in layout:
+            for name, handler in active.get(item.type, ()):
+                before = layout_poses(layout) if logger else None
+                start = clock()
+                handler(item, layout, index)
+                took = clock() - start
+                elapsed[name] += took
+                calls[name] += 1
+                if logger:
+                    logger.record_time(name, took, count_changed(before, layout))
+        return layout
+
+    def stats(self) -> Dict[str, dict]:
+        """每条规则的调用次数与累计耗时（毫秒）"""
+        return {name: {"calls": self.calls[name], "total_ms": self.elapsed_ns[name] / 1e6,
+                       "enabled": self.enabled[name]} for name in self.enabled}
+
+    def reset_stats(self) -> None:
+        self.calls = dict.fromkeys(self.enabled, 0)
+        self.elapsed_ns = dict.fromkeys(self.enabled, 0)
+
+
+_default_rule_set = None
+
+def default_rule_set() -> PositionRuleSet:
+    """模块级共享的编译规则集（首次使用时编译）"""
+    global _default_rule_set
+    if _default_rule_set is None:
+        _default_rule_set = PositionRuleSet()
+    return _default_rule_set
+
+def apply_position_rules(layout, rule_set: PositionRuleSet = None):
     """执行所有定位规则"""
-    for item in layout:
-        rules = POSITION_RULES.get(item.type, [])
-        sorted_rules = sorted(rules, key=lambda x: x["priority"])
-        
-        for rule in sorted_rules:
-            if rule["rule"] == "against_wall":
-                _enforce_wall_alignment(item)
-            elif rule["rule"] == "headboard_north":
-                _enforce_headboard_north(item)
-            elif rule["rule"] == "face_tv":
-                _enforce_tv_facing(item, layout)
-            elif rule["rule"] == "group_coffee_table":
-                _enforce_group_coffee_table(item, layout)
-            elif rule["rule"] == "combination_angle":
-                _enforce_combination_angle(item)
-            elif rule["rule"] == "center_room":
-                _enforce_center_room(item)
-            elif rule["rule"] == "chair_distance":
-                _enforce_chair_distance(item, layout)
-            elif rule["rule"] == "door_clearance":
-                _enforce_door_clearance(item)
-            elif rule["rule"] == "mirror_alignment":
-                _enforce_mirror_alignment(item, layout)
-            elif rule["rule"] == "sofa_distance":
-                _enforce_sofa_distance(item, layout)
-            elif rule["rule"] == "symmetry_decor":
-                _enforce_symmetry_decor(item, layout)
-            elif rule["rule"] == "cable_management":
-                _enforce_cable_management(item)
-            elif rule["rule"] == "near_window":
-                _enforce_near_window(item)
-            elif rule["rule"] == "chair_space":
-                _enforce_chair_space(item, layout)
-            elif rule["rule"] == "avoid_light":
-                _enforce_avoid_light(item)
-            elif rule["rule"] == "along_wall":
-                _enforce_along_wall(item)
-            elif rule["rule"] == "adjacent_reading":
-                _enforce_adjacent_reading(item, layout)
-            elif rule["rule"] == "max_height":
-                _enforce_max_height(item)
-            elif rule["rule"] == "near_entrance":
-                _enforce_near_entrance(item)
-            elif rule["rule"] == "bench_space":
-                _enforce_bench_space(item)
-            elif rule["rule"] == "door_direction":
-                _enforce_door_direction(item)
-            elif rule["rule"] == "in_front_sofa":
-                _enforce_in_front_sofa(item, layout)
-            elif rule["rule"] == "edge_alignment":
-                _enforce_edge_alignment(item, layout)
-            elif rule["rule"] == "no_sharp_angle":
-                _enforce_no_sharp_angle(item)
-            elif rule["rule"] == "table_distance":
-                _enforce_table_distance(item, layout)
-            elif rule["rule"] == "group_symmetry":
-                _enforce_group_symmetry(item, layout)
-            elif rule["rule"] == "back_clearance":
-                _enforce_back_clearance(item)
-    return layout
+    return (rule_set or default_rule_set()).apply(layout)
 
 # 以下为各规则的简单实现（示例，可根据实际需求扩展细化）
 
+@register_position_rule("against_wall")
 def _enforce_wall_alignment(item):
     # 强制靠墙规则（示例：若item已接近任一房间边界，则认为符合规则）
     # 此处假设房间尺寸信息由item.room提供，若无则略过
     return True
 
+@register_position_rule("headboard_north")
 def _enforce_headboard_north(item):
     # 确保床头朝向北方（即床头不正对门窗），示例中将rotation调整为0
     item.rotation = 0
     return True
 
-def _enforce_tv_facing(item, layout):
+@register_position_rule("face_tv", reads=[FurnitureType.TV_STAND])
+def _enforce_tv_facing(item, layout, index=None):
     # 对于沙发，确保正对电视柜
-    tvs = [i for i in layout if i.type == FurnitureType.TV_STAND]
-    if tvs:
-        tv = min(tvs, key=lambda x: item.polygon.distance(x.polygon))
+    tv = LayoutIndex.of(layout, index).nearest(item, FurnitureType.TV_STAND)
+    if tv:
         dx = tv.x - item.x
         dy = tv.y - item.y
         item.rotation = math.degrees(math.atan2(dy, dx))
     return True
 
-def _enforce_group_coffee_table(item, layout):
+@register_position_rule("group_coffee_table", reads=[FurnitureType.COFFEE_TABLE])
+def _enforce_group_coffee_table(item, layout, index=None):
     """调整沙发与咖啡桌的协调距离"""
-    coffee_tables = [i for i in layout if i.type == FurnitureType.COFFEE_TABLE]
+    index = LayoutIndex.of(layout, index)
     # 仅处理与当前沙发最近的咖啡桌
-    if coffee_tables:
-        nearest_table = min(coffee_tables, key=lambda t: item.polygon.distance(t.polygon))
+    nearest_table = index.nearest(item, FurnitureType.COFFEE_TABLE)
+    if nearest_table:
         current_dist = item.polygon.distance(nearest_table.polygon)
         min_dist, max_dist = 0.4, 0.6
         if current_dist < min_dist:
@@ -160,6 +216,7 @@ def _enforce_group_coffee_table(item, layout):
             norm = (dx**2 + dy**2) ** 0.5 or 1
             nearest_table.x -= (dx / norm) * move_dist
             nearest_table.y -= (dy / norm) * move_dist
+        index.invalidate(FurnitureType.COFFEE_TABLE)
     return True
 
 def _enforce_sofa_distance(item, layout, room):
@@ -181,6 +238,7 @@ def _enforce_sofa_distance(item, layout, room):
             item.x, item.y = new_x, new_y
     return True
 
+@register_position_rule("combination_angle")
 def _enforce_combination_angle(item):
     # 针对组合沙发，确保夹角大于90°
     if hasattr(item, 'segments') and len(item.segments) >= 2:
@@ -189,29 +247,34 @@ def _enforce_combination_angle(item):
             item.segments[1] = (item.segments[0] + 90) % 360
     return True
 
+@register_position_rule("center_room")
 def _enforce_center_room(item):
     # 将餐桌放置在居室中心，假设房间尺寸1.0x1.0（示例）
     item.x = 0.5
     item.y = 0.5
     return True
 
+@register_position_rule("chair_distance")
 def _enforce_chair_distance(item, layout):
     # 调整与餐桌关联的餐椅距离，具体逻辑在alignment中已安排
     return True
 
+@register_position_rule("door_clearance")
 def _enforce_door_clearance(item):
     # 确保衣柜门扇开启方向无阻碍，示例中不做调整，实际需检测门线区域
     return True
 
+@register_position_rule("mirror_alignment")
 def _enforce_mirror_alignment(item, layout):
     # 衣柜的配套穿衣镜位置协调，由alignment模块中的align_wardrobe_mirror处理
     return True
 
 # Fixed version of _enforce_sofa_distance in position_rules.py
-def _enforce_sofa_distance(item, layout):
-    sofas = [i for i in layout if i.type == FurnitureType.SOFA]
-    if sofas:
-        nearest_sofa = min(sofas, key=lambda s: item.polygon.distance(s.polygon))
+@register_position_rule("sofa_distance", reads=[FurnitureType.SOFA])
+def _enforce_sofa_distance(item, layout, index=None):
+    index = LayoutIndex.of(layout, index)
+    nearest_sofa = index.nearest(item, FurnitureType.SOFA)
+    if nearest_sofa:
         current_dist = item.polygon.distance(nearest_sofa.polygon)
         desired_dist = 2.0  # 设定合理距离
         dx, dy = nearest_sofa.x - item.x, nearest_sofa.y - item.y
@@ -225,76 +288,94 @@ def _enforce_sofa_distance(item, layout):
         if hasattr(item, 'check_bounds'):
             if item.check_bounds(new_x, new_y):
                 item.x, item.y = new_x, new_y
+                index.invalidate(item.type)
     return True
 
 
+@register_position_rule("symmetry_decor")
 def _enforce_symmetry_decor(item, layout):
     # 对称摆放电视柜两侧装饰柜，示例中暂不做具体调整
     return True
 
+@register_position_rule("cable_management")
 def _enforce_cable_management(item):
     # 隐藏电视柜线缆管理（示例中不做具体调整）
     return True
 
+@register_position_rule("near_window")
 def _enforce_near_window(item):
     # 将书桌临窗布置，假设窗户在左侧，设置靠近左墙
     item.x = 0.1
     return True
 
+@register_position_rule("chair_space")
 def _enforce_chair_space(item, layout):
     # 确保书桌与书椅间有70cm活动空间，示例中不做具体计算
     return True
 
+@register_position_rule("avoid_light")
 def _enforce_avoid_light(item):
     # 避免书桌屏幕正对光源，示例中不做具体调整
     return True
 
+@register_position_rule("along_wall")
 def _enforce_along_wall(item):
     # 书柜沿墙布置，alignment中已处理
     return True
 
+@register_position_rule("adjacent_reading")
 def _enforce_adjacent_reading(item, layout):
     # 书柜与阅读区相邻，示例中不做具体调整
     return True
 
+@register_position_rule("max_height")
 def _enforce_max_height(item):
     # 限制书柜顶层高度不超过2.2m，假设item.height属性存在
     if getattr(item, 'height', 0) > 2.2:
         item.height = 2.2
     return True
 
+@register_position_rule("near_entrance")
 def _enforce_near_entrance(item):
     # 鞋柜靠近入口处，alignment中已处理
     return True
 
+@register_position_rule("bench_space")
 def _enforce_bench_space(item):
     # 预留换鞋凳空间，示例中不做具体调整
     return True
 
+@register_position_rule("door_direction")
 def _enforce_door_direction(item):
     # 开门方向避开动线，示例中不做具体调整
     return True
 
+@register_position_rule("in_front_sofa")
 def _enforce_in_front_sofa(item, layout):
     # 将咖啡桌放置于沙发前40cm处，alignment中已处理
     return True
 
+@register_position_rule("edge_alignment")
 def _enforce_edge_alignment(item, layout):
     # 长边与沙发对齐，示例中不做具体调整
     return True
 
+@register_position_rule("no_sharp_angle")
 def _enforce_no_sharp_angle(item):
     # 避免咖啡桌锐角朝向座位区，示例中不做具体调整
     return True
 
+@register_position_rule("table_distance")
 def _enforce_table_distance(item, layout):
     # 确保餐椅与餐桌距离70-80cm，alignment中已安排
     return True
 
+@register_position_rule("group_symmetry")
 def _enforce_group_symmetry(item, layout):
     # 餐椅成组对称布置，示例中不做具体调整
     return True
 
+@register_position_rule("back_clearance")
 def _enforce_back_clearance(item):
     # 确保餐椅后方保留50cm后退空间，示例中不做具体调整
     return True
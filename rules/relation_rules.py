@@ -3,6 +3,7 @@ import math
 from typing import List, Dict, Any, Optional, Tuple
 from core.furniture import Furniture, FurnitureType
 from core.room import Room
+from rules.layout_index import LayoutIndex
 
 # 定义各家具间的关联规则
 RELATIONSHIPS = {
@@ -73,29 +74,36 @@ FURNITURE_GROUPS = {
 }
 
 def enforce_relationships(layout: List[Furniture]) -> List[Furniture]:
-    """执行所有关联规则"""
+    """执行所有关联规则（共享一个按类型分桶的索引，关联家具不再逐条规则全表过滤）"""
+    index = LayoutIndex(layout)
     for item in layout:
-        relations = RELATIONSHIPS.get(item.type, [])
-        for rel in relations:
-            related_items = []
-            if isinstance(rel["related"], str):
-                # 针对非家具类型（如"READING_AREA"或"ENTRANCE"）的关联，略过具体实现
-                continue
-            else:
-                related_items = [i for i in layout if i.type == rel["related"]]
-            if not related_items:
-                continue
-                
-            if rel.get("facing"):
-                _adjust_facing(item, related_items)
-            if "distance_multiplier" in rel:
-                _enforce_distance_multiplier(item, related_items, rel["distance_multiplier"])
-            if "min_distance" in rel and "max_distance" in rel:
-                _enforce_distance_range(item, related_items, rel["min_distance"], rel["max_distance"])
-            if rel.get("alignment"):
-                _enforce_alignment(item, related_items)
+        enforce_item_relationships(item, layout, index)
     return layout
 
+def enforce_item_relationships(item: Furniture, layout: List[Furniture], index: Optional[LayoutIndex] = None) -> None:
+    """执行单件家具的关联规则（只读取/调整其关联类型的家具）"""
+    rels = RELATIONSHIPS.get(item.type, [])
+    if not rels:
+        return
+    index = LayoutIndex.of(layout, index)
+    for rel in rels:
+        if isinstance(rel["related"], str):
+            # 针对非家具类型（如"READING_AREA"或"ENTRANCE"）的关联，略过具体实现
+            continue
+        related_items = index.by_type(rel["related"])
+        if not related_items:
+            continue
+
+        if rel.get("facing"):
+            _adjust_facing(item, related_items)
+        if "distance_multiplier" in rel:
+            _enforce_distance_multiplier(item, related_items, rel["distance_multiplier"])
+        if "min_distance" in rel and "max_distance" in rel:
+            _enforce_distance_range(item, related_items, rel["min_distance"], rel["max_distance"])
+        if rel.get("alignment"):
+            _enforce_alignment(item, related_items)
+        index.invalidate(rel["related"])
+
 def _adjust_facing(main_item: Furniture, related_items: List[Furniture]) -> None:
     """调整关联物品朝向"""
     for related in related_items:
@@ -114,8 +122,9 @@ def _enforce_distance_multiplier(main_item: Furniture, related_items: List[Furni
             dx = related.x - main_item.x
             dy = related.y - main_item.y
             factor = (current_dist - desired_dist) / current_dist if current_dist != 0 else 0
-            related.x += dx * factor
-            related.y += dy * factor
+            # 距离过大时向主物品靠拢，过小时远离
+            related.x -= dx * factor
+            related.y -= dy * factor
 
 def _enforce_distance_range(main_item: Furniture, related_items: List[Furniture], min_dist: float, max_dist: float) -> None:
     """确保关联物品之间的距离落在[min_dist, max_dist]范围内"""
@@ -153,11 +162,12 @@ def apply_group_rules(layout: List[Furniture], room: Room) -> List[Furniture]:
         reverse=True
     )
     
+    index = LayoutIndex(layout)
     for group_name, config in sorted_groups:
-        cores = [item for item in layout if item.type == config["core"]]
+        cores = list(index.by_type(config["core"]))
         for core in cores:
             # 强制关联规则（硬性）
-            related_items = _enforce_relation(core, layout, config)
+            related_items = _enforce_relation(core, layout, config, index)
             
             # 优化布局（软性）
             if group_name == "dining_set":
@@ -171,19 +181,19 @@ def apply_group_rules(layout: List[Furniture], room: Room) -> List[Furniture]:
     
     return layout
 
-def _enforce_relation(core: Furniture, layout: List[Furniture], config: Dict[str, Any]) -> List[Furniture]:
+def _enforce_relation(core: Furniture, layout: List[Furniture], config: Dict[str, Any],
+                      index: Optional[LayoutIndex] = None) -> List[Furniture]:
     """强制关联检查"""
-    related_items = [
-        item for item in layout
-        if item.type in config["related"]
-        and item.polygon.distance(core.polygon) < config.get("radius", 2.0)
-    ]
+    index = LayoutIndex.of(layout, index)
+    related_items = index.within(core, config["related"], config.get("radius", 2.0))
     
     # 不满足最小数量时创建新物品
     if len(related_items) < config.get("min_items", 0):
         new_items = _create_missing_items(core, config)
         layout.extend(new_items)
         related_items.extend(new_items)
+        for new_item in new_items:
+            index.add(new_item)
     
     return related_items
 
@@ -199,14 +209,14 @@ def _create_missing_items(core: Furniture, config: Dict[str, Any]) -> List[Furni
             for i in range(config.get("min_items", 0)):
                 # 下面的创建逻辑需要根据实际情况调整
                 new_item = Furniture(
-                    id=f"{core.id}_rel_{len(new_items)}",
-                    type=type_to_create,
                     x=core.x + 1.0,  # 默认位置，后续会调整
                     y=core.y + 1.0,
                     width=0.5,
                     height=0.5,
+                    f_type=type_to_create,
                     rotation=0
                 )
+                new_item.id = f"{core.id}_rel_{len(new_items)}"
                 new_items.append(new_item)
     
     return new_items
@@ -1,24 +1,26 @@
 import math
 from core.furniture import FurnitureType
 from core.room import Room
+from rules.layout_index import LayoutIndex
 from shapely.geometry import Polygon
 
 def align_all_items(layout):
-    """统一对齐规则入口"""
-    layout = align_bed(layout)
-    layout = align_sofa_tv(layout)
-    layout = align_table_chairs(layout)
-    layout = align_wardrobe_mirror(layout)
-    layout = align_desk(layout, Room)
-    layout = align_bookshelf(layout, Room)
-    layout = align_shoe_cabinet(layout)
-    layout = align_coffee_table(layout)
-    layout = align_combination_sofa(layout)
+    """统一对齐规则入口（各规则共享一个按类型分桶的索引）"""
+    index = LayoutIndex(layout)
+    layout = align_bed(layout, index)
+    layout = align_sofa_tv(layout, index)
+    layout = align_table_chairs(layout, index)
+    layout = align_wardrobe_mirror(layout, index)
+    layout = align_desk(layout, Room, index)
+    layout = align_bookshelf(layout, Room, index)
+    layout = align_shoe_cabinet(layout, index)
+    layout = align_coffee_table(layout, index)
+    layout = align_combination_sofa(layout, index)
     return layout
 
-def align_bed(layout):
-    beds = [i for i in layout if i.type == FurnitureType.BED]
-    for bed in beds:
+def align_bed(layout, index=None):
+    index = LayoutIndex.of(layout, index)
+    for bed in index.by_type(FurnitureType.BED):
         # 靠最长墙面居中，并避免床头正对门窗（具体逻辑可根据房间信息细化）
         if bed.width > bed.height:
             bed.x = 0.5  # 靠中
@@ -26,24 +28,24 @@ def align_bed(layout):
         else:
             bed.y = 0.5
             bed.rotation = 90
+    index.invalidate(FurnitureType.BED)
     return layout
 
-def align_sofa_tv(layout):
-    sofas = [i for i in layout if i.type == FurnitureType.SOFA]
-    tvs = [i for i in layout if i.type == FurnitureType.TV_STAND]
-    for sofa in sofas:
+def align_sofa_tv(layout, index=None):
+    index = LayoutIndex.of(layout, index)
+    for sofa in index.by_type(FurnitureType.SOFA):
         # 正对最近的电视柜
-        if tvs:
-            nearest_tv = min(tvs, key=lambda tv: sofa.polygon.distance(tv.polygon))
+        nearest_tv = index.nearest(sofa, FurnitureType.TV_STAND)
+        if nearest_tv:
             dx = nearest_tv.x - sofa.x
             dy = nearest_tv.y - sofa.y
             sofa.rotation = (math.degrees(math.atan2(dy, dx)) + 180) % 360
     return layout
 
-def align_table_chairs(layout):
-    tables = [i for i in layout if i.type == FurnitureType.TABLE]
-    chairs = [i for i in layout if i.type == FurnitureType.CHAIR]
-    for table in tables:
+def align_table_chairs(layout, index=None):
+    index = LayoutIndex.of(layout, index)
+    chairs = index.by_type(FurnitureType.CHAIR)
+    for table in index.by_type(FurnitureType.TABLE):
         # 环绕排列餐椅，距离设为0.75m（70-80cm区间取中值）
         chairs_near = [c for c in chairs if c.polygon.distance(table.polygon) < 1.0]
         if not chairs_near:
@@ -54,19 +56,22 @@ def align_table_chairs(layout):
             chair.x = table.x + math.cos(rad) * 0.75
             chair.y = table.y + math.sin(rad) * 0.75
             chair.rotation = (math.degrees(rad) + 180) % 360
+    index.invalidate(FurnitureType.CHAIR)
     return layout
 
-def align_wardrobe_mirror(layout):
+def align_wardrobe_mirror(layout, index=None):
     # 对于衣柜，若存在穿衣镜（假设FurnitureType.MIRROR存在），则将镜子与衣柜对齐摆放
-    wardrobes = [i for i in layout if i.type == FurnitureType.WARDROBE]
-    mirrors = [i for i in layout if i.type == FurnitureType.MIRROR] if hasattr(FurnitureType, 'MIRROR') else []
-    for wardrobe in wardrobes:
+    if not hasattr(FurnitureType, 'MIRROR'):
+        return layout
+    index = LayoutIndex.of(layout, index)
+    for wardrobe in index.by_type(FurnitureType.WARDROBE):
         # 将与之最近的镜子，放置在衣柜右侧（示例逻辑，可根据房间入口侧优化）
-        if mirrors:
-            related_mirror = min(mirrors, key=lambda m: wardrobe.polygon.distance(m.polygon))
+        related_mirror = index.nearest(wardrobe, FurnitureType.MIRROR)
+        if related_mirror:
             # 设定镜子紧贴衣柜右侧，留出0.05m缝隙
             related_mirror.x = wardrobe.x + wardrobe.width + 0.05
             related_mirror.y = wardrobe.y
+            index.invalidate(FurnitureType.MIRROR)
     return layout
 
 def align_desk(layout):
@@ -93,32 +98,33 @@ def align_bookshelf(layout):
         start_x += shelf.width + gap
     return layout
 
-def align_shoe_cabinet(layout):
+def align_shoe_cabinet(layout, index=None):
     # 鞋柜靠近入口处放置，假设入口在房间左下角
-    shoe_cabinets = [i for i in layout if i.type == FurnitureType.SHOE_CABINET]
-    for cabinet in shoe_cabinets:
+    index = LayoutIndex.of(layout, index)
+    for cabinet in index.by_type(FurnitureType.SHOE_CABINET):
         cabinet.x = 0.1
         cabinet.y = 0.9  # 示例位置，可根据入口实际位置调整
+    index.invalidate(FurnitureType.SHOE_CABINET)
     return layout
 
-def align_coffee_table(layout):
+def align_coffee_table(layout, index=None):
     # 咖啡桌距离沙发前缘40cm，长边与沙发对齐
-    coffee_tables = [i for i in layout if i.type == FurnitureType.COFFEE_TABLE]
-    sofas = [i for i in layout if i.type == FurnitureType.SOFA]
-    for table in coffee_tables:
-        if sofas:
-            # 选择最近的沙发
-            sofa = min(sofas, key=lambda s: table.polygon.distance(s.polygon))
+    index = LayoutIndex.of(layout, index)
+    for table in index.by_type(FurnitureType.COFFEE_TABLE):
+        # 选择最近的沙发
+        sofa = index.nearest(table, FurnitureType.SOFA)
+        if sofa:
             rad = math.radians(sofa.rotation)
             # 将咖啡桌放在沙发前方0.4m处
             table.x = sofa.x + math.cos(rad) * 0.4
             table.y = sofa.y + math.sin(rad) * 0.4
             table.rotation = sofa.rotation
+    index.invalidate(FurnitureType.COFFEE_TABLE)
     return layout
 
-def align_combination_sofa(layout):
+def align_combination_sofa(layout, index=None):
     # 对于组合沙发，确保各组成部分夹角>90°
-    sofas = [i for i in layout if i.type == FurnitureType.SOFA and getattr(i, 'is_combination', False)]
+    sofas = [i for i in LayoutIndex.of(layout, index).by_type(FurnitureType.SOFA) if getattr(i, 'is_combination', False)]
     for sofa in sofas:
         # 这里假设 sofa.segments 存在并记录各部分朝向（示例逻辑）
         if hasattr(sofa, 'segments') and len(sofa.segments) >= 2:
@@ -128,9 +134,10 @@ def align_combination_sofa(layout):
                 sofa.segments[1] = (sofa.segments[0] + 90) % 360
     return layout
 
-def align_desk(layout, room):
+def align_desk(layout, room, index=None):
     """书桌临窗布置（根据实际窗户位置）"""
-    desks = [i for i in layout if i.type == FurnitureType.DESK]
+    index = LayoutIndex.of(layout, index)
+    desks = index.by_type(FurnitureType.DESK)
     windows = getattr(room, "windows", [])  # ✅ Ensure 'windows' exists
     if not windows:
         return layout  # ✅ If no windows, do nothing
@@ -140,10 +147,12 @@ def align_desk(layout, room):
             nearest_window = min(windows, key=lambda w: desk.polygon.distance(w.polygon))
             desk.x = nearest_window.x + 0.1  # 沿窗边偏移
             desk.rotation = 0  # 朝向房间内部
+    index.invalidate(FurnitureType.DESK)
     return layout
 
-def align_bookshelf(layout, room):
-    bookshelves = [i for i in layout if i.type == FurnitureType.BOOKSHELF]
+def align_bookshelf(layout, room, index=None):
+    index = LayoutIndex.of(layout, index)
+    bookshelves = index.by_type(FurnitureType.BOOKSHELF)
     if not bookshelves:
         return layout
     # 获取北墙坐标（假设room提供墙面信息）
@@ -154,4 +163,5 @@ def align_bookshelf(layout, room):
         shelf.y = north_wall_y + 0.1  # 沿北墙偏移
         shelf.x = start_x
         start_x += shelf.width + gap
+    index.invalidate(FurnitureType.BOOKSHELF)
     return layout
\ No newline at end of file
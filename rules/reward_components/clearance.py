@@ -1,6 +1,6 @@
 # rules/clearance.py
+import numpy as np
 from core.furniture import FurnitureType
-from shapely.geometry import Polygon
 from dataclasses import dataclass
 
 @dataclass
@@ -10,6 +10,10 @@ class ClearanceIssue:
     offset_x: float = 0.0
     offset_y: float = 0.0
 
+DOOR_CLEARANCE_BUFFER = 1.2        # check_all_clearances 的门前缓冲区
+DOOR_PASSAGE_BUFFER = (0.3, 1.2)   # ensure_door_clearance 的门前通道（水平, 垂直）
+MIN_PASSAGE_WIDTH = 0.6            # check_human_ergonomics 的默认最小通道宽度
+
 # 定义各家具之间的最小间距（单位：米）
 CLEARANCE_RULES = {
     FurnitureType.BED: {
@@ -50,24 +54,22 @@ CLEARANCE_RULES = {
 }
 
 def check_all_clearances(layout, room):
-    """综合间距检查，包括门/窗缓冲区和家具之间间距"""
+    """综合间距检查，包括门/窗缓冲区和家具之间间距（最小间距取自 PairTables.min_clear，双向取大）"""
+    # pair_tables 由本模块的 CLEARANCE_RULES 编译而来，在函数内导入避免循环依赖
+    from rules.pair_tables import compile_pair_tables, type_ids
     violations = []
     
-    # 门/窗缓冲区
-    door_zones = []
-    for door in getattr(room, 'doors', []):
-        if isinstance(door, (list, tuple)) and len(door) >= 4:
-            x, y, w, h = door
-            door_zone = Polygon([
-                (x-1.2, y-1.2), (x+w+1.2, y-1.2),
-                (x+w+1.2, y+h+1.2), (x-1.2, y+h+1.2)
-            ])
-            door_zones.append(door_zone)
+    # 门/窗缓冲区（房间预先构建）
+    door_zones = room.zones("door", DOOR_CLEARANCE_BUFFER) if room is not None else ()
+
+    # 两两最小间距一次查表 (n, n)
+    ids = type_ids(layout)
+    required = compile_pair_tables().min_clear[ids[:, None], ids[None, :]]
 
-    for item in layout:
+    for i, item in enumerate(layout):
         # 床头避免正对门窗
         if item.type == FurnitureType.BED:
-            if any(zone.contains(item.polygon) for zone in door_zones):
+            if any(room.zone_contains(zone, item) for zone in door_zones):
                 violations.append(ClearanceIssue(
                     blocking_id=item.id,
                     message=f"床{item.id}距离门窗太近",
@@ -76,15 +78,16 @@ def check_all_clearances(layout, room):
                 ))
         
         # 家具间间距检查
-        for other in layout:
-            if item != other:
-                min_dist = CLEARANCE_RULES.get(item.type, {}).get(other.type, 0.3)
-                if item.polygon.distance(other.polygon) < min_dist:
+        for j, other in enumerate(layout):
+            if i != j:
+                min_dist = required[i, j]
+                gap = item.polygon.distance(other.polygon)
+                if gap < min_dist:
                     # 计算移动建议
                     dx = item.x - other.x
                     dy = item.y - other.y
                     dist = (dx**2 + dy**2)**0.5 or 1
-                    move_dist = min_dist - item.polygon.distance(other.polygon)
+                    move_dist = min_dist - gap
                     
                     violations.append(ClearanceIssue(
                         blocking_id=item.id,
@@ -99,28 +102,19 @@ def ensure_door_clearance(layout, room):
     """确保门前通道畅通"""
     modified_layout = list(layout)
     
-    # 创建门前区域
-    door_areas = []
-    for door in getattr(room, 'doors', []):
-        if isinstance(door, (list, tuple)) and len(door) >= 4:
-            x, y, w, h = door
-            # 创建门前1.2米区域
-            door_area = Polygon([
-                (x-0.3, y-1.2), (x+w+0.3, y-1.2),
-                (x+w+0.3, y+h+1.2), (x-0.3, y+h+1.2)
-            ])
-            door_areas.append(door_area)
+    # 门前区域（左右 0.3 米、前后 1.2 米，房间预先构建）
+    door_areas = room.zones("door", DOOR_PASSAGE_BUFFER) if room is not None else ()
     
     # 检查并调整
     for index, item in enumerate(layout):
         for area in door_areas:
-            if item.polygon.intersects(area):
+            if room.overlaps_zone(item, area):
                 # 计算移动方向和距离
                 centroid_item = item.polygon.centroid
-                centroid_door = area.centroid
+                x0, y0, x1, y1 = area.bounds
                 
-                dx = centroid_item.x - centroid_door.x
-                dy = centroid_item.y - centroid_door.y
+                dx = centroid_item.x - (x0 + x1) / 2
+                dy = centroid_item.y - (y0 + y1) / 2
                 
                 # 归一化方向向量
                 dist = (dx**2 + dy**2)**0.5 or 1
@@ -130,14 +124,13 @@ def ensure_door_clearance(layout, room):
                 move_dist = 0.3
                 original_x, original_y = item.x, item.y
                 
-                while item.polygon.intersects(area) and move_dist < 2.0:
-                    item.x = original_x + dx * move_dist
-                    item.y = original_y + dy * move_dist
+                while room.overlaps_zone(item, area) and move_dist < 2.0:
+                    item.set_position(original_x + dx * move_dist, original_y + dy * move_dist)
                     move_dist += 0.3
                 
                 # 如果还是相交，考虑删除该家具
-                if item.polygon.intersects(area):
-                    item.x, item.y = original_x, original_y
+                if room.overlaps_zone(item, area):
+                    item.set_position(original_x, original_y)
                     modified_layout.remove(item)
                     break
     
@@ -145,21 +138,20 @@ def ensure_door_clearance(layout, room):
 
 def check_human_ergonomics(layout):
     """检查家具间人体工学距离"""
+    from rules.pair_tables import compile_pair_tables, type_ids
     issues = []
+
+    # 这对家具之间的最小间距规则（双向取大），不小于默认最小通道宽度
+    ids = type_ids(layout)
+    required = np.maximum(compile_pair_tables().min_clear[ids[:, None], ids[None, :]], MIN_PASSAGE_WIDTH)
     
     for i, item1 in enumerate(layout):
         for j, item2 in enumerate(layout):
             if i >= j:  # 避免重复检查
                 continue
-                
-            # 获取这对家具之间的最小间距规则
-            min_dist = max(
-                CLEARANCE_RULES.get(item1.type, {}).get(item2.type, 0),
-                CLEARANCE_RULES.get(item2.type, {}).get(item1.type, 0),
-                0.6  # 默认最小通道宽度
-            )
             
             # 检查实际距离
+            min_dist = required[i, j]
             actual_dist = item1.polygon.distance(item2.polygon)
             if actual_dist < min_dist:
                 issues.append((item1, item2, min_dist - actual_dist))
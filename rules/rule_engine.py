@@ -1,13 +1,20 @@
 # Fixed version of rule_engine.py
-from typing import List
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple, Union
 import copy
+import functools
 import math
+import multiprocessing
+import time
+import numpy as np
 from core.furniture import Furniture, FurnitureType
-from core.room import Room
-from rules.postion_rules import apply_position_rules
-from rules.clearance import check_all_clearances
-from rules.relation_rules import enforce_relationships, apply_group_rules
-from rules.alignment import align_all_items
+from core.room import DOOR_ZONE_BUFFER, Room
+from rules.layout_index import LayoutIndex
+from rules.pair_tables import TYPE_INDEX, compile_pair_tables
+from rules.position_rules import PositionRuleSet
+from rules.reward_components.clearance import check_all_clearances
+from rules.relation_rules import RELATIONSHIPS, enforce_relationships, enforce_item_relationships, apply_group_rules
+from rules.reward_components.alignment import align_all_items
+from rules.rule_stats_logger import RuleStatsLogger, count_changed, layout_poses
 from shapely.geometry import LineString
 from shapely.geometry import Polygon, LineString
 
@@ -64,6 +71,75 @@ class PathFinder:
                 return False
         return True
 
+INCREMENTAL_MAX_PASSES = 8  # 增量模式下的最大迭代轮数（规则互相拉扯时保证终止）
+POSE_TOLERANCE = 1e-6       # 位姿变化小于该值视为未变化（规则迭代的浮点抖动）
+# 增量模式不执行的软性规则：二者都是整体布局规则（对齐会按类型整体重排、功能组合会新增家具），
+# 且 apply_rules 中按 _evaluate_layout 整体评分决定是否接受，无法拆成只读局部邻域的单件家具规则；
+# 需要它们时调用 apply_rules
+INCREMENTAL_EXCLUDED_RULES = frozenset({"functional_groups", "aesthetic_rules"})
+
+
+class LocalRule(NamedTuple):
+    """
+    可增量执行的单件家具规则：apply(item, layout, room) 可原地调整 item 及其读取的家具。
+    依赖声明：anchors（作用于哪些类型，None 为全部）、reads（读取哪些其他类型）、
+    radius（读取多大空间邻域内的家具，< 0 表示不读空间邻居）。
+    """
+    name: str
+    anchors: Optional[FrozenSet]
+    reads: FrozenSet
+    radius: float
+    apply: Callable
+
+
+def _pose(item):
+    return item.x, item.y, item.width, item.height, item.rotation
+
+
+def _moved(old, new) -> bool:
+    return any(abs(a - b) > POSE_TOLERANCE for a, b in zip(old, new))
+
+
+def _disc(item_id, f_type, pose):
+    """(id, 类型, 中心 x, 中心 y, 外接圆半径)：旋转任意角度时仍是保守的邻域范围"""
+    x, y, w, h, _ = pose
+    return item_id, f_type, x + w / 2, y + h / 2, math.hypot(w, h) / 2
+
+
+def decode_genome(genome, template: Sequence[Furniture]) -> List[Furniture]:
+    """
+    紧凑基因 [x_0..x_n, y_0..y_n(, rot_0..rot_n)] → 家具列表：
+    浅拷贝模板家具后设置位置，旋转以 90° 为单位（与 MultiObjectiveLocalSearch 的向量一致）
+    """
+    genome = np.asarray(genome, dtype=float)
+    n = len(template)
+    layout = []
+    for i, template_item in enumerate(template):
+        item = copy.copy(template_item)
+        item.set_position(float(genome[i]), float(genome[i + n]))
+        if len(genome) >= 3 * n:
+            item.rotation = int(genome[i + 2 * n]) % 4 * 90
+        layout.append(item)
+    return layout
+
+
+_worker_engine = None
+_worker_room = None
+_worker_template = None
+
+
+def _init_repair_worker(room_config, room, template):
+    """每个工作进程只构造一次规则引擎，房间与模板家具也只传输一次"""
+    global _worker_engine, _worker_room, _worker_template
+    _worker_engine = RuleEngine(room_config)
+    _worker_room = room
+    _worker_template = template
+
+
+def _repair_candidate(candidate):
+    return _worker_engine.repair(candidate, _worker_room, _worker_template)
+
+
 class RuleEngine:
     def __init__(self, room_config):
         """统一规则引擎，包含所有布局优化逻辑"""
@@ -92,45 +168,63 @@ class RuleEngine:
             "aesthetic_rules": {"weight": 3, "type": "soft"}
         }
         self.rule_stats = {}   # 规则执行统计
+        # 耗时/改动数统计（FURNITURE_RULE_STATS 开启时记录），定位规则集共享同一个 logger
+        self.stats_logger = RuleStatsLogger()
+        self.position_rules = PositionRuleSet(logger=self.stats_logger)
+
+        # 增量模式：静态几何（门前通行区由 Room 预先构建）与带依赖声明的单件家具规则只构造一次
+        self._door_zones = self.room.zones("door", DOOR_ZONE_BUFFER)
+        self._critical_paths = [LineString(path) for path in self._critical_path_points()]
+        self._min_clear = compile_pair_tables().min_clear
+        self.local_rules = self._compile_local_rules()
+        self._rules_by_type = {
+            f_type: [rule for rule in self.local_rules if rule.anchors is None or f_type in rule.anchors]
+            for f_type in FurnitureType
+        }
+        # 上次执行后各家具的位姿缓存 + 显式标记的脏家具
+        self._poses = {}
+        self._marked = set()
+        self._pending = []     # 未收敛时遗留的脏区域，下次调用继续处理
+        # 增量模式共享的按类型索引：由 _collect_dirty 按新增/移动/移除增量维护，传给各规则与邻域查询
+        self._index = LayoutIndex()
+        self._indexed = {}     # id → 索引中的家具对象
+        self.last_incremental = {}
 
     def _create_room_from_config(self, config):
-        """从配置创建房间对象"""
-        # 简化示例，实际可能需要更完整的Room类实现
-        class SimpleRoom:
-            def __init__(self, width, height, doors=None):
-                self.width = width
-                self.height = height
-                self.doors = doors or []
-                
-            def is_within_bounds(self, x, y, width, height):
-                return 0 <= x <= self.width - width and 0 <= y <= self.height - height
-                
-        return SimpleRoom(
-            config.get("room_width", 10),
-            config.get("room_height", 10),
-            config.get("doors", [])
-        )
-
-    def apply_rules(self, layout: List[Furniture], room: Room) -> List[Furniture]:
-        """按优先级顺序应用所有规则"""
+        """从配置创建房间对象（静态几何随房间一次性构建）"""
+        return Room(config.get("room_width", 10), config.get("room_height", 10), config)
+
+    def apply_rules(self, layout: List[Furniture], room: Room, inplace: bool = False) -> List[Furniture]:
+        """按优先级顺序应用所有规则；inplace=True 时直接修改传入的家具（调用方已持有副本时省去深拷贝）"""
         # 更新路径规划
         self.path_finder.update_layout(layout)
 
         # 深拷贝，避免修改原始数据
-        current_layout = [copy.deepcopy(item) for item in layout]
+        current_layout = list(layout) if inplace else [copy.deepcopy(item) for item in layout]
 
         # 1. 硬性规则
-        current_layout = self._apply_hard_rules(current_layout, room)
+        current_layout = self._timed("hard_rules", self._apply_hard_rules, current_layout, room)
 
         # 2. 软性优化
         current_layout = self._optimize_soft_rules(current_layout, room)
 
         # 3. 路径优化
         if self.active_rules.get("path_optimization"):
-            current_layout = self._apply_path_rules(current_layout)
+            current_layout = self._timed("path_optimization", self._apply_path_rules, current_layout)
 
         return current_layout
 
+    def _timed(self, name, fn, layout, *args):
+        """执行 fn(layout, *args)；统计开启时记录耗时与改动的家具数"""
+        logger = self.stats_logger
+        if not logger.enabled:
+            return fn(layout, *args)
+        before = layout_poses(layout)
+        start = time.perf_counter_ns()
+        result = fn(layout, *args)
+        logger.record_time(name, time.perf_counter_ns() - start, count_changed(before, result))
+        return result
+
     def _apply_hard_rules(self, layout, room):
         """执行硬性规则"""
         # 移除发生碰撞的家具
@@ -157,7 +251,7 @@ class RuleEngine:
     def _apply_soft_rules(self, layout, room):
         """执行软性规则"""
         layout = align_all_items(layout)
-        layout = apply_position_rules(layout)
+        layout = self.position_rules.apply(layout)
         layout = enforce_relationships(layout)
         return layout
 
@@ -173,7 +267,8 @@ class RuleEngine:
             # 依次应用各规则
             for rule_name, cfg in self.rule_config.items():
                 if cfg["type"] == "soft":
-                    modified_layout = self._execute_rule(rule_name, modified_layout, room)
+                    modified_layout = self._timed(rule_name, functools.partial(self._execute_rule, rule_name),
+                                                  modified_layout, room)
                     self.rule_stats[rule_name] = self.rule_stats.get(rule_name, 0) + 1
 
             # 评估新布局
@@ -184,9 +279,9 @@ class RuleEngine:
 
         return best_layout
 
-    def _apply_path_rules(self, layout):
-        """执行路径优化规则"""
-        critical_paths = [
+    def _critical_path_points(self):
+        """门中心 → 房间中心的关键通行路径"""
+        return [
             (
                 (door[0] + door[2]/2, door[1] + door[3]/2),  # 计算门中心
                 (self.room_config.get("room_width", 10)/2, self.room_config.get("room_height", 10)/2)
@@ -194,7 +289,9 @@ class RuleEngine:
             for door in self.room_config.get("doors", [])
         ]
 
-        for path in critical_paths:
+    def _apply_path_rules(self, layout):
+        """执行路径优化规则"""
+        for path in self._critical_path_points():
             if not self.path_finder.find_path(*path):
                 layout = self._adjust_for_path(layout, path)
         return layout
@@ -203,9 +300,10 @@ class RuleEngine:
         """修正路径受阻情况"""
         blockage = self._find_path_blockage(path)
 
+        path_line = LineString(path)
         for item in layout:
             if item in blockage:
-                self._nudge_item(item)
+                self._nudge_item(item, path_line)
         return layout
 
     def _find_path_blockage(self, path):
@@ -221,25 +319,22 @@ class RuleEngine:
                 
         return blocked_items
 
-    def _nudge_item(self, item):
+    def _nudge_item(self, item, path_line):
         """微调家具以避开路径"""
         original_x, original_y = item.x, item.y
         
         # 简单的偏移尝试
         offsets = [(0.2, 0), (-0.2, 0), (0, 0.2), (0, -0.2)]
         for dx, dy in offsets:
-            item.x = original_x + dx
-            item.y = original_y + dy
+            item.set_position(original_x + dx, original_y + dy)
             
-            # 检查新位置是否有效
-            if self.room.is_within_bounds(item.x, item.y, item.width, item.height):
-                # 检查是否还阻塞路径
-                path_line = LineString([(0, 0), (self.room.width, self.room.height)])  # 示例路径
-                if not item.polygon.intersects(path_line):
-                    return
+            # 检查新位置是否有效且不再阻塞路径
+            if (self.room.is_within_bounds(item) and
+                    not item.polygon.intersects(path_line)):
+                return
                     
         # 如果所有尝试都失败，恢复原位置
-        item.x, item.y = original_x, original_y
+        item.set_position(original_x, original_y)
 
     def _execute_rule(self, rule_name, layout, room):
         """执行具体规则"""
@@ -293,19 +388,14 @@ class RuleEngine:
 
     def _eval_sofa_tv_distance(self, layout):
         """评估沙发与电视的距离是否合理"""
-        sofas = [item for item in layout if item.type == FurnitureType.SOFA]
-        tvs = [item for item in layout if item.type == FurnitureType.TV_STAND]
-        
-        if not sofas or not tvs:
+        index = LayoutIndex(layout)
+        sofas = index.by_type(FurnitureType.SOFA)
+        if not sofas or not index.by_type(FurnitureType.TV_STAND):
             return 0
-            
-        # 找最近的沙发-电视组合
-        best_dist = float('inf')
-        for sofa in sofas:
-            for tv in tvs:
-                dist = sofa.polygon.distance(tv.polygon)
-                if dist < best_dist:
-                    best_dist = dist
+
+        # 找最近的沙发-电视组合：每个沙发只查询其最近的电视柜
+        best_dist = min(dist for sofa in sofas
+                        for dist, _ in index.neighbors.k_nearest(sofa, FurnitureType.TV_STAND, 1))
                     
         # 理想距离范围
         ideal_min, ideal_max = 2.0, 3.5
@@ -323,23 +413,13 @@ class RuleEngine:
 
     def _apply_door_rules(self, layout, room):
         """门窗通行区规则"""
-        # 简化示例：移除位于门附近的家具
-        door_zones = []
-        for door in room.doors:
-            x, y, w, h = door
-            # 创建门前通行区多边形
-            door_zone = Polygon([
-                (x-0.8, y-0.8),
-                (x+w+0.8, y-0.8),
-                (x+w+0.8, y+h+0.8),
-                (x-0.8, y+h+0.8)
-            ])
-            door_zones.append(door_zone)
-            
+        # 简化示例：移除位于门附近的家具（门前通行区由房间预先构建）
+        door_zones = (room or self.room).zones("door", DOOR_ZONE_BUFFER)
+
         # 检查并调整家具位置
         for item in layout:
             for zone in door_zones:
-                if item.polygon.intersects(zone):
+                if Room.overlaps_zone(item, zone):
                     # 尝试移动家具
                     self._move_away_from_zone(item, zone)
                     
@@ -354,16 +434,15 @@ class RuleEngine:
         for direction in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
             for distance in [0.5, 1.0, 1.5]:
                 dx, dy = direction
-                item.x = original_x + dx * distance
-                item.y = original_y + dy * distance
+                item.set_position(original_x + dx * distance, original_y + dy * distance)
                 
                 # 检查新位置是否有效
-                if (self.room.is_within_bounds(item.x, item.y, item.width, item.height) and
-                    not item.polygon.intersects(zone)):
+                if (self.room.is_within_bounds(item) and
+                    not Room.overlaps_zone(item, zone)):
                     return
                     
         # 如果所有尝试都失败，恢复原位置
-        item.x, item.y = original_x, original_y
+        item.set_position(original_x, original_y)
 
     def _apply_functional_groups(self, layout, room):
         """功能组合规则"""
@@ -373,6 +452,255 @@ class RuleEngine:
         """美学规则"""
         return align_all_items(layout)
 
+    # ------------------------------------------------------------------ 增量规则
+    def _compile_local_rules(self) -> List[LocalRule]:
+        """
+        硬性规则、定位规则、关联规则与路径规则整理为带依赖声明的单件家具规则（按执行顺序）；
+        rule_config 中的软性规则见 INCREMENTAL_EXCLUDED_RULES
+        """
+        rules = [
+            LocalRule("collision_fix", None, frozenset(), 0.0, self._rule_collision),
+            LocalRule("clearance", None, frozenset(), float(self._min_clear.max()), self._rule_clearance),
+            LocalRule("door_clearance", None, frozenset(), -1.0, self._rule_door_clearance),
+        ]
+        rule_set = self.position_rules
+        for f_type, compiled in rule_set.compiled.items():
+            for rule in compiled:
+                if rule_set.enabled[rule.name]:
+                    rules.append(LocalRule(rule.name, frozenset([f_type]), rule.reads, -1.0,
+                                           lambda item, layout, room, handler=rule.handler:
+                                           handler(item, layout, self._index)))
+        for f_type, relations in RELATIONSHIPS.items():
+            reads = frozenset(rel["related"] for rel in relations if isinstance(rel["related"], FurnitureType))
+            if reads:
+                rules.append(LocalRule("relationships", frozenset([f_type]), reads, -1.0,
+                                       lambda item, layout, room: enforce_item_relationships(item, layout, self._index)))
+        if self.active_rules.get("path_optimization"):
+            rules.append(LocalRule("path_optimization", None, frozenset(), -1.0, self._rule_path))
+        return rules
+
+    def _neighbours(self, item, radius):
+        """外接圆间隙不超过 radius 的其他家具（精确几何判断前的粗筛，经共享索引的 KD 树查询）"""
+        return self._index.near(item, radius)
+
+    def _collides(self, item, layout) -> bool:
+        polygon = item.polygon
+        return any(polygon.intersects(other.polygon) for other in self._neighbours(item, 0.0))
+
+    def _rule_collision(self, item, layout, room):
+        """与任一家具相交则移除（单件执行；增量模式按轮批量判定，见 _remove_collisions）"""
+        if self._collides(item, layout):
+            layout.remove(item)
+
+    def _remove_collisions(self, work, layout, logger) -> int:
+        """
+        本轮待查的家具先全部判定、再统一移除：与 _apply_hard_rules 一样按移除前的布局判定，
+        相互重叠的家具全部移除，而不是保留后检查的一件。返回判定次数
+        """
+        clock = time.perf_counter_ns
+        candidates = [item for item, rule in work if rule.name == "collision_fix"]
+        colliding = []
+        for item in candidates:
+            start = clock()
+            hit = self._collides(item, layout)
+            if logger:
+                logger.record_time("collision_fix", clock() - start, int(hit))
+            if hit:
+                colliding.append(item)
+        for item in colliding:
+            layout.remove(item)
+            self._index.remove(item)
+        if candidates:
+            self.rule_stats["collision_fix"] = self.rule_stats.get("collision_fix", 0) + len(candidates)
+        return len(candidates)
+
+    def _rule_clearance(self, item, layout, room):
+        """与邻近家具间距不足时沿中心连线推开（双向最小间距，CLEARANCE_RULES 编译结果）"""
+        row = self._min_clear[TYPE_INDEX[item.type]]
+        for other in self._neighbours(item, row.max()):
+            distance = item.polygon.distance(other.polygon)
+            min_dist = row[TYPE_INDEX[other.type]]
+            if distance < min_dist:
+                dx, dy = item.x - other.x, item.y - other.y
+                norm = (dx**2 + dy**2) ** 0.5 or 1
+                move = min_dist - distance
+                item.set_position(item.x + dx / norm * move, item.y + dy / norm * move)
+
+    def _rule_door_clearance(self, item, layout, room):
+        for zone in self._door_zones:
+            if Room.overlaps_zone(item, zone):
+                self._move_away_from_zone(item, zone)
+
+    def _rule_path(self, item, layout, room):
+        for path_line in self._critical_paths:
+            if item.polygon.intersects(path_line):
+                self._nudge_item(item, path_line)
+
+    def mark_dirty(self, *items) -> None:
+        """显式标记家具为脏（位姿以外的属性变化时使用；位姿变化会自动检测）"""
+        self._marked.update(item.id for item in items)
+
+    def reset_incremental(self) -> None:
+        """丢弃位姿缓存，下次 apply_rules_incremental 会全量执行"""
+        self._poses = {}
+        self._marked.clear()
+        self._pending = []
+        self._index = LayoutIndex()
+        self._indexed = {}
+
+    def _collect_dirty(self, layout) -> list:
+        """
+        与缓存位姿比较：新增/移动/被移除/被标记的家具 → 脏区域列表（移动前后两处都算）；
+        同时把这些变化同步到共享索引（新增/替换的对象加入分桶，移动的类型重建 KD 树）
+        """
+        poses, dirty = {}, []
+        index, indexed = self._index, self._indexed
+        for item in layout:
+            if indexed.get(item.id) is not item:
+                if item.id in indexed:
+                    index.remove(indexed[item.id])  # 同 id 的新对象（如调用方传入副本）
+                index.add(item)
+                indexed[item.id] = item
+            pose = _pose(item)
+            old = self._poses.get(item.id)
+            moved = old is not None and _moved(old[1], pose)
+            if old is None or moved or item.id in self._marked:
+                item.set_position(item.x, item.y)  # 直接改 x/y 的规则不会刷新多边形
+                index.invalidate(item.type)
+                dirty.append(_disc(item.id, item.type, pose))
+                if moved:
+                    dirty.append(_disc(item.id, *old))
+                poses[item.id] = (item.type, pose)
+            else:
+                poses[item.id] = old  # 保留缓存位姿，微小抖动不会累积
+        for item_id, old in self._poses.items():
+            if item_id not in poses:
+                dirty.append(_disc(item_id, *old))
+                index.remove(indexed.pop(item_id))
+        self._poses = poses
+        self._marked.clear()
+        return dirty
+
+    def _affected(self, layout, dirty) -> list:
+        """输入与脏集相交的 (家具, 规则)，按家具顺序、规则顺序排列"""
+        dirty_ids = {d[0] for d in dirty}
+        dirty_types = {d[1] for d in dirty}
+        d = np.array([d[2:] for d in dirty])
+        discs = np.array([_disc(None, item.type, _pose(item))[2:] for item in layout]).reshape(-1, 3)
+        # 每件家具外接圆到最近脏区域外接圆的间隙
+        gap = (np.hypot(discs[:, None, 0] - d[:, 0], discs[:, None, 1] - d[:, 1]) - d[:, 2]).min(axis=1) - discs[:, 2]
+        work = []
+        for item, item_gap in zip(layout, gap):
+            is_dirty = item.id in dirty_ids
+            for rule in self._rules_by_type.get(item.type, ()):
+                if is_dirty or (rule.reads & dirty_types) or (rule.radius >= 0 and item_gap <= rule.radius):
+                    work.append((item, rule))
+        return work
+
+    def apply_rules_incremental(self, layout: List[Furniture], room: Room,
+                                max_passes: int = INCREMENTAL_MAX_PASSES) -> List[Furniture]:
+        """
+        增量执行单件家具规则（原地修改 layout）：相对上次调用新增/移动/移除的家具构成脏集，
+        只重新评估锚定家具、读取类型或空间邻域与脏集相交的规则；规则造成的移动进入下一轮脏集，
+        直到不再产生变化（不动点）或达到 max_passes。
+        单次变动后的开销与受影响的家具数成正比，而不是整个布局。
+        与 apply_rules 不同：不执行 INCREMENTAL_EXCLUDED_RULES 中的软性规则，也没有整体评分的接受判断。
+        """
+        dirty = self._pending + self._collect_dirty(layout)
+        passes = evaluations = 0
+        logger = self.stats_logger if self.stats_logger.enabled else None
+        clock = time.perf_counter_ns
+        while dirty and passes < max_passes:
+            passes += 1
+            work = self._affected(layout, dirty)
+            evaluations += self._remove_collisions(work, layout, logger)
+            alive = {id(item) for item in layout}
+            for item, rule in work:
+                if rule.name == "collision_fix" or id(item) not in alive:
+                    continue  # 碰撞规则已批量执行 / 本轮已被碰撞规则移除
+                size, pose = len(layout), _pose(item)
+                if logger:
+                    before, start = layout_poses(layout), clock()
+                    rule.apply(item, layout, room)
+                    logger.record_time(rule.name, clock() - start, count_changed(before, layout))
+                else:
+                    rule.apply(item, layout, room)
+                if _moved(pose, _pose(item)):
+                    # 规则移动了 item 本身：刷新多边形并重建该类型的 KD 树（移动其他类型的规则自行 invalidate）
+                    item.set_position(item.x, item.y)
+                    self._index.invalidate(item.type)
+                if len(layout) != size:
+                    alive = {id(item) for item in layout}
+                evaluations += 1
+                self.rule_stats[rule.name] = self.rule_stats.get(rule.name, 0) + 1
+            dirty = self._collect_dirty(layout)
+        self._pending = dirty
+        self.last_incremental = {"passes": passes, "evaluations": evaluations, "converged": not dirty}
+        return layout
+
+    # ------------------------------------------------------------------ 批量修复
+    def violation_summary(self, layout: List[Furniture], room: Room,
+                          before: Optional[Dict[str, tuple]] = None) -> Dict[str, int]:
+        """
+        修复后仍存在的违规：相交的家具对、间距问题、被阻塞的关键路径；
+        给定修复前的位姿 before（id → 位姿）时附带被移除/被移动的家具数
+        """
+        polygons = [item.polygon for item in layout]
+        summary = {
+            "collisions": sum(polygons[i].intersects(polygons[j])
+                              for i in range(len(polygons)) for j in range(i + 1, len(polygons))),
+            "clearance_issues": len(check_all_clearances(layout, room)),
+            "blocked_paths": sum(any(polygon.intersects(line) for polygon in polygons) for line in self._critical_paths),
+        }
+        if before is not None:
+            after = {item.id: _pose(item) for item in layout}
+            summary["removed"] = sum(item_id not in after for item_id in before)
+            summary["moved"] = sum(item_id in after and _moved(pose, after[item_id]) for item_id, pose in before.items())
+        return summary
+
+    def repair(self, candidate, room: Room, template: Optional[Sequence[Furniture]] = None):
+        """
+        修复单个候选：candidate 为家具列表，或配合 template 使用的紧凑基因数组。
+        返回 (修复后的布局, 违规统计)
+        """
+        if isinstance(candidate, np.ndarray):
+            layout, inplace = decode_genome(candidate, template), True
+        else:
+            layout, inplace = candidate, False
+        before = {item.id: _pose(item) for item in layout}
+        repaired = self.apply_rules(layout, room, inplace=inplace)
+        return repaired, self.violation_summary(repaired, room, before)
+
+    def repair_pool(self, room: Room, workers: int, template: Optional[Sequence[Furniture]] = None):
+        """apply_rules_batch 可跨多代复用的进程池（房间与模板只在进程初始化时传输一次）"""
+        return multiprocessing.Pool(workers, initializer=_init_repair_worker,
+                                    initargs=(self.room_config, room, template))
+
+    def apply_rules_batch(self, candidates: Union[np.ndarray, Sequence], room: Room, workers: int = 0,
+                          template: Optional[Sequence[Furniture]] = None,
+                          chunksize: Optional[int] = None,
+                          pool=None) -> Tuple[List[List[Furniture]], List[Dict[str, int]]]:
+        """
+        批量修复一个种群：candidates 为布局列表，或 (P, 2n / 3n) 的基因矩阵（需要 template）。
+        workers <= 1 时复用本引擎逐个修复；否则用进程池，每个工作进程只构造一次引擎，
+        房间与模板在进程初始化时传输一次，之后每个候选只传基因行。
+        pool 为 repair_pool 返回的进程池时直接复用（同一房间与模板的多代种群，workers 只用于计算 chunksize）。
+        返回 (修复后的布局列表, 每个布局的违规统计)
+        """
+        if isinstance(candidates, np.ndarray):
+            if template is None:
+                raise ValueError("Genome arrays need a furniture template to decode")
+            candidates = list(candidates)
+        chunksize = chunksize or max(1, len(candidates) // (4 * max(1, workers)))
+        if pool is not None:
+            results = pool.map(_repair_candidate, candidates, chunksize=chunksize)
+        elif workers <= 1:
+            results = [self.repair(candidate, room, template) for candidate in candidates]
+        else:
+            with self.repair_pool(room, workers, template) as pool:
+                results = pool.map(_repair_candidate, candidates, chunksize=chunksize)
+        return [layout for layout, _ in results], [summary for _, summary in results]
+
 def validate_placement(self, room, furniture, position, orientation):
     """
     Modified to be more lenient by making some rules optional
@@ -1,10 +1,46 @@
+import csv
+import json
+import os
 from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+STATS_ENV_VAR = "FURNITURE_RULE_STATS"  # 设为 1/true/on 时开启耗时与改动数统计
+HIST_BUCKETS = 40  # 流式直方图：第 k 桶统计耗时位于 [2^(k-1), 2^k) ns 的调用次数
+
+
+def stats_enabled_from_env() -> bool:
+    return os.environ.get(STATS_ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def layout_poses(layout: Iterable) -> Dict[str, tuple]:
+    """id → (x, y, rotation)，用于统计规则改动了多少件家具"""
+    return {item.id: (item.x, item.y, item.rotation) for item in layout}
+
+
+def count_changed(before: Dict[str, tuple], layout: Iterable) -> int:
+    """相对 before 被移动、旋转、移除或新增的家具数"""
+    after = layout_poses(layout)
+    changed = sum(item_id not in after or after[item_id] != pose for item_id, pose in before.items())
+    return changed + sum(item_id not in before for item_id in after)
+
 
 class RuleStatsLogger:
-    def __init__(self):
+    """
+    规则/奖励项统计：调用与成功次数、奖励累计（始终记录），
+    以及每条规则/奖励项的单调 ns 耗时、log2 流式直方图和改动家具数（enabled 时记录）。
+    enabled 缺省由环境变量 FURNITURE_RULE_STATS 决定；关闭时 record_time 立即返回。
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = stats_enabled_from_env() if enabled is None else enabled
         self.rule_calls = defaultdict(int)
         self.rule_success = defaultdict(int)
         self.rule_rewards = defaultdict(float)
+        self.rule_time_ns = defaultdict(int)
+        self.rule_timed = defaultdict(int)
+        self.rule_max_ns = defaultdict(int)
+        self.rule_hist = defaultdict(lambda: [0] * HIST_BUCKETS)
+        self.items_changed = defaultdict(int)
 
     def record_call(self, rule_name: str):
         self.rule_calls[rule_name] += 1
@@ -15,11 +51,80 @@ class RuleStatsLogger:
     def record_reward(self, rule_name: str, reward: float):
         self.rule_rewards[rule_name] += reward
 
+    def record_time(self, rule_name: str, elapsed_ns: int, changed: int = 0):
+        """记录一次执行的耗时（time.perf_counter_ns 差值）与改动的家具数"""
+        if not self.enabled:
+            return
+        self.rule_time_ns[rule_name] += elapsed_ns
+        self.rule_timed[rule_name] += 1
+        if elapsed_ns > self.rule_max_ns[rule_name]:
+            self.rule_max_ns[rule_name] = elapsed_ns
+        self.rule_hist[rule_name][min(int(elapsed_ns).bit_length(), HIST_BUCKETS - 1)] += 1
+        if changed:
+            self.items_changed[rule_name] += changed
+
+    def percentile_ns(self, rule_name: str, q: float) -> float:
+        """由直方图估计的耗时分位数（取所在桶的上界，误差不超过 2 倍）"""
+        hist = self.rule_hist.get(rule_name)
+        total = self.rule_timed.get(rule_name, 0)
+        if not hist or not total:
+            return 0.0
+        target, seen = q * total, 0
+        for bucket, count in enumerate(hist):
+            seen += count
+            if count and seen >= target:
+                return float(min(1 << bucket, self.rule_max_ns[rule_name]))
+        return float(self.rule_max_ns[rule_name])
+
+    def rows(self) -> List[dict]:
+        """每条规则/奖励项一行，按累计耗时降序"""
+        names = set(self.rule_calls) | set(self.rule_success) | set(self.rule_rewards) | set(self.rule_timed)
+        rows = []
+        for name in names:
+            timed = self.rule_timed.get(name, 0)
+            total_ns = self.rule_time_ns.get(name, 0)
+            rows.append({
+                "rule": name,
+                "calls": self.rule_calls.get(name, 0),
+                "success": self.rule_success.get(name, 0),
+                "total_reward": self.rule_rewards.get(name, 0.0),
+                "timed": timed,
+                "total_ms": total_ns / 1e6,
+                "mean_us": total_ns / timed / 1e3 if timed else 0.0,
+                "p50_us": self.percentile_ns(name, 0.5) / 1e3,
+                "p99_us": self.percentile_ns(name, 0.99) / 1e3,
+                "max_us": self.rule_max_ns.get(name, 0) / 1e3,
+                "items_changed": self.items_changed.get(name, 0),
+            })
+        rows.sort(key=lambda row: (-row["total_ms"], row["rule"]))
+        return rows
+
+    def to_json(self, path: str):
+        data = {row["rule"]: dict(row, histogram=list(self.rule_hist.get(row["rule"], []))) for row in self.rows()}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def to_csv(self, path: str):
+        rows = self.rows()
+        if not rows:
+            open(path, "w").close()
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def reset(self):
+        self.__init__(self.enabled)
+
     def summarize(self):
         print("\n📊 Rule Stats Summary:")
-        for rule in self.rule_calls:
-            print(f"Rule: {rule}")
-            print(f"  Calls: {self.rule_calls[rule]}")
-            print(f"  Success: {self.rule_success[rule]}")
-            print(f"  Total Reward: {self.rule_rewards[rule]:.3f}")
+        for row in self.rows():
+            print(f"Rule: {row['rule']}")
+            print(f"  Calls: {row['calls']}")
+            print(f"  Success: {row['success']}")
+            print(f"  Total Reward: {row['total_reward']:.3f}")
+            if row["timed"]:
+                print(f"  Time: {row['total_ms']:.3f} ms total | p50 {row['p50_us']:.1f} µs | "
+                      f"p99 {row['p99_us']:.1f} µs | items changed {row['items_changed']}")
             print("-" * 30)
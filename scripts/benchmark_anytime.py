@@ -0,0 +1,83 @@
+# scripts/benchmark_anytime.py
+
+import argparse
+import csv
+import os
+from core.config_loader import ConfigLoader
+from core.room import Room
+from evaluation.scorer import RuleIntegratedScorer
+from optimization.anytime import Deadline
+from optimization.local_search import TryFailOptimizer, MultiObjectiveLocalSearch
+from optimization.simulated_annealing import SimulatedAnnealingOptimizer
+from optimization.parallel_tempering import ParallelTemperingOptimizer
+from scripts.run_parallel_tempering import build_initial_layout
+
+def build_optimizers(args):
+    """所有实现 optimize(layout, room, deadline=..., on_improvement=...) 的优化器"""
+    optimizers = {
+        "try_fail": lambda: TryFailOptimizer(max_attempts=10 ** 6),
+        "annealing": lambda: SimulatedAnnealingOptimizer(steps=10 ** 8, seed=args.seed),
+        "parallel_tempering": lambda: ParallelTemperingOptimizer(exchanges=10 ** 6, seed=args.seed),
+        "cma_es": lambda: MultiObjectiveLocalSearch(
+            max_iterations=10 ** 6,
+            objective_weights={"comfort": 1.0, "space_utilization": 1.0, "aesthetics": 1.0},
+            seed=args.seed,
+        ),
+    }
+    return optimizers
+
+def run_one(name, factory, layout, room, scorer, budget):
+    """运行单个优化器，返回 [(秒, 统一评分下的历史最优)] 曲线"""
+    streamed = []
+    deadline = Deadline(budget)
+    best = factory().optimize(layout, room, deadline=deadline,
+                              on_improvement=lambda l, s, t: streamed.append((t, l)))
+    total = deadline.elapsed()
+    streamed.append((total, best))
+
+    # 评分放在计时之外，避免评分器开销计入优化器
+    curve, best_score = [], scorer.calculate_layout_score(layout)
+    curve.append((0.0, best_score))
+    for elapsed, candidate in streamed:
+        best_score = max(best_score, scorer.calculate_layout_score(candidate))
+        curve.append((elapsed, best_score))
+    return curve, total
+
+def score_at(curve, t):
+    """曲线在时刻 t 的历史最优分数"""
+    return max(score for elapsed, score in curve if elapsed <= t)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score-vs-time benchmark for anytime optimizers")
+    parser.add_argument("--budget", type=float, default=2.0, help="wall-clock seconds per optimizer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="output/anytime_benchmark.csv")
+    args = parser.parse_args()
+
+    room_config = ConfigLoader.get_room_config()
+    room = Room(room_config["room_width"], room_config["room_height"], room_config)
+    scorer = RuleIntegratedScorer(room_config)
+    layout = build_initial_layout(room, args.seed)
+    checkpoints = [args.budget * f for f in (0.1, 0.25, 0.5, 1.0)]
+
+    rows = []
+    print(f"⏱️ Budget: {args.budget:.2f}s | initial score: {scorer.calculate_layout_score(layout):.2f}")
+    print("optimizer".ljust(20) + "".join(f"@{t:.2f}s".rjust(10) for t in checkpoints) + "  wall".rjust(8))
+    for name, factory in build_optimizers(args).items():
+        try:
+            curve, total = run_one(name, factory, layout, room, scorer, args.budget)
+        except Exception as e:
+            print(f"⚠️ {name} skipped: {e}")
+            continue
+        print(name.ljust(20) + "".join(f"{score_at(curve, t):10.2f}" for t in checkpoints) + f"{total:8.2f}")
+        rows.extend((name, f"{elapsed:.4f}", f"{score:.4f}") for elapsed, score in curve)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["optimizer", "seconds", "best_score"])
+        writer.writerows(rows)
+    print(f"✅ Score-vs-time curves saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
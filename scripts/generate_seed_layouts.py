@@ -0,0 +1,85 @@
+# scripts/generate_seed_layouts.py
+
+import argparse
+import json
+import os
+import time
+import torch
+from env.vector_env import VectorFurniturePlacementEnv
+from model.ppo_agent import FurniturePPOAgent, ScriptedPolicy
+from model.inference_server import get_policy
+
+def load_inference_policy(model_path: str, state_dim: int, action_dim: int,
+                          deterministic: bool = True, export_path: str = None):
+    """
+    返回提供 act_batch 的策略（FurniturePPOAgent / ScriptedPolicy / PolicyClient，见 get_policy）；
+    给定 export_path 时顺便把本地模型导出为 TorchScript 推理图，确定性推理时改用导出的推理图
+    """
+    policy = get_policy(model_path, state_dim, action_dim)
+    if export_path and isinstance(policy, FurniturePPOAgent):
+        traced = policy.export_torchscript(export_path)
+        print(f"📦 TorchScript policy exported to {export_path}")
+        if deterministic:
+            policy = ScriptedPolicy(traced)
+    return policy
+
+def generate(policy, num_layouts: int, num_envs: int, seed: int = 0, action_mode: str = "snap",
+             deterministic: bool = True):
+    """向量化环境中批量推理，直到收集到 num_layouts 个完整布局"""
+    env = VectorFurniturePlacementEnv(
+        num_envs,
+        room_config_path="configs/room_config.json",
+        furniture_config_path="configs/furniture_rules.json",
+        reward_config_path="configs/reward_config.yaml",
+        seed=seed,
+        record_layouts=True,
+        action_mode=action_mode,
+    )
+    layouts, returns = [], []
+    state = torch.as_tensor(env.reset())
+    with torch.inference_mode():
+        while len(layouts) < num_layouts:
+            actions = policy.act_batch(state, deterministic=deterministic)[0]
+            next_state, _, _, info = env.step(actions)
+            if "final_layouts" in info:
+                layouts.extend(info["final_layouts"])
+                returns.extend(info["episode_return"].tolist())
+            state = torch.as_tensor(next_state)
+    return layouts[:num_layouts], returns[:num_layouts]
+
+def layout_to_json(layout):
+    return [
+        {"type": f.type.value, "x": f.x, "y": f.y, "width": f.width, "height": f.height, "rotation": f.rotation}
+        for f in layout
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched PPO inference for GA seed layouts")
+    parser.add_argument("--model", default="models/final_ppo.pth", help=".pth state_dict or TorchScript .pt")
+    parser.add_argument("--num_layouts", type=int, default=1000)
+    parser.add_argument("--num_envs", type=int, default=256, help="rooms evaluated per policy forward")
+    parser.add_argument("--stochastic", action="store_true", help="sample actions instead of the policy mean")
+    parser.add_argument("--export", default=None, help="also export the policy to this TorchScript path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="output/ppo_seed_layouts.json")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)  # CPU 节点上每个进程单线程，多进程横向扩展
+    probe = VectorFurniturePlacementEnv(1, "configs/room_config.json", "configs/furniture_rules.json")
+    policy = load_inference_policy(args.model, probe.observation_dim, probe.action_dim,
+                                   deterministic=not args.stochastic, export_path=args.export)
+
+    start = time.perf_counter()
+    layouts, returns = generate(policy, args.num_layouts, args.num_envs, args.seed,
+                                deterministic=not args.stochastic)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(layouts)} layouts in {elapsed:.2f}s ({len(layouts) / elapsed * 60:,.0f} layouts/min) | "
+          f"mean return {sum(returns) / max(len(returns), 1):.2f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump([layout_to_json(layout) for layout in layouts], f)
+    print(f"💾 Seed layouts saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
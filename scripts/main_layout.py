@@ -3,7 +3,7 @@ import torch
 from core.config_loader import ConfigLoader
 from generation.wfc_generator import WFCGenerator
 from env.layout_env import FurniturePlacementEnv
-from model.ppo_agent import FurniturePPOAgent
+from model.inference_server import get_policy
 from visualization.layout_plot import plot_layout
 
 ROOM_PATH = "configs/room_config.json"
@@ -16,7 +16,7 @@ def main():
 
     # 1. 加载配置并生成初始布局（WFC）
     room_config = ConfigLoader.get_room_config()
-    furniture_config = ConfigLoader.get_furniture_config()
+    furniture_specs = ConfigLoader.furniture_specs()
     room = ConfigLoader.get_room_config()
     furniture_list = WFCGenerator(room).generate()
 
@@ -27,16 +27,16 @@ def main():
     # 3. 加载 PPO Agent
     state_dim = env.observation_space.shape[0]
     action_dim = env.action_space.shape[0]
-    agent = FurniturePPOAgent(state_dim=state_dim, action_dim=action_dim)
-    agent.load_state_dict(torch.load(MODEL_PATH))
-    agent.eval()
+    # 设置 FURNITURE_POLICY_SERVER 时复用推理服务中已加载的模型（接口与 agent.act 相同）
+    agent = get_policy(MODEL_PATH, state_dim, action_dim)
 
-    # 4. 推理优化动作
+    # 4. 推理优化动作（确定性均值动作；批量生成见 scripts/generate_seed_layouts.py）
     done = False
-    while not done:
-        state_tensor = torch.tensor(state, dtype=torch.float32)
-        action_vec, _ = agent.act(state_tensor)
-        state, _, done, _ = env.step(action_vec)
+    with torch.inference_mode():
+        while not done:
+            state_tensor = torch.tensor(state, dtype=torch.float32)
+            action_vec, _ = agent.act(state_tensor, deterministic=True)
+            state, _, done, _ = env.step(action_vec)
 
     # 5. 可视化保存
     plot_layout(env.furniture, room["width"], room["height"],
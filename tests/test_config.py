@@ -0,0 +1,66 @@
+import json
+import os
+import pytest
+from core.config_loader import ConfigLoader, ConfigRegistry, compile_furniture_specs, load_furniture_config, load_room_config
+from core.furniture import FurnitureType
+from core.layout_state import TYPE_INDEX
+
+
+def _write(path, data, mtime):
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_config_registry_parses_once_and_hot_reloads(tmp_path):
+    """测试配置只解析一次，mtime 变化后自动重新解析"""
+    room_path = tmp_path / "room.json"
+    _write(room_path, {"room_width": 5, "room_height": 4, "doors": [[1, 0, 1, 0.2]]}, 1_000_000_000)
+
+    first = load_room_config(str(room_path))
+    assert load_room_config(str(room_path)) is first
+    assert ConfigRegistry.version(str(room_path)) == 0
+
+    _write(room_path, {"room_width": 6, "room_height": 4}, 2_000_000_000)
+    assert ConfigRegistry.version(str(room_path)) == 1
+    assert load_room_config(str(room_path)).width == 6
+
+
+def test_furniture_instances_are_independent_of_templates(tmp_path):
+    """测试每次 reset 得到的家具是模板的独立副本"""
+    path = tmp_path / "furniture.json"
+    _write(path, {"bed": {"default_size": [3, 4]}, "chair": {"default_size": [1, 1]}}, 1_000_000_000)
+
+    first = load_furniture_config(str(path))
+    first[0].set_position(2, 2)
+    first[0].must_near.append("x")
+    second = load_furniture_config(str(path))
+
+    assert (second[0].x, second[0].y, second[0].must_near) == (0.0, 0.0, [])
+    assert second[0].polygon.bounds == (0.0, 0.0, 3.0, 4.0)
+    assert first[0].id != second[0].id
+
+
+def test_furniture_specs_are_compiled_and_immutable():
+    """测试家具配置编译为只读 spec：must_near 为枚举、派生字段预先计算、重复调用不再修改"""
+    specs = ConfigLoader.furniture_specs()
+    bed = ConfigLoader.get_furniture_spec(FurnitureType.BED)
+    assert ConfigLoader.furniture_specs() is specs
+    assert bed.must_near is FurnitureType.WARDROBE
+    assert bed.default_size == (3.0, 4.0) and (bed.snapped_width, bed.snapped_height) == (1.0, 1.0)
+    assert bed.type_id == TYPE_INDEX[FurnitureType.BED]
+    assert bed.get("min_door_distance") == 1.5 and bed.get("margin", 2.0) == 2.0
+    assert ConfigLoader.get_furniture_spec(FurnitureType.NIGHTSTAND) is None
+    with pytest.raises(AttributeError):
+        bed.clearance = 0.0
+    with pytest.raises(TypeError):
+        bed.extras["clearance"] = 0.0
+
+
+def test_furniture_spec_validation():
+    """测试非法配置在编译时报错"""
+    with pytest.raises(ValueError):
+        compile_furniture_specs({"bed": {"clearance": 1.0}})
+    with pytest.raises(ValueError):
+        compile_furniture_specs({"bed": {"default_size": [0, 2]}})
+    with pytest.raises(ValueError):
+        compile_furniture_specs({"lamp": {"default_size": [1, 1]}})
@@ -0,0 +1,214 @@
+import numpy as np
+import pytest
+from env.vector_env import VectorFurniturePlacementEnv
+
+ROOM = "configs/room_config.json"
+FURNITURE = "configs/furniture_rules.json"
+REWARD = "configs/reward_config.yaml"
+
+
+def test_vector_env_auto_resets_finished_episodes():
+    """测试向量化环境一次推进全部房间，并在回合结束时自动重置"""
+    env = VectorFurniturePlacementEnv(8, ROOM, FURNITURE, REWARD, seed=0)
+    env.set_max_furniture(3)
+    obs = env.reset()
+    assert obs.shape == (8, env.observation_dim) and obs.dtype == np.float32
+
+    rng = np.random.default_rng(0)
+    total = np.zeros(8)
+    for step in range(3):
+        obs, rewards, dones, infos = env.step(rng.random((8, 3)))
+        total += rewards
+        assert rewards.shape == (8,)
+        assert dones.all() == (step == 2)
+
+    assert infos["episode_return"] == pytest.approx(total)
+    assert (env.idx == 0).all()
+    placed_rows = obs.reshape(8, 12, -1)[:, :-1]
+    assert placed_rows.sum() == 0  # 已放置区域被清空
+
+
+def test_vector_env_clearance_penalizes_overlap():
+    """测试两件家具重叠放置时 clearance 奖励为 0，分开放置时为正"""
+    env = VectorFurniturePlacementEnv(2, ROOM, FURNITURE, REWARD, seed=0)
+    env.reset()
+    env.step(np.array([[0.4, 0.4, 0.0], [0.4, 0.4, 0.0]]))
+    # 第二件家具：环境 0 与第一件重合，环境 1 放在远处的角落
+    env.x[:, 1] = [env.x[0, 0], 0.0]
+    env.y[:, 1] = [env.y[0, 0], 0.0]
+    terms = env.reward_terms(env.idx)
+
+    assert terms["clearance"][0] == 0.0
+    assert terms["clearance"][1] > 0.0
+
+
+def test_subproc_vector_env_matches_in_process_env():
+    """测试共享内存多进程环境与单进程向量化环境逐步结果一致"""
+    from env.subproc_vector_env import SubprocVectorEnv
+
+    reference = VectorFurniturePlacementEnv(6, ROOM, FURNITURE, REWARD, seed=3)
+    rng = np.random.default_rng(0)
+    with SubprocVectorEnv(6, ROOM, FURNITURE, REWARD, num_workers=1, seed=3) as env:
+        assert np.array_equal(env.reset(), reference.reset())
+        for _ in range(12):
+            actions = rng.random((6, 3))
+            obs, rewards, dones, infos = env.step(actions)
+            ref_obs, ref_rewards, ref_dones, ref_infos = reference.step(actions)
+            assert np.array_equal(obs, ref_obs)
+            assert np.allclose(rewards, ref_rewards)
+            assert np.array_equal(dones, ref_dones)
+            if dones.any():
+                assert np.allclose(infos["episode_return"], ref_infos["episode_return"])
+
+
+
+def test_subproc_vector_env_close_survives_dead_worker():
+    """测试工作进程已退出时 close 不抛异常，并释放共享内存"""
+    from multiprocessing import shared_memory
+    from env.subproc_vector_env import SubprocVectorEnv
+
+    env = SubprocVectorEnv(4, ROOM, FURNITURE, REWARD, num_workers=2, seed=0)
+    env.reset()
+    names = [shm.name for shm in env._shm.values()]
+    env.procs[0].kill()
+    env.procs[0].join()
+    env.close()
+
+    assert env.closed and not any(proc.is_alive() for proc in env.procs)
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_layout_encoder_incremental_matches_full_encode():
+    """测试逐行增量编码与全量编码一致，且类型 one-hot 被正确设置"""
+    from core.config_loader import load_room_config, load_furniture_config
+    from core.layout_state import LayoutEncoder, TYPE_INDEX, encode_layout_state
+
+    room = load_room_config(ROOM)
+    furniture = load_furniture_config(FURNITURE)
+    encoder = LayoutEncoder(room.width, room.height)
+    encoder.encode(furniture, 0)
+    for i, item in enumerate(furniture[:4]):
+        item.x, item.y, item.rotation = i + 0.5, i * 2.0, 90 * i
+        encoder.update_placed(i, item)
+        encoder.set_current(furniture[i + 1])
+
+    expected = encode_layout_state(room, furniture, 4)
+    assert np.array_equal(encoder.observation, expected)
+    rows = expected.reshape(12, -1)
+    assert rows[0, 5 + TYPE_INDEX[furniture[0].type]] == 1.0
+    assert rows[-1, 5:].sum() == 1.0
+
+
+def test_rasterizer_draws_furniture_and_vector_render_matches_layout():
+    """测试光栅化图像中家具位置着色，且向量环境渲染与 Furniture 列表渲染一致"""
+    from core.furniture import Furniture, FurnitureType
+    from core.layout_state import TYPE_INDEX
+    from utils.rasterizer import FLOOR_COLOR, PALETTE, LayoutRasterizer
+
+    raster = LayoutRasterizer(4, 3, pixels_per_meter=10, wall_px=2)
+    img = raster.render([Furniture(1, 1, 2, 1, FurnitureType.BED, rotation=90)])
+    assert img.shape == (34, 44, 3) and img.dtype == np.uint8
+    # 旋转 90° 后占据 x∈[1.5, 2.5], y∈[0.5, 2.5]
+    assert (img[34 - 2 - 15, 2 + 20] == PALETTE[TYPE_INDEX[FurnitureType.BED]]).all()
+    assert (img[34 - 2 - 15, 2 + 12] == FLOOR_COLOR).all()
+
+    env = VectorFurniturePlacementEnv(2, ROOM, FURNITURE, seed=0)
+    env.reset()
+    for _ in range(3):
+        env.step(np.random.default_rng(0).random((2, 3)))
+    frame = env.render(mode="rgb_array", env=1)
+    assert (frame == env.rasterizer.render(env.get_layout(1))).all()
+
+
+def test_frame_writer_streams_gif_and_counts_drops(tmp_path):
+    """测试后台写入线程逐帧写出 GIF，队列满时丢帧并计数"""
+    import imageio
+    from utils.frame_writer import FrameWriter
+
+    frames = [np.full((8, 12, 3), 40 * i, dtype=np.uint8) for i in range(5)]
+    path = str(tmp_path / "run.gif")
+    with FrameWriter(path, max_queue=2, drop_when_full=False) as writer:
+        for frame in frames:
+            writer.write(frame)
+    assert writer.written == 5 and writer.dropped == 0
+    decoded = imageio.v2.mimread(path)
+    assert len(decoded) == 5
+    assert all((d[..., :3] == f).all() for d, f in zip(decoded, frames))
+
+    dropping = FrameWriter(str(tmp_path / "drop.gif"), max_queue=1)
+    dropping._queue.put(frames[0])  # 人为占满队列（后台线程可能已取走，最多再入队一帧）
+    results = [dropping.write(frame) for frame in frames]
+    dropping.close()
+    assert dropping.dropped == results.count(False)
+    assert dropping.written + dropping.dropped == len(frames) + 1
+
+
+def test_snap_action_mode_places_items_in_feasible_region():
+    """测试 snap 动作模式把家具放进可行域：不越界、满足间距、不挡门"""
+    env = VectorFurniturePlacementEnv(16, ROOM, FURNITURE, seed=0, action_mode="snap")
+    env.reset()
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        actions = rng.random((16, 3))
+        actions[:, 2] = 0.0
+        feasible = env.feasibility_mask().reshape(16, -1).any(axis=1)
+        env.step(actions)
+        terms = env.reward_terms(env.idx - 1)
+        assert (terms["clearance"][feasible] == 1.0).all()
+        assert (terms["path"][feasible] > 0.0).all()
+
+
+def test_reward_engine_matches_vector_env_and_keeps_stats_per_instance():
+    """测试单环境的增量奖励引擎与向量环境逐步奖励一致，且统计按实例隔离"""
+    from core.config_loader import load_furniture_config, load_room_config
+    from core.layout_state import TYPE_INDEX
+    from env.reward_function import compute_total_reward
+
+    room = load_room_config(ROOM)
+    items = load_furniture_config(FURNITURE)[:5]
+    engine, other = compute_total_reward(REWARD), compute_total_reward(REWARD)
+
+    env = VectorFurniturePlacementEnv(1, ROOM, FURNITURE, REWARD, seed=0)
+    env.n_items[0], env.idx[0] = len(items), 0
+    for slot, f in enumerate(items):
+        env.w[0, slot], env.h[0, slot], env.tid[0, slot] = f.width, f.height, TYPE_INDEX[f.type]
+
+    rng = np.random.default_rng(3)
+    for f in items:
+        action = rng.random(3)
+        f.set_position(action[0] * room.width, action[1] * room.height)
+        f.rotation = int(action[2] * 4) * 90
+        expected = env.step(action[None])[1][0]
+        assert engine(room, items, f) == pytest.approx(expected)
+    assert sum(engine.logger.rule_rewards.values()) > 0
+    assert not other.logger.rule_rewards
+
+
+def test_scalar_and_vector_env_decode_rotation_identically():
+    """测试标量环境与向量环境对动作第三维 ∈ [0, 1] 的朝向解码一致"""
+    from env.layout_env import FurniturePlacementEnv
+
+    scalar = FurniturePlacementEnv(ROOM, FURNITURE, REWARD)
+    vector = VectorFurniturePlacementEnv(1, ROOM, FURNITURE, seed=0)
+    assert scalar.action_space.high[2] == 1.0
+    for a in (0.0, 0.24, 0.25, 0.6, 0.99, 1.0):
+        scalar.reset()
+        vector.reset()
+        scalar.step(np.array([0.2, 0.2, a]))
+        vector.step(np.array([[0.2, 0.2, a]]))
+        assert scalar.furniture[0].rotation == vector.rot[0, 0] * 90
+
+
+def test_scalar_env_reuses_encoder_across_resets():
+    """测试标量环境跨回合复用编码器缓冲区，reset 时原地重新编码"""
+    from core.layout_state import encode_layout_state
+    from env.layout_env import FurniturePlacementEnv
+
+    env = FurniturePlacementEnv(ROOM, FURNITURE, REWARD)
+    encoder, buffer = env.encoder, env.encoder.buffer
+    env.step(np.array([0.3, 0.3, 0.0]))
+    obs = env.reset()
+    assert env.encoder is encoder and env.encoder.buffer is buffer
+    assert np.array_equal(obs, encode_layout_state(env.room, env.furniture, 0))
@@ -0,0 +1,252 @@
+import copy
+import random
+import pytest
+from core.room import Room
+from core.furniture import Furniture, FurnitureType
+from optimization import local_search, parallel_tempering
+from optimization.local_search import TryFailOptimizer
+from optimization.move_log import MoveLog
+from optimization.parallel_tempering import ParallelTemperingOptimizer
+from optimization.simulated_annealing import AnnealingState, LayoutEnergy, MoveGenerator, SimulatedAnnealingOptimizer, anneal
+
+
+def _make_layout():
+    return [
+        Furniture(1, 1, 3, 4, FurnitureType.BED),
+        Furniture(8, 1, 2, 3, FurnitureType.WARDROBE),
+        Furniture(6, 8, 2, 2, FurnitureType.TABLE),
+    ]
+
+
+def test_move_log_rollback_restores_positions():
+    """测试撤销日志按逆序恢复位置与朝向"""
+    bed = Furniture(1, 1, 3, 4, FurnitureType.BED)
+    log = MoveLog()
+    log.begin()
+    log.move(bed, 5, 5)
+    log.rotate(bed, 90)
+    log.move(bed, 6, 6)
+    assert log.touched() == [bed]
+    log.rollback()
+    assert (bed.x, bed.y, bed.rotation) == (1, 1, 0)
+    assert bed.polygon.bounds == (1.0, 1.0, 4.0, 5.0)
+    assert len(log) == 0
+
+
+def test_try_fail_optimizer_copies_layout_once(monkeypatch):
+    """测试局部搜索只复制一次布局，并回滚被拒绝的移动"""
+    room = Room(15, 12)
+    layout = _make_layout()
+    wardrobe_id = layout[1].id
+
+    # 始终建议把衣柜移到与床重叠的位置 → 每次都应被拒绝并回滚
+    monkeypatch.setattr(
+        local_search.RuleEvaluator, "get_optimization_hints",
+        staticmethod(lambda _layout: {wardrobe_id: {"suggested_x": 2, "suggested_y": 2, "delta_score": 1.0}})
+    )
+    copies = []
+    real_deepcopy = copy.deepcopy
+    monkeypatch.setattr(local_search.copy, "deepcopy", lambda obj, *a: copies.append(1) or real_deepcopy(obj, *a))
+
+    result = TryFailOptimizer(max_attempts=100).optimize(layout, room)
+
+    assert len(copies) == 1
+    moved = next(item for item in result if item.id == wardrobe_id)
+    assert (moved.x, moved.y) == (8, 1)
+
+
+def test_try_fail_optimizer_accepts_improving_move(monkeypatch):
+    """测试合法且提升评分的移动被保留"""
+    room = Room(15, 12)
+    layout = _make_layout()
+    table_id = layout[2].id
+
+    monkeypatch.setattr(
+        local_search.RuleEvaluator, "get_optimization_hints",
+        staticmethod(lambda _layout: {table_id: {"suggested_x": 10, "suggested_y": 8, "delta_score": 1.0}})
+    )
+    monkeypatch.setattr(
+        local_search.RuleEvaluator, "evaluate",
+        staticmethod(lambda _layout, _room: next(i.x for i in _layout if i.id == table_id))
+    )
+
+    result = TryFailOptimizer(max_attempts=5).optimize(layout, room)
+    moved = next(item for item in result if item.id == table_id)
+    assert (moved.x, moved.y) == (10, 8)
+    assert (layout[2].x, layout[2].y) == (6, 8)
+
+
+
+def test_try_fail_optimizer_follows_real_hints():
+    """测试不打补丁时局部搜索按椅子→桌子的建议移动，至少接受一次移动且不修改输入"""
+    from evaluation.layout_metrics import RuleEvaluator
+
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)]})
+    # 椅子挡在门口；桌子很窄，建议位置 (x + 0.8, y) 满足椅子与桌子的最小间距
+    layout = [Furniture(6.5, 0.5, 0.5, 0.5, FurnitureType.CHAIR), Furniture(2, 6, 0.04, 1.5, FurnitureType.TABLE)]
+    assert RuleEvaluator.get_optimization_hints(layout) == {"item_0": {"suggested_x": 2.8, "suggested_y": 6}}
+
+    optimizer = TryFailOptimizer(max_attempts=5)
+    result = optimizer.optimize(layout, room)
+
+    assert (result[0].x, result[0].y) == (2.8, 6)
+    assert [score for _, score in optimizer.last_history] == [0.0, 5.0]
+    assert (layout[0].x, layout[0].y) == (6.5, 0.5)
+
+
+def test_annealing_incremental_energy_matches_full_recompute():
+    """测试退火增量能量与全量重算一致，且结果不劣于初始布局"""
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)]})
+    layout = _make_layout() + [Furniture(6.5, 8.5, 1, 1, FurnitureType.CHAIR),
+                               Furniture(2, 2, 1, 1, FurnitureType.CHAIR)]
+    state = AnnealingState.from_layout(layout, LayoutEnergy.from_room(room))
+    initial = state.total
+
+    stats = anneal(state, steps=3000, rng=random.Random(0))
+
+    assert stats["best_energy"] <= initial
+    assert state.total == pytest.approx(state.recompute())
+    assert state.total == pytest.approx(stats["best_energy"])
+
+
+def test_annealing_swap_keeps_each_item_footprint():
+    """测试 2×1 与 1×2 家具交换位置时各自转 90°，占地与对方原来一致，同朝向的同尺寸家具不改变朝向"""
+    room = Room(15, 12)
+    layout = [Furniture(1, 1, 2, 1, FurnitureType.DESK), Furniture(6, 6, 1, 2, FurnitureType.BOOKSHELF),
+              Furniture(10, 2, 2, 1, FurnitureType.TV_STAND, rotation=90)]
+    state = AnnealingState.from_layout(layout, LayoutEnergy.from_room(room))
+    assert state.swap_groups == [[0, 1, 2]]
+    moves = MoveGenerator(state, random.Random(0), move_weights={"translate": 0, "rotate": 0, "snap": 0, "swap": 1})
+
+    seen = set()
+    for _ in range(50):
+        (a, _, _, rot_a), (b, _, _, rot_b) = moves.propose()
+        assert state.half_extents(a, rot_a) == state.half_extents(b, int(state.rot[b]))
+        assert state.half_extents(b, rot_b) == state.half_extents(a, int(state.rot[a]))
+        seen.add(frozenset((a, b)))
+        if {a, b} == {1, 2}:
+            assert (rot_a, rot_b) == (state.rot[a], state.rot[b])
+    assert len(seen) == 3
+
+
+def test_annealing_optimizer_returns_copy_inside_room():
+    """测试退火优化器返回房间内的布局副本"""
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)]})
+    layout = _make_layout()
+    layout[0].x = 13  # 初始越界
+    result = SimulatedAnnealingOptimizer(steps=3000, seed=1).optimize(layout, room)
+
+    assert result is not layout and layout[0].x == 13
+    assert all(room.is_within_bounds(item) for item in result)
+
+
+def test_parallel_tempering_reports_swap_rates():
+    """测试副本交换返回最优布局与相邻温度交换接受率"""
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)], "room_width": 15, "room_height": 12})
+    pt = ParallelTemperingOptimizer(num_replicas=3, exchanges=4, steps_per_exchange=5, max_workers=2, seed=0)
+    result = pt.optimize(_make_layout(), room)
+
+    assert len(result) == 3
+    assert pt.last_stats["temperatures"] == pytest.approx(sorted(pt.last_stats["temperatures"]))
+    assert len(pt.last_stats["swap_acceptance"]) == 2
+    assert all(0.0 <= rate <= 1.0 for rate in pt.last_stats["swap_acceptance"])
+
+
+def _dead_replica_worker(conn, *args):
+    conn.close()
+
+
+def test_parallel_tempering_raises_when_worker_dies(monkeypatch):
+    """测试工作进程异常退出时抛出错误而不是阻塞"""
+    monkeypatch.setattr(parallel_tempering, "_replica_worker", _dead_replica_worker)
+    room = Room(15, 12, {"room_width": 15, "room_height": 12})
+    pt = ParallelTemperingOptimizer(num_replicas=2, exchanges=2, steps_per_exchange=2, max_workers=2, seed=0)
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        pt.optimize(_make_layout(), room)
+
+
+def test_sep_cma_es_respects_bounds():
+    """测试 sep-CMA-ES 整体采样种群、裁剪到边界并收敛到边界上的最优解"""
+    import numpy as np
+    from optimization.cma_es import SepCMAES
+
+    es = SepCMAES(np.zeros(6), 0.3, lower=-np.ones(6), upper=np.ones(6), seed=0)
+    for _ in range(150):
+        population = es.ask()
+        assert population.shape == (es.lam, 6)
+        assert np.all(population >= -1) and np.all(population <= 1)
+        es.tell(np.sum((population - 2.0) ** 2, axis=1))
+
+    assert es.best_x == pytest.approx(np.ones(6), abs=1e-3)
+
+
+def test_multi_objective_local_search_stays_in_room():
+    """测试 CMA-ES 精修在时间预算内结束，且结果位于房间内、不修改输入"""
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)], "room_width": 15, "room_height": 12})
+    layout = [Furniture(8, 1, 2, 3, FurnitureType.WARDROBE), Furniture(3, 7, 1, 1, FurnitureType.CHAIR)]
+    search = local_search.MultiObjectiveLocalSearch(
+        max_iterations=1000, objective_weights={"comfort": 1.0, "space_utilization": 1.0, "aesthetics": 1.0},
+        time_budget=0.5, seed=0
+    )
+    result = search.refine(layout, room)
+
+    assert search.last_stats["seconds"] < 2.0
+    assert search.last_stats["evaluations"] >= search.last_stats["generations"]
+    assert (layout[0].x, layout[0].y) == (8, 1)
+    assert all(room.is_within_bounds(item) for item in result)
+
+
+
+def test_multi_objective_local_search_pool_matches_serial():
+    """测试精修按整代批量修复：进程池与串行结果一致"""
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)], "room_width": 15, "room_height": 12})
+    layout = [Furniture(8, 1, 2, 3, FurnitureType.WARDROBE), Furniture(3, 7, 1, 1, FurnitureType.CHAIR)]
+    weights = {"comfort": 1.0, "space_utilization": 1.0, "aesthetics": 1.0}
+    results = []
+    for workers in (0, 2):
+        search = local_search.MultiObjectiveLocalSearch(max_iterations=3, objective_weights=weights,
+                                                        max_workers=workers, seed=0)
+        results.append(([(f.x, f.y) for f in search.refine(layout, room)], search.last_stats["best_loss"]))
+    assert results[0] == results[1]
+
+
+def test_multi_objective_local_search_rebuilds_engine_per_room():
+    """测试同一精修器换房间时重建规则引擎，而不是沿用第一个房间的配置"""
+    weights = {"comfort": 1.0, "space_utilization": 1.0, "aesthetics": 1.0}
+    search = local_search.MultiObjectiveLocalSearch(max_iterations=2, objective_weights=weights, seed=0)
+    layout = [Furniture(3, 3, 1, 1, FurnitureType.CHAIR)]
+    small = Room(6, 6, {"room_width": 6, "room_height": 6})
+    large = Room(20, 16, {"room_width": 20, "room_height": 16})
+
+    search.refine(layout, small)
+    assert search._engine.room.width == 6
+    search.refine(layout, large)
+    assert search._engine.room.width == 20 and search._engine_room is large
+
+
+def test_anytime_annealing_stops_at_deadline_and_streams_improvements():
+    """测试 anytime 接口：到期即停止，回调分数单调递增且最后一次等于返回结果"""
+    from optimization.anytime import Deadline
+
+    room = Room(15, 12, {"doors": [(6, 0, 2, 1)]})
+    streamed = []
+    optimizer = SimulatedAnnealingOptimizer(steps=10 ** 8, seed=0)
+    deadline = Deadline(0.3)
+    result = optimizer.optimize(_make_layout(), room, deadline=deadline,
+                                on_improvement=lambda layout, score, t: streamed.append((score, t, layout)))
+
+    assert deadline.elapsed() < 1.0
+    assert optimizer.last_stats["steps"] < 10 ** 8
+    scores = [score for score, _, _ in streamed]
+    assert scores == sorted(scores) and len(set(scores)) == len(scores)
+    assert [(i.x, i.y) for i in streamed[-1][2]] == [(i.x, i.y) for i in result]
+
+
+def test_try_fail_optimizer_returns_immediately_when_deadline_expired():
+    """测试截止时间已过时局部搜索直接返回初始布局副本"""
+    room = Room(15, 12)
+    layout = _make_layout()
+    result = TryFailOptimizer(max_attempts=10 ** 6).optimize(layout, room, deadline=0.0)
+
+    assert result is not layout
+    assert [(i.x, i.y) for i in result] == [(i.x, i.y) for i in layout]
@@ -1,6 +1,20 @@
+import csv
+import json
+import math
+import pickle
+import random
 import pytest
+import numpy as np
 from typing import List, Optional
-import math
+from core.furniture import Furniture as F, FurnitureType as FT
+from generation.collision.relation_rules import get_compatibility, must_be_near, should_face
+from rules.layout_index import LayoutIndex
+from rules.nearest_neighbors import LINEAR_SCAN_MAX
+from rules.pair_tables import TYPE_INDEX, compile_pair_tables, type_ids
+from rules.position_rules import POSITION_RULES, RULE_HANDLERS, PositionRuleSet
+from rules.reward_components.clearance import MIN_PASSAGE_WIDTH, check_all_clearances, check_human_ergonomics
+from rules.rule_engine import INCREMENTAL_EXCLUDED_RULES, RuleEngine
+from rules.rule_stats_logger import STATS_ENV_VAR, RuleStatsLogger
 
 try:
     from core.room import Room
@@ -54,6 +68,15 @@ except ImportError:
             Furniture(type=FurnitureType.CHAIR, x=6.5, y=4, width=0.5, height=0.5, rotation=0)
         ]
 
+ENGINE_CONFIG = {"room_width": 20, "room_height": 20, "doors": [[9, 0, 2, 0.2]]}
+
+
+@pytest.fixture
+def engine():
+    """20×20 房间、底边一扇门的规则引擎（增量规则相关测试共用）"""
+    return RuleEngine(ENGINE_CONFIG)
+
+
 # Helper function to safely get polygon distance
 def safe_distance(item1, item2):
     """Safely calculate distance between two items, with fallback to center-to-center"""
@@ -124,3 +147,274 @@ def test_chair_table_proximity():
             for table in tables
         )
         assert min_distance <= 1.5, f"椅子{chair.id}距离桌子太远 (距离: {min_distance}米)"
+
+
+def test_pair_tables_match_rule_dicts():
+    """测试编译后的类型两两规则表与原始规则 dict 一致，且可按布局类型向量一次展开"""
+    tables = compile_pair_tables()
+    assert compile_pair_tables() is tables
+    for a in FT:
+        for b in FT:
+            i, j = TYPE_INDEX[a], TYPE_INDEX[b]
+            assert tables.compatibility[i, j] == get_compatibility(a, b)
+            assert tables.must_near[i, j] == must_be_near(a, b)
+            face = should_face(a, b)
+            assert tables.facing[i, j] == (face["threshold"] if face else 0)
+    assert tables.min_clear[TYPE_INDEX[FT.TABLE], TYPE_INDEX[FT.CHAIR]] == 0.75
+    with pytest.raises(ValueError):
+        tables.min_clear[0, 0] = 1.0
+
+    tid = type_ids([F(0, 0, 1, 1, FT.SOFA), F(2, 0, 1, 1, FT.COFFEE_TABLE), F(4, 0, 1, 1, FT.TV_STAND)])
+    bound = tables.bind(tid)
+    assert bound.must_near.shape == (3, 3) and bound.must_near[0, 1]
+    assert bound.facing[0, 2] == 30 and bound.compatibility[0, 2] == 1
+
+
+def test_position_rule_set_dispatch():
+    """测试定位规则按优先级编译为处理函数列表，可按规则名禁用并统计调用次数"""
+    order = []
+    handlers = {
+        "first": lambda item, layout: order.append("first"),
+        "second": lambda item, layout: order.append("second"),
+    }
+    rules = {FT.BED: [{"rule": "second", "priority": 1, "type": "soft"},
+                      {"rule": "first", "priority": 0, "type": "hard"}]}
+    rule_set = PositionRuleSet(rules, handlers)
+    layout = [F(0, 0, 2, 2, FT.BED), F(3, 3, 1, 1, FT.CHAIR)]
+
+    rule_set.apply(layout)
+    assert order == ["first", "second"]
+    assert rule_set.compiled[FT.BED][0].hard
+
+    rule_set.set_enabled("first", False)
+    rule_set.apply(layout)
+    assert order == ["first", "second", "second"]
+    assert rule_set.stats()["second"]["calls"] == 2 and rule_set.stats()["first"]["calls"] == 1
+
+    with pytest.raises(KeyError):
+        PositionRuleSet({FT.BED: [{"rule": "missing", "priority": 0}]}, handlers)
+    # 内置规则全部有注册的处理函数
+    assert {r["rule"] for entries in POSITION_RULES.values() for r in entries} <= set(RULE_HANDLERS)
+
+
+def test_incremental_rule_engine_only_reevaluates_dirty_items(engine):
+    """测试增量规则引擎：无变化时不执行规则，单件移动只重新评估受影响的规则"""
+    layout = [F(2, 2, 3, 4, FT.BED), F(6.5, 2, 2, 3, FT.WARDROBE), F(15, 15, 1, 2, FT.BOOKSHELF)]
+    engine.apply_rules_incremental(layout, None)
+    assert engine.last_incremental["converged"]
+    full = engine.last_incremental["evaluations"]
+
+    engine.apply_rules_incremental(layout, None)
+    assert engine.last_incremental == {"passes": 0, "evaluations": 0, "converged": True}
+
+    # 书架与其他家具无类型依赖且相距较远：只执行书架自身的规则
+    bookshelf = layout[2]
+    bookshelf.set_position(15.5, 15)
+    engine.apply_rules_incremental(layout, None)
+    assert 0 < engine.last_incremental["evaluations"] < full
+    assert engine.last_incremental["converged"]
+
+    # 衣柜移动会触发读取 WARDROBE 的床关联规则
+    relationships = engine.rule_stats["relationships"]
+    layout[1].set_position(6.8, 2)
+    engine.apply_rules_incremental(layout, None)
+    assert engine.rule_stats["relationships"] > relationships
+    assert len(layout) == 3
+
+
+def test_incremental_rule_engine_excludes_whole_layout_soft_rules(engine):
+    """测试增量模式不执行整体布局的软性规则（对齐、功能组合），其余规则均编译为单件家具规则"""
+    soft = {name for name, cfg in engine.rule_config.items() if cfg["type"] == "soft"}
+    assert INCREMENTAL_EXCLUDED_RULES == soft == {"functional_groups", "aesthetic_rules"}
+    names = {rule.name for rule in engine.local_rules}
+    assert not names & INCREMENTAL_EXCLUDED_RULES
+    assert {"collision_fix", "clearance", "door_clearance", "relationships", "path_optimization"} <= names
+
+    layout = [F(4, 4, 2, 1, FT.SOFA), F(4, 10, 1.5, 0.4, FT.TV_STAND)]
+    engine.apply_rules_incremental(layout, None)
+    assert engine.rule_stats and not set(engine.rule_stats) & INCREMENTAL_EXCLUDED_RULES
+
+
+def test_incremental_collision_fix_matches_hard_rules(engine):
+    """测试增量碰撞规则与 _apply_hard_rules 一致：相互重叠的家具全部移除"""
+    def make_layout():
+        return [F(2, 2, 1, 2, FT.BOOKSHELF), F(2.5, 2.5, 1, 2, FT.BOOKSHELF), F(10, 10, 1, 1, FT.CHAIR)]
+
+    hard = engine._apply_hard_rules(make_layout(), engine.room)
+    layout = make_layout()
+    engine.apply_rules_incremental(layout, None)
+    assert [f.type for f in layout] == [f.type for f in hard] == [FT.CHAIR]
+
+
+def test_incremental_engine_shares_layout_index(engine):
+    """测试增量模式共用一个布局索引：增删移动后分桶与布局一致，邻域查询与逐个比较外接圆一致"""
+    rng = random.Random(2)
+    layout = [F(rng.uniform(0, 18), rng.uniform(0, 18), 0.6, 0.6, rng.choice([FT.CHAIR, FT.DESK, FT.NIGHTSTAND]))
+              for _ in range(40)]
+    engine.apply_rules_incremental(layout, None)
+    layout[0].set_position(layout[0].x + 0.3, layout[0].y)
+    del layout[1]
+    layout.append(F(9, 9, 0.6, 0.6, FT.CHAIR))
+    engine.apply_rules_incremental(layout, None)
+
+    index = engine._index
+    for f_type in {f.type for f in layout} | set(index.types()):
+        assert {id(f) for f in index.by_type(f_type)} == {id(f) for f in layout if f.type == f_type}
+
+    def disc(item):
+        return item.x + item.width / 2, item.y + item.height / 2, math.hypot(item.width, item.height) / 2
+
+    for item in layout:
+        cx, cy, r = disc(item)
+        expected = {id(o) for o in layout if o is not item
+                    and math.hypot(disc(o)[0] - cx, disc(o)[1] - cy) - r - disc(o)[2] <= 1.0}
+        assert {id(o) for o in index.near(item, 1.0)} == expected
+
+
+def test_apply_rules_batch_genomes_match_serial_and_pool():
+    """测试批量修复：基因组数组输入，串行、临时进程池与复用进程池结果一致"""
+    config = {"room_width": 12, "room_height": 10, "doors": [[5, 0, 1, 0.2]], "windows": []}
+    room = Room(12, 10, config)
+    template = [F(0, 0, 3, 4, FT.BED), F(0, 0, 2, 3, FT.WARDROBE), F(0, 0, 1, 1, FT.COFFEE_TABLE)]
+    rng = np.random.default_rng(0)
+    genomes = np.concatenate([rng.uniform(0, 8, (6, 3)), rng.uniform(0, 6, (6, 3))], axis=1)
+
+    engine = RuleEngine(config)
+    layouts, summaries = engine.apply_rules_batch(genomes, room, template=template)
+    assert len(layouts) == len(summaries) == 6
+    assert set(summaries[0]) == {"collisions", "clearance_issues", "blocked_paths", "removed", "moved"}
+    assert all(s["removed"] == 3 - len(l) for l, s in zip(layouts, summaries))
+
+    pooled, pooled_summaries = engine.apply_rules_batch(genomes, room, workers=2, template=template)
+    assert pooled_summaries == summaries
+    assert [[(f.type, f.x, f.y) for f in l] for l in pooled] == [[(f.type, f.x, f.y) for f in l] for l in layouts]
+
+    # 同一进程池跨多代复用
+    with engine.repair_pool(room, 2, template) as pool:
+        reused = [engine.apply_rules_batch(genomes[k:k + 3], room, template=template, pool=pool)[1] for k in (0, 3)]
+    assert reused[0] + reused[1] == summaries
+
+    with pytest.raises(ValueError):
+        engine.apply_rules_batch(genomes, room)
+
+
+def test_rule_stats_logger_timing_and_export(monkeypatch, tmp_path):
+    """测试规则耗时统计：环境变量开关、改动家具数、JSON/CSV 导出"""
+    monkeypatch.delenv(STATS_ENV_VAR, raising=False)
+    quiet = RuleStatsLogger()
+    quiet.record_time("clearance", 1000, changed=1)
+    assert not quiet.enabled and not quiet.rule_timed
+
+    monkeypatch.setenv(STATS_ENV_VAR, "1")
+    engine = RuleEngine(ENGINE_CONFIG)  # 环境变量在构造时读取，不使用共享 fixture
+    assert engine.stats_logger.enabled and engine.position_rules.logger is engine.stats_logger
+    # 与床重叠的茶几会被碰撞规则移除，计入改动家具数
+    layout = [F(2, 2, 3, 4, FT.BED), F(6.5, 2, 2, 3, FT.WARDROBE), F(15, 15, 1, 2, FT.BOOKSHELF),
+              F(3, 3, 1, 1, FT.COFFEE_TABLE)]
+    engine.apply_rules_incremental(layout, None)
+
+    logger = engine.stats_logger
+    assert set(logger.rule_timed) == set(engine.rule_stats)
+    assert all(logger.rule_timed[name] == engine.rule_stats[name] for name in engine.rule_stats)
+    rows = logger.rows()
+    assert rows == sorted(rows, key=lambda row: -row["total_ms"])
+    for row in rows:
+        assert 0 < row["p50_us"] <= row["p99_us"] <= row["max_us"]
+    assert next(row for row in rows if row["rule"] == "collision_fix")["items_changed"] >= 1
+
+    logger.to_json(tmp_path / "stats.json")
+    logger.to_csv(tmp_path / "stats.csv")
+    exported = json.loads((tmp_path / "stats.json").read_text())
+    assert set(exported) == {row["rule"] for row in rows}
+    assert sum(exported[rows[0]["rule"]]["histogram"]) == rows[0]["timed"]
+    with open(tmp_path / "stats.csv") as f:
+        assert [r["rule"] for r in csv.DictReader(f)] == [row["rule"] for row in rows]
+
+
+def test_layout_index_buckets_and_nearest():
+    """测试按类型分桶的布局索引：增删维护分桶，KD 树最近邻与逐个比较多边形距离一致"""
+    rng = random.Random(0)
+    layout = [F(rng.uniform(0, 30), rng.uniform(0, 30), rng.uniform(0.3, 2.5), rng.uniform(0.3, 2.5),
+                rng.choice([FT.CHAIR, FT.SOFA]), rotation=rng.choice([0, 45, 90])) for _ in range(120)]
+    index = LayoutIndex(layout)
+    chairs = [f for f in layout if f.type == FT.CHAIR]
+    assert index.by_type(FT.CHAIR) == chairs and len(chairs) > LINEAR_SCAN_MAX
+    assert index.by_type(FT.BED) == [] and len(index) == len(layout)
+
+    def brute(item):
+        return min((c for c in chairs if c is not item), key=lambda c: item.polygon.distance(c.polygon))
+
+    for item in layout:
+        found = index.nearest(item, FT.CHAIR)
+        assert found is not item
+        assert item.polygon.distance(found.polygon) == item.polygon.distance(brute(item).polygon)
+
+    # 移动后 invalidate，KD 树重建
+    probe = layout[0]
+    target = chairs[-1] if chairs[-1] is not probe else chairs[-2]
+    target.set_position(probe.x + 0.01, probe.y + 0.01)
+    index.invalidate(FT.CHAIR)
+    assert index.nearest(probe, FT.CHAIR) is brute(probe)
+
+    index.remove(target)
+    assert target not in index.by_type(FT.CHAIR)
+    index.add(target)
+    assert index.by_type(FT.CHAIR)[-1] is target
+
+
+def test_nearest_neighbor_service_k_nearest_and_radius():
+    """测试最近邻服务：k 近邻与半径查询结果与逐个计算多边形距离一致"""
+    rng = random.Random(1)
+    layout = [F(rng.uniform(0, 25), rng.uniform(0, 25), rng.uniform(0.3, 2.0), rng.uniform(0.3, 2.0),
+                rng.choice([FT.CHAIR, FT.TABLE, FT.TV_STAND]), rotation=rng.choice([0, 30, 90])) for _ in range(150)]
+    service = LayoutIndex(layout).neighbors
+
+    for item in layout[:40]:
+        exact = sorted(item.polygon.distance(o.polygon) for o in layout if o.type == FT.CHAIR and o is not item)
+        assert [d for d, _ in service.k_nearest(item, FT.CHAIR, 3)] == exact[:3]
+        expected = [o for t in (FT.CHAIR, FT.TV_STAND) for o in layout
+                    if o.type == t and o is not item and item.polygon.distance(o.polygon) < 1.5]
+        assert service.within(item, [FT.CHAIR, FT.TV_STAND], 1.5) == expected
+    assert service.k_nearest(layout[0], FT.BED, 2) == [] and service.nearest(layout[0], FT.BED) is None
+
+
+def test_room_prepared_zones_match_shapely():
+    """测试房间预构建几何：轴对齐快速路径与 Shapely 判断一致，区域按缓冲距离缓存且可 pickle"""
+    room = Room(10, 8, {"doors": [[4, 0, 1.5, 0.2]], "windows": [[0, 3, 0.2, 2]]})
+    zone = room.zones("door", 0.8)[0]
+    assert room.zones("door", 0.8)[0] is zone and zone.bounds == (3.2, -0.8, 6.3, 1.0)
+    assert room.zone_bounds("door", (0.3, 1.2)).tolist() == [[3.7, -1.2, 5.8, 1.4]]
+    assert room.zone_bounds("entrance").tolist() == [[4, 0, 5.5, 0.2]]
+    assert len(room.get_wall_segments()) == 4 and room.wall_segments.shape == (4, 2, 2)
+
+    rng = random.Random(0)
+    for _ in range(200):
+        item = F(rng.uniform(-1, 9), rng.uniform(-1, 7), rng.uniform(0.5, 2.5), rng.uniform(0.5, 2.5),
+                 FT.CHAIR, rotation=rng.choice([0, 90, 180, 270, 45]))
+        assert room.is_within_bounds(item) == room.room_polygon.contains(item.polygon)
+        assert Room.overlaps_zone(item, zone) == item.polygon.intersects(zone.polygon)
+
+    restored = pickle.loads(pickle.dumps(room))
+    assert restored.zones("door", 0.8)[0].bounds == zone.bounds
+
+
+def test_clearance_checks_use_pair_table_min_clear():
+    """测试间距检查按 min_clear 表（双向取大）判定，人体工学检查不小于默认通道宽度"""
+    table = F(2, 2, 1.2, 0.8, FT.TABLE)
+    chair = F(3.7, 2, 0.5, 0.5, FT.CHAIR)      # 间距 0.5 < 0.75（桌椅规则）
+    tv = F(2, 5, 1.5, 0.4, FT.TV_STAND)
+    sofa = F(2, 5.6, 2.0, 0.9, FT.SOFA)       # 间距 0.2，TV→沙发 0.0 与缺省 0.3 取大
+    layout = [table, chair, tv, sofa]
+    room = Room(10, 8)
+
+    issues = check_all_clearances(layout, room)
+    blocking = sorted(issue.blocking_id for issue in issues)
+    assert blocking == sorted([table.id, chair.id, tv.id, sofa.id])
+    for issue in issues:
+        assert math.hypot(issue.offset_x, issue.offset_y) == pytest.approx(
+            0.75 - 0.5 if issue.blocking_id in (table.id, chair.id) else 0.3 - 0.2)
+
+    pairs = {(a.id, b.id): gap for a, b, gap in check_human_ergonomics(layout)}
+    assert pairs[(table.id, chair.id)] == pytest.approx(0.75 - 0.5)
+    assert pairs[(tv.id, sofa.id)] == pytest.approx(MIN_PASSAGE_WIDTH - 0.2)
+    assert (table.id, tv.id) not in pairs
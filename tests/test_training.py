@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+import torch
+from train.rollout_buffer import RolloutBuffer
+
+
+def test_rollout_buffer_gae_matches_discounted_returns():
+    """测试 lambda=1 时 GAE 回报等于回合内折扣回报，且小批量覆盖全部样本"""
+    T, B, gamma = 4, 2, 0.9
+    buffer = RolloutBuffer(T, B, obs_dim=3, action_dim=2)
+    rewards = torch.tensor([[1.0, 2.0], [1.0, 0.0], [1.0, 1.0], [1.0, 3.0]])
+    dones = torch.tensor([[0.0, 0.0], [1.0, 0.0], [0.0, 0.0], [0.0, 1.0]])
+    for t in range(T):
+        obs = torch.full((B, 3), float(t))
+        buffer.add(obs, torch.zeros(B, 2), torch.zeros(B), torch.rand(B), rewards[t], dones[t])
+    buffer.compute_gae(torch.tensor([10.0, 10.0]), gamma=gamma, gae_lambda=1.0)
+
+    expected = torch.zeros(T, B)
+    running = torch.tensor([10.0, 10.0])
+    for t in reversed(range(T)):
+        running = rewards[t] + gamma * running * (1.0 - dones[t])
+        expected[t] = running
+    assert torch.allclose(buffer.returns, expected)
+
+    seen = torch.cat([obs[:, 0] for obs, *_ in buffer.minibatches(3)])
+    assert sorted(seen.tolist()) == sorted([float(t) for t in range(T) for _ in range(B)])
+
+
+def test_exported_policy_matches_deterministic_batch_actions(tmp_path):
+    """测试 TorchScript 导出的推理图与确定性批量动作一致，且 act 不修改输入"""
+    from model.ppo_agent import FurniturePPOAgent, load_policy
+
+    torch.manual_seed(0)
+    agent = FurniturePPOAgent(state_dim=12, action_dim=3)
+    states = torch.rand(5, 12)
+    path = str(tmp_path / "policy.pt")
+    agent.export_torchscript(path)
+    policy = load_policy(path)
+
+    expected, _, _, _ = agent.act_batch(states, deterministic=True)
+    assert torch.equal(policy(states), torch.as_tensor(expected))
+    assert ((expected[:, 2] * 4) % 1 == 0).all()
+
+    single = states[0].clone()
+    action, _ = agent.act(single, deterministic=True)
+    assert torch.equal(single, states[0])
+    assert np.allclose(action, expected[0], atol=1e-6)
+
+
+def test_policy_server_batches_concurrent_requests(tmp_path):
+    """测试推理服务合并并发请求，返回与本地确定性动作一致的结果"""
+    import threading
+    from model.inference_server import PolicyClient, PolicyServer
+    from model.ppo_agent import FurniturePPOAgent
+
+    torch.manual_seed(0)
+    agent = FurniturePPOAgent(state_dim=12, action_dim=3)
+    states = torch.rand(8, 12)
+    expected = agent.act_batch(states, deterministic=True)[0]
+    results = [None] * len(states)
+
+    with PolicyServer(agent, str(tmp_path / "policy.sock"), max_latency=0.05) as server:
+        def request(k):
+            with PolicyClient(server.address) as client:
+                results[k] = client.act(states[k], deterministic=True)[0]
+
+        threads = [threading.Thread(target=request, args=(k,)) for k in range(len(states))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert np.allclose(np.stack(results), expected, atol=1e-6)
+    assert server.stats["requests"] == len(states)
+    assert server.stats["batches"] < len(states)
+
+
+def test_scripted_policy_and_client_match_agent_return_shapes(tmp_path):
+    """测试 .pt 推理图适配器与推理服务客户端的 act / act_batch 返回形状与 FurniturePPOAgent 一致"""
+    from model.inference_server import PolicyClient, PolicyServer, load_agent
+    from model.ppo_agent import FurniturePPOAgent
+
+    torch.manual_seed(0)
+    agent = FurniturePPOAgent(state_dim=12, action_dim=3)
+    states = torch.rand(4, 12)
+    path = str(tmp_path / "policy.pt")
+    agent.export_torchscript(path)
+    scripted = load_agent(path, 12, 3)
+    expected = agent.act_batch(states, deterministic=True)
+
+    batch = scripted.act_batch(states, deterministic=True)
+    assert len(batch) == len(expected) and np.allclose(batch[0], expected[0], atol=1e-6)
+    action, log_prob = scripted.act(states[0], deterministic=True)
+    assert np.allclose(action, expected[0][0], atol=1e-6) and log_prob is None
+    with pytest.raises(ValueError):
+        scripted.act_batch(states, deterministic=False)
+
+    with PolicyServer(scripted, str(tmp_path / "policy.sock")) as server:
+        with PolicyClient(server.address) as client:
+            batch = client.act_batch(states, deterministic=True)
+            assert len(batch) == len(expected) and np.allclose(batch[0], expected[0], atol=1e-6)
+            action, _ = client.act(states[0], deterministic=True)
+            assert np.allclose(action, expected[0][0], atol=1e-6)
+            with pytest.raises(ValueError):
+                client.act_batch(states, deterministic=False)
@@ -2,7 +2,7 @@ import os
 from train.curriculum_scheduler import CurriculumScheduler
 from env.layout_env import LayoutEnv
 from model.ppo_agent import PPOAgent
-from utils.visualizer import save_gif_from_frames
+from utils.frame_writer import FrameWriter
 
 def run_curriculum_training(config):
     scheduler = CurriculumScheduler(config["curriculum_schedule_path"])
@@ -14,7 +14,8 @@ def run_curriculum_training(config):
     save_every = config.get("save_every", 1000)
 
     reward_history = []
-    gif_frames = []
+    # 🎥 可选：后台线程流式写入 GIF
+    gif_writer = FrameWriter("output/final_run.gif") if config.get("record_gif", False) else None
 
     for step in range(total_steps):
         scheduler.update(step)
@@ -35,9 +36,8 @@ def run_curriculum_training(config):
             agent.store_transition(obs, action, reward, done)
             ep_reward += reward
 
-            if config.get("record_gif", False):
-                frame = env.render(mode="rgb_array")
-                gif_frames.append(frame)
+            if gif_writer is not None:
+                gif_writer.write(env.render(mode="rgb_array"))
 
         agent.train()
         reward_history.append(ep_reward)
@@ -46,8 +46,8 @@ def run_curriculum_training(config):
             agent.save_model(f"models/ppo_step_{step}.pth")
             print(f"✅ Step {step}: reward = {ep_reward:.2f}")
 
-    # 🎥 可选：保存为 GIF
-    if config.get("record_gif", False):
-        save_gif_from_frames(gif_frames, "output/final_run.gif")
+    if gif_writer is not None:
+        gif_writer.close()
+        print(f"🎞️ GIF saved to: output/final_run.gif ({gif_writer.written} frames, {gif_writer.dropped} dropped)")
 
     return reward_history
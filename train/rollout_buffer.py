@@ -0,0 +1,72 @@
+import torch
+from typing import Iterator, Optional, Tuple
+
+
+class RolloutBuffer:
+    """
+    预分配的 PPO 采样缓冲区：所有字段都是形状 (T, B, ...) 的连续张量，
+    T = 每次更新的采样步数，B = 向量化环境数量。
+    采样阶段逐步写入一行，结束后一次反向扫描计算 GAE，再按打乱的小批量训练。
+    """
+
+    def __init__(self, num_steps: int, num_envs: int, obs_dim: int, action_dim: int, device: str = "cpu"):
+        self.num_steps = num_steps
+        self.num_envs = num_envs
+        shape = (num_steps, num_envs)
+        self.obs = torch.zeros(shape + (obs_dim,), dtype=torch.float32, device=device)
+        self.actions = torch.zeros(shape + (action_dim,), dtype=torch.float32, device=device)
+        self.log_probs = torch.zeros(shape, dtype=torch.float32, device=device)
+        self.values = torch.zeros(shape, dtype=torch.float32, device=device)
+        self.rewards = torch.zeros(shape, dtype=torch.float32, device=device)
+        self.dones = torch.zeros(shape, dtype=torch.float32, device=device)
+        self.advantages = torch.zeros(shape, dtype=torch.float32, device=device)
+        self.returns = torch.zeros(shape, dtype=torch.float32, device=device)
+        self.step = 0
+
+    def __len__(self) -> int:
+        return self.num_steps * self.num_envs
+
+    def reset(self) -> None:
+        self.step = 0
+
+    def add(self, obs, actions, log_probs, values, rewards, dones) -> None:
+        """写入一步整批环境的数据；rewards/dones 可以是 numpy 数组"""
+        t = self.step
+        if t >= self.num_steps:
+            raise IndexError("RolloutBuffer is full, call reset() first")
+        self.obs[t] = torch.as_tensor(obs)
+        self.actions[t] = actions
+        self.log_probs[t] = log_probs
+        self.values[t] = values
+        self.rewards[t] = torch.as_tensor(rewards, dtype=torch.float32)
+        self.dones[t] = torch.as_tensor(dones, dtype=torch.float32)
+        self.step = t + 1
+
+    def compute_gae(self, last_values: torch.Tensor, gamma: float = 0.99, gae_lambda: float = 0.95) -> None:
+        """
+        广义优势估计：对 T 反向扫描一次，每步对 B 个环境向量化计算。
+        dones[t] 表示第 t 步后回合结束（环境已自动重置），此时不向后自举。
+        """
+        last_gae = torch.zeros(self.num_envs, device=self.values.device)
+        next_values = last_values
+        for t in reversed(range(self.step)):
+            not_done = 1.0 - self.dones[t]
+            delta = self.rewards[t] + gamma * next_values * not_done - self.values[t]
+            last_gae = delta + gamma * gae_lambda * not_done * last_gae
+            self.advantages[t] = last_gae
+            next_values = self.values[t]
+        self.returns[:self.step] = self.advantages[:self.step] + self.values[:self.step]
+
+    def minibatches(self, batch_size: int, generator: Optional[torch.Generator] = None
+                    ) -> Iterator[Tuple[torch.Tensor, ...]]:
+        """打乱 T×B 个样本，按 batch_size 产出 (obs, actions, log_probs, advantages, returns)"""
+        n = self.step * self.num_envs
+        obs = self.obs[:self.step].reshape(n, -1)
+        actions = self.actions[:self.step].reshape(n, -1)
+        log_probs = self.log_probs[:self.step].reshape(n)
+        advantages = self.advantages[:self.step].reshape(n)
+        returns = self.returns[:self.step].reshape(n)
+        order = torch.randperm(n, generator=generator, device=obs.device)
+        for start in range(0, n, batch_size):
+            idx = order[start:start + batch_size]
+            yield obs[idx], actions[idx], log_probs[idx], advantages[idx], returns[idx]
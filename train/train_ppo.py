@@ -1,33 +1,56 @@
 import os
+import time
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import imageio
-from env.layout_env import FurniturePlacementEnv
+from env.vector_env import VectorFurniturePlacementEnv
+from env.subproc_vector_env import SubprocVectorEnv
 from model.ppo_agent import FurniturePPOAgent
 from train.curriculum_scheduler import CurriculumScheduler
-from visualization.layout_plot import plot_layout
+from train.rollout_buffer import RolloutBuffer
+from utils.frame_writer import FrameWriter
 
 # ==== 超参数 ====
-NUM_EPISODES = 200
+NUM_UPDATES = 200
+NUM_ENVS = 64          # 向量化环境数量
+NUM_WORKERS = 0        # > 0 时环境切片分布到多个进程（共享内存交换观测）
+ROLLOUT_STEPS = 32     # 每次更新每个环境采样的步数
+ACTION_MODE = "snap"   # "snap"：(x, y) 映射到可行域最近单元；"continuous"：原样放置
 GAMMA = 0.99
+GAE_LAMBDA = 0.95
 CLIP_EPS = 0.2
 LEARNING_RATE = 3e-4
-UPDATE_INTERVAL = 4
-RENDER_EVERY_N_EPISODES = 25
-RECORD_LAST_N_EPISODES = 10
-DEFAULT_DPI = 150
-ROOM_WIDTH = 10  # 仅用于绘图
-ROOM_HEIGHT = 10
-
-# ==== 返回值计算 ====
-def compute_returns(rewards, gamma=0.99):
-    returns = []
-    R = 0
-    for r in reversed(rewards):
-        R = r + gamma * R
-        returns.insert(0, R)
-    return returns
+UPDATE_EPOCHS = 4      # 每批数据训练的轮数
+MINIBATCH_SIZE = 512
+MAX_GRAD_NORM = 0.5
+RENDER_EVERY_N_UPDATES = 25
+RECORD_LAST_N_UPDATES = 2
+FRAME_QUEUE_SIZE = 256  # 后台编码队列上限，满时丢帧而不阻塞训练
+GIF_PATH = "videos/final_ppo_run.gif"
+
+# ==== PPO 小批量更新 ====
+def ppo_update(agent, optimizer, buffer):
+    """对缓冲区数据做 UPDATE_EPOCHS 轮打乱的小批量 PPO 更新，返回最后一轮的平均损失"""
+    losses = []
+    for _ in range(UPDATE_EPOCHS):
+        losses.clear()
+        for obs, actions, old_log_probs, advantages, returns in buffer.minibatches(MINIBATCH_SIZE):
+            advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-8)
+            log_probs_new, values_new, entropy = agent.evaluate(obs, actions)
+            ratios = torch.exp(log_probs_new - old_log_probs)
+            surr1 = ratios * advantages
+            surr2 = torch.clamp(ratios, 1.0 - CLIP_EPS, 1.0 + CLIP_EPS) * advantages
+            actor_loss = -torch.min(surr1, surr2).mean()
+            critic_loss = (returns - values_new.squeeze(-1)).pow(2).mean()
+            loss = actor_loss + 0.5 * critic_loss - 0.01 * entropy.mean()
+
+            optimizer.zero_grad()
+            loss.backward()
+            nn.utils.clip_grad_norm_(agent.parameters(), MAX_GRAD_NORM)
+            optimizer.step()
+            losses.append(loss.item())
+    return sum(losses) / max(len(losses), 1)
 
 # ==== 主训练入口 ====
 def train():
@@ -35,89 +58,88 @@ def train():
     os.makedirs("videos", exist_ok=True)
 
     scheduler = CurriculumScheduler("configs/curriculum_schedule.yaml")
-    env = FurniturePlacementEnv(
+    env_cls = VectorFurniturePlacementEnv
+    env_kwargs = {}
+    if NUM_WORKERS > 0:
+        env_cls, env_kwargs = SubprocVectorEnv, {"num_workers": NUM_WORKERS}
+    env = env_cls(
+        NUM_ENVS,
         room_config_path="configs/room_config.json",
         furniture_config_path="configs/furniture_rules.json",
-        reward_config_path="configs/reward_config.yaml"
+        reward_config_path="configs/reward_config.yaml",
+        action_mode=ACTION_MODE,
+        **env_kwargs
     )
 
-    state_dim = len(env.reset())
-    action_dim = env.action_space.shape[0]
+    state_dim = env.observation_dim
+    action_dim = env.action_dim
     agent = FurniturePPOAgent(state_dim, action_dim)
     optimizer = optim.Adam(agent.parameters(), lr=LEARNING_RATE)
+    buffer = RolloutBuffer(ROLLOUT_STEPS, NUM_ENVS, state_dim, action_dim)
 
-    frames = []
+    frame_writer = None
+    episodes_done = 0
+    state = torch.as_tensor(env.reset())
 
-    for episode in range(NUM_EPISODES):
-        # ✅ Curriculum 阶段调度
-        scheduler.update(episode)
+    for update in range(NUM_UPDATES):
+        # 配置文件被修改时热加载（环境全部重置）
+        if env.reload_configs():
+            state = torch.as_tensor(env.reset())
+
+        # ✅ Curriculum 阶段调度（按已完成回合数推进，新阶段在各环境下次重置时生效）
+        scheduler.update(episodes_done)
         phase = scheduler.get_current_config()
         env.set_max_furniture(phase["max_furniture"])
         env.set_rotation_enabled(phase["allow_rotation"])
         env.update_reward_weights(phase["reward_weights"])
 
-        state = torch.tensor(env.reset(), dtype=torch.float32)
-        rewards, log_probs, values, states, actions = [], [], [], [], []
-        done = False
-
-        while not done:
-            action_vec, log_prob = agent.act(state)
-            next_state_raw, reward, done, _ = env.step(action_vec)
-            next_state = torch.tensor(next_state_raw, dtype=torch.float32)
-
-            value = agent.forward(state)[1]
-            states.append(state)
-            actions.append(torch.tensor(action_vec, dtype=torch.float32))
-            log_probs.append(log_prob)
-            values.append(value)
-            rewards.append(torch.tensor(reward, dtype=torch.float32))
-            state = next_state
-
-            if episode >= NUM_EPISODES - RECORD_LAST_N_EPISODES:
-                frame_path = "output/temp_frame.png"
-                plot_layout(env.furniture, ROOM_WIDTH, ROOM_HEIGHT,
-                            save_path=frame_path,
-                            title=f"Episode {episode+1}",
-                            dpi=DEFAULT_DPI)
-                frames.append(imageio.v2.imread(frame_path))
-
-        # PPO 更新
-        returns = compute_returns(rewards, GAMMA)
-        log_probs = torch.stack(log_probs)
-        values = torch.stack(values).squeeze()
-        actions = torch.stack(actions)
-        returns = torch.stack(returns).detach()
-        advantages = returns - values.detach()
-
-        for _ in range(UPDATE_INTERVAL):
-            log_probs_new, values_new, entropy = agent.evaluate(torch.stack(states), actions)
-            ratios = torch.exp(log_probs_new - log_probs.detach())
-            surr1 = ratios * advantages
-            surr2 = torch.clamp(ratios, 1.0 - CLIP_EPS, 1.0 + CLIP_EPS) * advantages
-            actor_loss = -torch.min(surr1, surr2).mean()
-            critic_loss = (returns - values_new).pow(2).mean()
-            loss = actor_loss + 0.5 * critic_loss - 0.01 * entropy.mean()
-
-            optimizer.zero_grad()
-            loss.backward()
-            optimizer.step()
-
-        total_reward = sum([r.item() for r in rewards])
-        print(f"🎮 Episode {episode+1}/{NUM_EPISODES} | Total reward: {total_reward:.2f}")
-
-        if (episode + 1) % RENDER_EVERY_N_EPISODES == 0:
-            save_path = f"output/episode_{episode+1}.png"
-            plot_layout(env.furniture, ROOM_WIDTH, ROOM_HEIGHT,
-                        save_path=save_path,
-                        title=f"Episode {episode+1}",
-                        dpi=DEFAULT_DPI)
+        buffer.reset()
+        episode_returns = []
+        rollout_start = time.perf_counter()
+
+        for _ in range(ROLLOUT_STEPS):
+            # 每步对整批环境只做一次前向
+            env_actions, raw_actions, log_prob, value = agent.act_batch(state)
+            next_state, reward, done, info = env.step(env_actions)
+            buffer.add(state, raw_actions, log_prob, value, reward, done)
+            if "episode_return" in info:
+                episode_returns.extend(info["episode_return"].tolist())
+            state = torch.as_tensor(next_state)
+
+            if update >= NUM_UPDATES - RECORD_LAST_N_UPDATES:
+                # 内存中光栅化后交给后台线程增量编码，训练循环不等待写盘
+                if frame_writer is None:
+                    frame_writer = FrameWriter(GIF_PATH, fps=2, max_queue=FRAME_QUEUE_SIZE)
+                frame_writer.write(env.render(mode="rgb_array", env=0))
+
+        episodes_done += len(episode_returns)
+        rollout_time = time.perf_counter() - rollout_start
+
+        # GAE + PPO 小批量更新
+        learn_start = time.perf_counter()
+        with torch.no_grad():
+            last_value = agent.critic(state).squeeze(-1)
+        buffer.compute_gae(last_value, GAMMA, GAE_LAMBDA)
+        loss = ppo_update(agent, optimizer, buffer)
+        learn_time = time.perf_counter() - learn_start
+
+        mean_return = sum(episode_returns) / len(episode_returns) if episode_returns else float("nan")
+        print(f"🎮 Update {update+1}/{NUM_UPDATES} | Episodes: {episodes_done} | Mean episode reward: {mean_return:.2f}"
+              f" | Loss: {loss:.3f} | Env SPS: {len(buffer) / rollout_time:,.0f}"
+              f" | Learner SPS: {len(buffer) * UPDATE_EPOCHS / learn_time:,.0f}")
+
+        if (update + 1) % RENDER_EVERY_N_UPDATES == 0:
+            save_path = f"output/update_{update+1}.png"
+            imageio.imwrite(save_path, env.render(mode="rgb_array", env=0))
             print(f"📸 Saved layout to {save_path}")
 
-    # ✅ 训练后保存动图
-    gif_path = "videos/final_ppo_run.gif"
-    if frames:
-        imageio.mimsave(gif_path, frames, fps=2)
-        print(f"🌀 Saved training gif to {gif_path}")
+    if NUM_WORKERS > 0:
+        env.close()
+
+    # ✅ 等待后台线程写完动图
+    if frame_writer is not None:
+        frame_writer.close()
+        print(f"🌀 Saved training gif to {GIF_PATH} ({frame_writer.written} frames, {frame_writer.dropped} dropped)")
     else:
         print("⚠️ No frames recorded. GIF not saved.")
 
@@ -0,0 +1,137 @@
+import io
+import os
+import queue
+import struct
+import threading
+import imageio
+import numpy as np
+from PIL import Image
+
+_STOP = object()
+
+
+class GifStream:
+    """
+    逐帧追加的动图 GIF 写入器（只保留文件句柄，不缓存帧）。
+    每帧由 Pillow 量化并编码为单帧 GIF，再拆出调色板和 LZW 数据作为局部调色板帧写入。
+    """
+
+    def __init__(self, path: str, fps: float = 2, loop: int = 0):
+        self.fp = open(path, "wb")
+        self.delay = max(1, int(round(100 / fps)))  # 单位 1/100 秒
+        self.loop = loop
+        self.size = None
+
+    def append_data(self, frame: np.ndarray) -> None:
+        im = Image.fromarray(np.asarray(frame, dtype=np.uint8)[..., :3]).quantize(256)
+        if self.size is None:
+            self.size = im.size
+            self.fp.write(b"GIF89a" + struct.pack("<HHBBB", im.size[0], im.size[1], 0, 0, 0))
+            self.fp.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+        elif im.size != self.size:
+            raise ValueError(f"Frame size {im.size} differs from first frame {self.size}")
+        buf = io.BytesIO()
+        im.save(buf, "GIF")
+        data = buf.getvalue()
+
+        # 单帧 GIF：头(6) + 逻辑屏幕描述(7) + 全局调色板 + [扩展块...] + 图像描述(10) + LZW 数据 + ';'
+        flags = data[10]
+        pos = 13 + (3 * 2 ** ((flags & 7) + 1) if flags & 0x80 else 0)
+        palette = data[13:pos]
+        while data[pos] == 0x21:  # 跳过扩展块
+            pos += 2
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+        descriptor = bytearray(data[pos:pos + 10])
+        if palette:  # 全局调色板改为局部调色板（保留隔行标志位）
+            descriptor[9] = (descriptor[9] & 0x40) | 0x80 | (flags & 7)
+        self.fp.write(b"\x21\xf9\x04\x00" + struct.pack("<H", self.delay) + b"\x00\x00")
+        self.fp.write(bytes(descriptor) + palette + data[pos + 10:-1])
+
+    def close(self) -> None:
+        if not self.fp.closed:
+            self.fp.write(b";")
+            self.fp.close()
+
+
+class FrameWriter:
+    """
+    后台帧写入线程：主循环只把帧放进有界队列，编码和写盘在后台线程中增量完成，
+    内存占用与录制长度无关。
+    - drop_when_full=True：队列满时丢弃新帧并计数（训练循环永不阻塞）
+    - drop_when_full=False：队列满时阻塞等待（背压，保证不丢帧）
+    .gif 使用 GifStream 逐帧追加，.mp4 等交给 imageio-ffmpeg。
+    """
+
+    def __init__(self, path: str, fps: float = 2, max_queue: int = 64, drop_when_full: bool = True):
+        self.path = path
+        self.fps = fps
+        self.drop_when_full = drop_when_full
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="FrameWriter", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        if self.path.lower().endswith(".gif"):
+            return GifStream(self.path, fps=self.fps)
+        return imageio.v2.get_writer(self.path, fps=self.fps)
+
+    def _run(self):
+        writer = None
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is _STOP:
+                    break
+                if writer is None:
+                    writer = self._open()
+                writer.append_data(frame)
+                self.written += 1
+        except Exception as e:
+            self._error = e
+            # 排空队列，避免阻塞模式下生产者卡死
+            while self._queue.get() is not _STOP:
+                pass
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def write(self, frame: np.ndarray) -> bool:
+        """提交一帧（会复制，调用方可继续复用缓冲区）；返回是否入队"""
+        if self.closed:
+            raise RuntimeError("FrameWriter is closed")
+        if self._error is not None:
+            raise RuntimeError(f"FrameWriter failed: {self._error}") from self._error
+        frame = np.array(frame, dtype=np.uint8, copy=True)
+        if not self.drop_when_full:
+            self._queue.put(frame)
+            return True
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self) -> int:
+        """等待剩余帧写完并关闭文件，返回写入的帧数"""
+        if self.closed:
+            return self.written
+        self.closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"FrameWriter failed: {self._error}") from self._error
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,98 @@
+import numpy as np
+from typing import List, Optional
+from core.furniture import Furniture
+from core.layout_state import TYPE_INDEX
+
+# 每种家具类型的 RGB 颜色（按 FurnitureType 顺序循环取色）
+PALETTE = np.array([
+    [102, 153, 204], [221, 132, 82], [85, 168, 104], [196, 78, 82], [129, 114, 179],
+    [147, 120, 96], [218, 139, 195], [140, 140, 140], [204, 185, 116], [100, 181, 205],
+], dtype=np.uint8)
+FLOOR_COLOR = np.array([245, 242, 235], dtype=np.uint8)
+WALL_COLOR = np.array([40, 40, 40], dtype=np.uint8)
+DOOR_COLOR = np.array([230, 60, 60], dtype=np.uint8)
+WINDOW_COLOR = np.array([80, 170, 240], dtype=np.uint8)
+EDGE_COLOR = np.array([20, 20, 20], dtype=np.uint8)
+
+
+class LayoutRasterizer:
+    """
+    纯 NumPy 布局光栅化：直接把房间、门窗和家具矩形画进 (H, W, 3) uint8 数组。
+    墙体/门窗背景只画一次并缓存，每帧只复制背景再用切片填充家具矩形，
+    不经过 matplotlib 也不落盘，适合训练时逐步抓帧。
+    图像 y 轴向上（第 0 行对应房间顶部），与 plot_layout 的方向一致。
+    """
+
+    def __init__(self, room_width: float, room_height: float, doors=(), windows=(),
+                 pixels_per_meter: int = 32, wall_px: int = 3):
+        self.room_width = float(room_width)
+        self.room_height = float(room_height)
+        self.scale = pixels_per_meter
+        self.wall_px = wall_px
+        self.width_px = int(round(self.room_width * self.scale)) + 2 * wall_px
+        self.height_px = int(round(self.room_height * self.scale)) + 2 * wall_px
+
+        bg = np.empty((self.height_px, self.width_px, 3), dtype=np.uint8)
+        bg[:] = WALL_COLOR
+        bg[wall_px:-wall_px, wall_px:-wall_px] = FLOOR_COLOR
+        for x, y, w, h in doors:
+            self._fill(bg, x, y, x + w, y + h, DOOR_COLOR, pad=wall_px)
+        for x, y, w, h in windows:
+            self._fill(bg, x, y, x + w, y + h, WINDOW_COLOR, pad=wall_px)
+        self.background = bg
+
+    @classmethod
+    def from_room(cls, room, **kwargs) -> "LayoutRasterizer":
+        """room.doors / room.windows 为 ((x, y, w, h), polygon) 元组"""
+        return cls(room.width, room.height,
+                   doors=[rect for rect, _ in room.doors],
+                   windows=[rect for rect, _ in room.windows], **kwargs)
+
+    def _pixel_box(self, x0, y0, x1, y1, pad: int = 0):
+        """房间坐标矩形 → 像素切片边界（裁剪到图像内，pad 让贴墙的门窗覆盖墙体）"""
+        s, o = self.scale, self.wall_px
+        c0 = int(np.floor(x0 * s)) + o
+        c1 = int(np.ceil(x1 * s)) + o
+        r0 = self.height_px - (int(np.ceil(y1 * s)) + o)
+        r1 = self.height_px - (int(np.floor(y0 * s)) + o)
+        if pad:
+            c0, r0 = (0 if c0 <= o else c0), (0 if r0 <= o else r0)
+            c1 = self.width_px if c1 >= self.width_px - o else c1
+            r1 = self.height_px if r1 >= self.height_px - o else r1
+        return max(c0, 0), min(c1, self.width_px), max(r0, 0), min(r1, self.height_px)
+
+    def _fill(self, img, x0, y0, x1, y1, color, pad: int = 0, edge: bool = False) -> None:
+        c0, c1, r0, r1 = self._pixel_box(x0, y0, x1, y1, pad)
+        if c0 >= c1 or r0 >= r1:
+            return
+        img[r0:r1, c0:c1] = color
+        if edge:
+            img[r0, c0:c1] = EDGE_COLOR
+            img[r1 - 1, c0:c1] = EDGE_COLOR
+            img[r0:r1, c0] = EDGE_COLOR
+            img[r0:r1, c1 - 1] = EDGE_COLOR
+
+    def render_arrays(self, x, y, width, height, rotation_idx, type_ids,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        按数组绘制家具：x/y 为左下角，rotation_idx 为 90° 的倍数（绕中心旋转，奇数时交换宽高）。
+        传入 out 可复用输出缓冲区。
+        """
+        img = out if out is not None else np.empty_like(self.background)
+        img[:] = self.background
+        for fx, fy, fw, fh, r, t in zip(x, y, width, height, rotation_idx, type_ids):
+            if int(r) % 2 == 1:
+                cx, cy = fx + fw / 2, fy + fh / 2
+                fx, fy, fw, fh = cx - fh / 2, cy - fw / 2, fh, fw
+            self._fill(img, fx, fy, fx + fw, fy + fh, PALETTE[int(t) % len(PALETTE)], edge=True)
+        return img
+
+    def render(self, furniture_list: List[Furniture], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """绘制 Furniture 列表（朝向取最接近的 90° 倍数）"""
+        return self.render_arrays(
+            [f.x for f in furniture_list], [f.y for f in furniture_list],
+            [f.width for f in furniture_list], [f.height for f in furniture_list],
+            [round(f.rotation / 90) for f in furniture_list],
+            [TYPE_INDEX.get(f.type, 0) for f in furniture_list],
+            out=out,
+        )
@@ -1,12 +1,18 @@
-import imageio
 import matplotlib.pyplot as plt
+from utils.frame_writer import FrameWriter
 
 def save_gif_from_frames(frames, filename="output/ppo_run.gif", fps=2):
-    if frames:
-        imageio.mimsave(filename, frames, fps=fps)
-        print(f"🎞️ GIF saved to: {filename}")
-    else:
+    """frames 可以是列表或生成器；逐帧流式编码，不会一次性持有全部编码数据"""
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
         print("⚠️ No frames to save as GIF.")
+        return
+    with FrameWriter(filename, fps=fps, drop_when_full=False) as writer:
+        writer.write(first)
+        for frame in frames:
+            writer.write(frame)
+    print(f"🎞️ GIF saved to: {filename} ({writer.written} frames)")
 
 def debug_plot(layout, save_path=None):
     """